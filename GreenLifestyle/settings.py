@@ -84,6 +84,75 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The cache must be shared by every process: signal handlers in one web worker
+# and the management commands (refresh_stats, update_trending_scores, ...)
+# invalidate what the other workers serve. The database backend is shared without
+# another service (create its table with `python manage.py createcachetable`);
+# Redis or memcached can replace it where available. Counters that must not lose
+# updates (core/stats.py) are kept in the database instead of the cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {
+            # Room for the per-user profile summaries
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+# Tests flush buffered activity from requests only (see GreenLifestyle/test_runner.py)
+TEST_RUNNER = 'GreenLifestyle.test_runner.TestRunner'
+
+# Seconds a cached tip list page stays valid (writes invalidate it sooner)
+TIP_LIST_CACHE_TIMEOUT = 300
+
+# Seconds before stored site-wide totals are recounted from the source tables
+STATS_REFRESH_INTERVAL = 3600
+
+# Trending score: days of engagement counted and how fast a tip's score decays with age
+TRENDING_WINDOW_DAYS = 7
+TRENDING_GRAVITY = 1.8
+
+# Days of inactivity that halve a member's weight in community suggestions
+COMMUNITY_ACTIVITY_HALF_LIFE_DAYS = 14
+
+# Authors with more followers than this are merged into feeds at read time instead of fanned out
+FEED_FANOUT_LIMIT = 1000
+
+# Requests allowed per user (per IP address for anonymous visitors) on write endpoints, see core/ratelimit.py
+RATE_LIMITS = {
+    'toggle': '60/m',
+    'follow': '30/m',
+    'comment': '10/m',
+    'login': '10/5m',
+    'signup': '5/h',
+}
+
+# Rate limits count anonymous visitors by REMOTE_ADDR. Only behind a proxy that always sets
+# the header itself (e.g. 'HTTP_X_REAL_IP' on PythonAnywhere) may it be named here; otherwise
+# clients could pick their own address with it.
+RATE_LIMIT_IP_HEADER = None
+
+# Page view logging is buffered and written by the request that crosses a limit, see accounts/activity.py
+# (BACKGROUND_THREAD also flushes idle processes where threads are allowed)
+ACTIVITY_BUFFER = {
+    'FLUSH_INTERVAL': 5,
+    'MAX_PENDING': 500,
+    'BACKGROUND_THREAD': True,
+}
+
+# Per-process following sets for is_following() checks, see accounts/follow_graph.py
+# (only used when the cache is Redis or memcached)
+FOLLOW_GRAPH = {
+    'ENABLED': True,
+    'MAX_USERS': 10000,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from accounts.activity import activity_buffer
+
+
+class TestRunner(DiscoverRunner):
+    # Flushing buffered activity from requests only (a flusher thread would write outside
+    # the test transactions)
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(
+            ACTIVITY_BUFFER={**getattr(settings, 'ACTIVITY_BUFFER', {}), 'BACKGROUND_THREAD': False},
+        )
+        self._test_settings.enable()
+
+    def teardown_databases(self, old_config, **kwargs):
+        # Visits still buffered belong to the test database and must not reach the real one at exit
+        activity_buffer.discard()
+        super().teardown_databases(old_config, **kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
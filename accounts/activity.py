@@ -0,0 +1,276 @@
+"""
+Write-behind buffer for UserActivity page view logging.
+
+`UserActivity.log_activity()` only records the visit in memory. Visits are
+merged per (user or session, date) and written in one transaction every
+FLUSH_INTERVAL seconds, or sooner once MAX_PENDING rows are waiting.
+The request that crosses either limit writes the batch itself, so nothing
+depends on threads being allowed in web workers (they are not on
+PythonAnywhere); with BACKGROUND_THREAD a flusher thread also writes
+quiet processes' visits on time. Whatever is left is flushed when the
+process exits.
+
+A failed write puts the batch back into the buffer, merged with the visits
+recorded meanwhile, and it is retried FLUSH_INTERVAL seconds later.
+
+With SYNCHRONOUS every visit is written immediately.
+
+Other apps can store more from the same batch by listening to
+`activity_flushed`, which is sent inside the flush transaction with the
+pending visits (tips/view_stats.py uses it for per-tip view counts).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_INTERVAL': 5,
+    'MAX_PENDING': 500,
+    'SYNCHRONOUS': False,
+    'BACKGROUND_THREAD': True,
+}
+
+def _options():
+    return {**DEFAULTS, **getattr(settings, 'ACTIVITY_BUFFER', {})}
+
+
+# Sent with pending={(user_id, session_key, date): PendingActivity}
+activity_flushed = Signal()
+
+
+class PendingActivity:
+    # Increments waiting to be written to one UserActivity row
+
+    __slots__ = ('visits', 'tip_ids')
+
+    def __init__(self):
+        self.visits = 0
+        self.tip_ids = {}
+
+    def add(self, tip_id=None):
+        self.visits += 1
+        if tip_id is not None:
+            # Views per tip, in first-view order
+            self.tip_ids[tip_id] = self.tip_ids.get(tip_id, 0) + 1
+
+    def merge(self, other):
+        # Adding a batch that was recorded earlier (its tips come first)
+        self.visits += other.visits
+        tip_ids = dict(other.tip_ids)
+        for tip_id, count in self.tip_ids.items():
+            tip_ids[tip_id] = tip_ids.get(tip_id, 0) + count
+        self.tip_ids = tip_ids
+
+
+class ActivityBuffer:
+
+    def __init__(self, flush_interval=None, max_pending=None, synchronous=None, background_thread=None):
+        # Arguments override ACTIVITY_BUFFER, which is otherwise read on every use
+        self._overrides = {
+            'FLUSH_INTERVAL': flush_interval,
+            'MAX_PENDING': max_pending,
+            'SYNCHRONOUS': synchronous,
+            'BACKGROUND_THREAD': background_thread,
+        }
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+        self._pid = os.getpid()
+        self._flushed_at = time.monotonic()
+        self._retry_at = 0
+
+    def _option(self, name):
+        value = self._overrides[name]
+        return _options()[name] if value is None else value
+
+    @property
+    def flush_interval(self):
+        return self._option('FLUSH_INTERVAL')
+
+    @property
+    def max_pending(self):
+        return self._option('MAX_PENDING')
+
+    @property
+    def synchronous(self):
+        return self._option('SYNCHRONOUS')
+
+    @property
+    def background_thread(self):
+        return self._option('BACKGROUND_THREAD')
+
+    def record(self, user_id, session_key, date, tip_id=None):
+        # Counting one visit for a user (or an anonymous session) on a date
+        key = (user_id, None if user_id else session_key, date)
+
+        with self._lock:
+            self._reset_after_fork()
+            self._pending.setdefault(key, PendingActivity()).add(tip_id)
+            size = len(self._pending)
+
+        if self.synchronous or self._flush_due(size):
+            self.flush()
+        elif self.background_thread:
+            self._start()
+
+    def _flush_due(self, size):
+        # Whether this request should write the batch (not while a failed write waits for its retry)
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        return size >= self.max_pending or now - self._flushed_at >= self.flush_interval
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Writing every buffered visit in one transaction.
+
+        Returns the number of UserActivity rows created or updated. When
+        the write fails, the visits go back into the buffer and 0 is
+        returned.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+
+        if not pending:
+            return 0
+
+        try:
+            return write_activity(pending)
+        except Exception:
+            logger.exception('Flushing buffered activity failed, keeping %d rows for the next attempt', len(pending))
+            self._restore(pending)
+            return 0
+
+    def discard(self):
+        # Dropping buffered visits without writing them (the test runner does before dropping its database)
+        with self._lock:
+            self._pending = {}
+
+    def _restore(self, pending):
+        # Putting a failed batch back in front of the visits recorded meanwhile
+        with self._lock:
+            for key, activity in self._pending.items():
+                if key in pending:
+                    activity.merge(pending[key])
+                    pending[key] = activity
+                else:
+                    pending[key] = activity
+            self._pending = pending
+            self._retry_at = time.monotonic() + self.flush_interval
+
+    def _start(self):
+        # Starting the flusher thread on first use (once per process)
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='activity-buffer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+
+            close_old_connections()
+            try:
+                if time.monotonic() >= self._retry_at:
+                    self.flush()
+            finally:
+                close_old_connections()
+
+    def _reset_after_fork(self):
+        # A forked worker must not reuse the parent's thread or pending visits
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._pending = {}
+            self._thread = None
+
+
+def write_activity(pending):
+    # Merging buffered visits into existing rows and creating the missing ones
+    from .models import CustomUser, UserActivity
+
+    now = timezone.now()
+
+    # Ignoring users deleted since their visit (their rows would fail the whole batch)
+    user_ids = {user_id for user_id, _, _ in pending if user_id}
+    if user_ids:
+        live = set(CustomUser.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        pending = {key: activity for key, activity in pending.items() if not key[0] or key[0] in live}
+
+    with transaction.atomic():
+        existing = {}
+        for date in {date for _, _, date in pending}:
+            user_ids = [user_id for user_id, _, day in pending if day == date and user_id]
+            session_keys = [session_key for user_id, session_key, day in pending if day == date and not user_id]
+
+            rows = UserActivity.objects.none()
+            if user_ids:
+                rows |= UserActivity.objects.filter(date=date, user_id__in=user_ids)
+            if session_keys:
+                rows |= UserActivity.objects.filter(date=date, user__isnull=True, session_key__in=session_keys)
+
+            for row in rows.order_by('pk'):
+                key = (row.user_id, None if row.user_id else row.session_key, row.date)
+                existing.setdefault(key, row)
+
+        updated = []
+        created = []
+        for key, activity in pending.items():
+            row = existing.get(key)
+            if row is None:
+                user_id, session_key, date = key
+                created.append(UserActivity(
+                    user_id=user_id,
+                    session_key=session_key,
+                    date=date,
+                    visits_count=activity.visits,
+                    page_views=activity.visits,
+                    tips_viewed=list(activity.tip_ids),
+                ))
+                continue
+
+            row.visits_count = F('visits_count') + activity.visits
+            row.page_views = F('page_views') + activity.visits
+            row.tips_viewed = row.tips_viewed + [tip_id for tip_id in activity.tip_ids if tip_id not in row.tips_viewed]
+            row.last_activity = now
+            updated.append(row)
+
+        if updated:
+            UserActivity.objects.bulk_update(updated, ['visits_count', 'page_views', 'tips_viewed', 'last_activity'])
+        if created:
+            UserActivity.objects.bulk_create(created)
+
+        activity_flushed.send(sender=ActivityBuffer, pending=pending)
+
+    return len(updated) + len(created)
+
+
+activity_buffer = ActivityBuffer()
+
+
+@atexit.register
+def flush_on_exit():
+    # Writing whatever is still buffered when the worker stops
+    try:
+        activity_buffer.flush()
+    except Exception:
+        logger.exception('Flushing buffered activity at shutdown failed')
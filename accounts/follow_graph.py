@@ -0,0 +1,219 @@
+"""
+Per-process index of who follows whom, for hot is_following() checks.
+
+Each user's following set is kept as a sorted `array('q')` of user ids
+(8 bytes per edge) and answered with a binary search, so repeated
+membership checks in loops cost no queries. Batch lookups load every
+missing set with one query.
+
+Entries are validated against a per-user version token in the shared
+cache. A Follow create or delete replaces the follower's token
+(accounts/signals.py), which makes every process reload that one set on
+its next lookup. A token lost from the cache is simply recreated, so an
+eviction can only cause a reload, never a stale answer.
+
+Every check reads the token, so the index only pays off when that read
+is cheaper than the Follow query it replaces: it is used only when the
+default cache is Redis or memcached (cache_is_in_memory_server() in
+core/checks.py). With the file or database backend, a per-process one,
+or ENABLED off, every check goes to the database and no tokens are
+written.
+
+Memory is bounded by an LRU over users (MAX_USERS), and `memory_usage()`
+reports what the index holds.
+"""
+
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.checks import cache_is_in_memory_server
+
+KEY_PREFIX = 'accounts:follow_graph:'
+VERSION_TIMEOUT = 7 * 24 * 3600
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_USERS': 10000,
+}
+
+
+def _options():
+    return {**DEFAULTS, **getattr(settings, 'FOLLOW_GRAPH', {})}
+
+
+def enabled():
+    # The token lookup of a disk or database cache costs as much as the query it saves
+    return _options()['ENABLED'] and cache_is_in_memory_server()
+
+
+def _key(user_id):
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def _new_token():
+    return time.time_ns()
+
+
+def _versions(user_ids):
+    # Current version token of each user, creating the missing ones
+    keys = {_key(user_id): user_id for user_id in user_ids}
+    found = cache.get_many(keys)
+
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            # add() keeps the token another process may have created meanwhile
+            cache.add(key, _new_token(), VERSION_TIMEOUT)
+        found.update(cache.get_many(missing))
+
+    return {user_id: found.get(key) for key, user_id in keys.items()}
+
+
+def _load(user_ids):
+    # Sorted following arrays of the given users, in one query
+    from .models import Follow
+
+    following = {user_id: array('q') for user_id in user_ids}
+    rows = (
+        Follow.objects.filter(follower_id__in=user_ids)
+        .order_by('follower_id', 'following_id')
+        .values_list('follower_id', 'following_id')
+    )
+    for follower_id, following_id in rows.iterator(chunk_size=2000):
+        following[follower_id].append(following_id)
+    return following
+
+
+def _contains(ids, user_id):
+    i = bisect_left(ids, user_id)
+    return i < len(ids) and ids[i] == user_id
+
+
+class FollowGraph:
+
+    def __init__(self, max_users=None):
+        self.max_users = max_users
+        self._entries = OrderedDict()  # user_id -> (version, array)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _limit(self):
+        return self.max_users if self.max_users is not None else _options()['MAX_USERS']
+
+    def following(self, user_ids):
+        """Returning {user_id: sorted array of followed ids}, loading missing users in one query."""
+        user_ids = list(dict.fromkeys(user_ids))
+        versions = _versions(user_ids)
+
+        result = {}
+        stale = []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry[0] == versions[user_id]:
+                    self._entries.move_to_end(user_id)
+                    result[user_id] = entry[1]
+                    self.hits += 1
+                else:
+                    stale.append(user_id)
+                    self.misses += 1
+
+        if stale:
+            loaded = _load(stale)
+            limit = self._limit()
+            with self._lock:
+                for user_id in stale:
+                    self._entries[user_id] = (versions[user_id], loaded[user_id])
+                    self._entries.move_to_end(user_id)
+                while len(self._entries) > limit:
+                    self._entries.popitem(last=False)
+            result.update(loaded)
+
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def memory_usage(self):
+        # Sizes of what this process holds right now
+        with self._lock:
+            arrays = [ids for _, ids in self._entries.values()]
+            return {
+                'users': len(arrays),
+                'max_users': self._limit(),
+                'edges': sum(len(ids) for ids in arrays),
+                'bytes': sys.getsizeof(self._entries) + sum(sys.getsizeof(ids) for ids in arrays),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+graph = FollowGraph()
+
+
+def _pk(user):
+    return getattr(user, 'pk', user)
+
+
+def is_following(follower, target):
+    """Whether follower follows target (users or ids)."""
+    follower_id, target_id = _pk(follower), _pk(target)
+    if not enabled():
+        from .models import Follow
+
+        return Follow.objects.filter(follower_id=follower_id, following_id=target_id).exists()
+
+    return _contains(graph.following([follower_id])[follower_id], target_id)
+
+
+def following_among(follower, targets):
+    """Returning the ids among targets that follower follows."""
+    follower_id = _pk(follower)
+    target_ids = {_pk(target) for target in targets}
+    if not enabled():
+        from .models import Follow
+
+        return set(
+            Follow.objects.filter(follower_id=follower_id, following_id__in=target_ids)
+            .values_list('following_id', flat=True)
+        )
+
+    ids = graph.following([follower_id])[follower_id]
+    return {target_id for target_id in target_ids if _contains(ids, target_id)}
+
+
+def followers_among(user, candidates):
+    """Returning the ids among candidates that follow user."""
+    user_id = _pk(user)
+    candidate_ids = {_pk(candidate) for candidate in candidates}
+    if not enabled():
+        from .models import Follow
+
+        return set(
+            Follow.objects.filter(follower_id__in=candidate_ids, following_id=user_id)
+            .values_list('follower_id', flat=True)
+        )
+
+    following = graph.following(candidate_ids)
+    return {candidate_id for candidate_id, ids in following.items() if _contains(ids, user_id)}
+
+
+def invalidate(*user_ids):
+    # New tokens make every process reload these users' following sets
+    if not enabled():
+        return
+    cache.set_many({_key(user_id): _new_token() for user_id in user_ids}, VERSION_TIMEOUT)
+
+
+def memory_usage():
+    return graph.memory_usage()
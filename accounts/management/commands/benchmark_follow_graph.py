@@ -0,0 +1,83 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from accounts import follow_graph
+from core.checks import cache_is_in_memory_server
+from accounts.models import Follow
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Comparing is_following() checks against the database and the follow graph index (data is rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Users created')
+        parser.add_argument('--follows', type=int, default=50, help='Follows per user')
+        parser.add_argument('--checks', type=int, default=20000, help='Membership checks per run')
+        parser.add_argument('--max-users', type=int, default=10000, help='LRU bound of the index')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, options):
+        User = get_user_model()
+        users = User.objects.bulk_create([User(username=f'graph-benchmark-{i}') for i in range(options['users'])])
+        ids = [user.pk for user in users]
+
+        rng = random.Random(0)
+        Follow.objects.bulk_create([
+            Follow(follower_id=follower_id, following_id=following_id)
+            for follower_id in ids
+            for following_id in rng.sample(ids, min(options['follows'], len(ids)))
+            if following_id != follower_id
+        ])
+
+        pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(options['checks'])]
+        follow_graph.graph.clear()
+
+        with override_settings(FOLLOW_GRAPH={'ENABLED': False}):
+            database = self.measure(pairs)
+        # Going through the index directly, as it is off unless the cache is Redis or memcached
+        with override_settings(FOLLOW_GRAPH={'MAX_USERS': options['max_users']}):
+            cold = self.measure_index(pairs)
+            warm = self.measure_index(pairs)
+            usage = follow_graph.memory_usage()
+
+        total = len(pairs)
+        self.stdout.write(f'Database:    {database / total * 1_000_000:.1f} µs/check')
+        self.stdout.write(f'Index, cold: {cold / total * 1_000_000:.1f} µs/check')
+        self.stdout.write(f'Index, warm: {warm / total * 1_000_000:.1f} µs/check')
+        self.stdout.write(self.style.SUCCESS(
+            f'Index holds {usage["users"]}/{usage["max_users"]} users, {usage["edges"]} edges, '
+            f'{usage["bytes"] / 1024:.0f} KiB ({usage["hits"]} hits, {usage["misses"]} misses)'
+        ))
+        if not cache_is_in_memory_server():
+            self.stdout.write(self.style.WARNING(
+                'The index reads its version tokens from the configured cache, which is not Redis or memcached, '
+                'so it stays off in production.'
+            ))
+
+    def measure(self, pairs):
+        start = time.perf_counter()
+        for follower_id, target_id in pairs:
+            follow_graph.is_following(follower_id, target_id)
+        return time.perf_counter() - start
+
+    def measure_index(self, pairs):
+        start = time.perf_counter()
+        for follower_id, target_id in pairs:
+            follow_graph._contains(follow_graph.graph.following([follower_id])[follower_id], target_id)
+        return time.perf_counter() - start
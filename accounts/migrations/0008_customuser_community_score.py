@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_customuser_followers_count_and_more'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='community_score',
+            field=models.FloatField(default=0, help_text='Impact decayed by inactivity, ranks community suggestions (see tips/community.py)'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['-community_score', '-id'], name='accounts_cu_communi_4cf2ea_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_customuser_community_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_picture_variants_ready',
+            field=models.BooleanField(default=False, editable=False, help_text='Have the resized copies of the picture been built? (see core/images.py)'),
+        ),
+    ]
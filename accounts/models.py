@@ -11,6 +11,7 @@ class CustomUser(AbstractUser):
 
     # Profile fields
     profile_picture = models.ImageField(upload_to='profiles/', null=True, blank=True, help_text="Upload a profile picture")
+    profile_picture_variants_ready = models.BooleanField(default=False, editable=False, help_text="Have the resized copies of the picture been built? (see core/images.py)")
     bio = models.TextField(max_length=500, blank=True, help_text="Tell us about yourself")
     gender = models.CharField(
         max_length=30,
@@ -32,6 +33,7 @@ class CustomUser(AbstractUser):
     followers_count = models.IntegerField(default=0, help_text="Number of followers")
     following_count = models.IntegerField(default=0, help_text="Number of people following")
     impact_score = models.IntegerField(default=0, help_text="Environmental impact score")
+    community_score = models.FloatField(default=0, help_text="Impact decayed by inactivity, ranks community suggestions (see tips/community.py)")
 
     # Account status
     is_verified = models.BooleanField(default=False, help_text="Verified eco-contributor")
@@ -54,6 +56,9 @@ class CustomUser(AbstractUser):
         verbose_name = "User"
         verbose_name_plural = "Users"
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(fields=['-community_score', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
@@ -90,12 +95,14 @@ class CustomUser(AbstractUser):
         return self.following_set.count()
     
     def is_following(self, user):
-        # Checking if this user is following another user
-        return self.following_set.filter(following=user).exists()
+        # Checking if this user is following another user (served from accounts/follow_graph.py)
+        from .follow_graph import is_following
+        return is_following(self, user)
     
     def is_followed_by(self, user):
         # Checking if this user is followed by another user
-        return self.followers_set.filter(follower=user).exists()
+        from .follow_graph import is_following
+        return is_following(user, self)
     
     def follow(self, user):
         # Following another user
@@ -210,23 +217,13 @@ class UserActivity(models.Model):
 
     @classmethod
     def log_activity(cls, request, tip_id=None):
-        # Logging user activity
+        # Logging user activity (buffered, see accounts/activity.py)
+        from .activity import activity_buffer
+
         today = timezone.localtime(timezone.now()).date()
 
         if request.user.is_authenticated:
-            # Handling logged in user
-            activity, created = cls.objects.get_or_create(
-                user=request.user,
-                date=today,
-                defaults={
-                    'visits_count': 1,
-                    'page_views': 1,
-                }
-            )
-
-            if not created:
-                activity.visits_count += 1
-                activity.page_views += 1
+            activity_buffer.record(request.user.pk, None, today, tip_id)
         else:
             # Handling anonymous user
             session_key = request.session.session_key
@@ -234,25 +231,7 @@ class UserActivity(models.Model):
                 request.session.create()
                 session_key = request.session.session_key
 
-            activity, created = cls.objects.get_or_create(
-                session_key=session_key,
-                date=today,
-                defaults={
-                    'visits_count': 1,
-                    'page_views': 1,
-                }
-            )
-
-            if not created:
-                activity.visits_count += 1
-                activity.page_views += 1
-
-        # Tracking tip views
-        if tip_id and tip_id not in activity.tips_viewed:
-            activity.tips_viewed.append(tip_id)
-
-        activity.save()
-        return activity
+            activity_buffer.record(None, session_key, today, tip_id)
 
     def get_total_visits(self):
         # Getting total visits for this user
@@ -0,0 +1,40 @@
+"""
+Viewer relationship flags for pages of Follow rows.
+
+`with_relationships()` annotates a Follow queryset with whether the viewer
+follows the listed user (`viewer_follows`) and whether that user follows
+the viewer back (`follows_viewer`), as two EXISTS subqueries on the
+(follower, following) unique index. A page of followers or followings
+therefore costs one query however many rows it holds, instead of one
+`is_following()` lookup per row.
+"""
+
+from django.db.models import Exists, OuterRef, Value
+
+from .models import Follow
+
+
+def with_relationships(queryset, viewer, field):
+    # field: the Follow side holding the listed user ('follower' or 'following')
+    if not viewer.is_authenticated:
+        return queryset.annotate(viewer_follows=Value(False), follows_viewer=Value(False))
+
+    listed = OuterRef(f'{field}_id')
+    return queryset.annotate(
+        viewer_follows=Exists(Follow.objects.filter(follower=viewer, following=listed)),
+        follows_viewer=Exists(Follow.objects.filter(follower=listed, following=viewer)),
+    )
+
+
+def serialize(follow, field, viewer):
+    user = getattr(follow, field)
+    return {
+        'username': user.username,
+        'display_name': user.get_full_name() or user.username,
+        'avatar': user.profile_picture.url if user.profile_picture else None,
+        'bio': user.bio,
+        'is_self': user.pk == viewer.pk,
+        'is_following': follow.viewer_follows,
+        'follows_you': follow.follows_viewer,
+        'followed_at': follow.created_at.isoformat(),
+    }
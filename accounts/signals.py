@@ -0,0 +1,52 @@
+"""
+Signal handlers dropping the cached profile summaries of accounts/summary.py
+and the following sets held by accounts/follow_graph.py.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from tips.models import Tip, Like, Comment
+
+from . import follow_graph, summary
+from .models import Follow
+
+
+def _tip_author_id(instance):
+    # Using the loaded tip when there is one (likes and comments usually come with it)
+    if type(instance).tip.is_cached(instance):
+        return instance.tip.author_id
+    return Tip.objects.filter(pk=instance.tip_id).values_list('author_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Tip)
+def invalidate_summary_on_tip_change(sender, instance, **kwargs):
+    summary.invalidate(instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_summaries_on_follow_change(sender, instance, **kwargs):
+    summary.invalidate(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+@receiver(post_save, sender=Follow)
+def invalidate_follow_graph_on_follow_change(sender, instance, **kwargs):
+    # Again after commit, in case another process reloaded the set in between
+    follow_graph.invalidate(instance.follower_id)
+    transaction.on_commit(lambda: follow_graph.invalidate(instance.follower_id))
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def invalidate_summary_on_engagement_delete(sender, instance, **kwargs):
+    summary.invalidate(_tip_author_id(instance))
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def invalidate_summary_on_engagement_save(sender, instance, created, **kwargs):
+    # Only new rows move the totals
+    if created:
+        summary.invalidate(_tip_author_id(instance))
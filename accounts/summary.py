@@ -0,0 +1,60 @@
+"""
+Cached per-user profile summary: tip, follower and engagement totals.
+
+The profile page and the follow toggle responses read the same dict from
+the cache. On a miss it is rebuilt with two aggregate queries. Signal
+handlers (accounts/signals.py) drop it whenever a Tip, Follow, Like or
+Comment involving the user changes, and it expires after
+SUMMARY_TIMEOUT seconds in any case, which repairs drift from bulk
+operations that skip signals.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+KEY_PREFIX = 'accounts:summary:'
+SUMMARY_TIMEOUT = 3600
+
+
+def _key(user_id):
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def build(user_id):
+    # Recomputing the summary from the source tables
+    from tips.models import Tip
+
+    from .models import Follow
+
+    tips = Tip.objects.filter(author_id=user_id).aggregate(
+        tips_count=Count('pk'),
+        published_count=Count('pk', filter=Q(is_published=True)),
+        likes_received=Coalesce(Sum('likes_count'), 0),
+        comments_received=Coalesce(Sum('comments_count'), 0),
+    )
+    follows = Follow.objects.filter(Q(follower_id=user_id) | Q(following_id=user_id)).aggregate(
+        followers_count=Count('pk', filter=Q(following_id=user_id)),
+        following_count=Count('pk', filter=Q(follower_id=user_id)),
+    )
+
+    return {
+        **tips,
+        **follows,
+        # Same formula as accounts.utils.update_user_impact_score
+        'impact_score': tips['published_count'] * 2 + follows['followers_count'],
+    }
+
+
+def get(user):
+    """Returning the cached summary of a user (or user id), rebuilding it when missing."""
+    user_id = getattr(user, 'pk', user)
+    summary = cache.get(_key(user_id))
+    if summary is None:
+        summary = build(user_id)
+        cache.set(_key(user_id), summary, SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate(*user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids if user_id is not None])
@@ -0,0 +1,365 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tips.models import Tip, Like, Comment, Bookmark
+
+from . import follow_graph, summary, views
+from .activity import ActivityBuffer
+from .models import Follow, UserActivity
+
+
+class ActivityBufferTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='sam', password='pass12345')
+        self.today = timezone.localtime(timezone.now()).date()
+        # No flusher thread, which would write outside the test transaction
+        self.buffer = ActivityBuffer(flush_interval=3600, max_pending=100, synchronous=False, background_thread=False)
+
+    def test_visits_are_merged_until_flushed(self):
+        for tip_id in [3, 5, 3]:
+            self.buffer.record(self.user.pk, None, self.today, tip_id)
+        self.buffer.record(None, 'anon-session', self.today)
+
+        self.assertFalse(UserActivity.objects.exists())
+        self.assertEqual(self.buffer.pending_count(), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 2)
+
+        # One lookup and one insert for the whole batch
+        self.assertEqual(len([query for query in queries if 'accounts_useractivity' in query['sql']]), 2)
+
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertEqual((activity.visits_count, activity.page_views, activity.tips_viewed), (3, 3, [3, 5]))
+        self.assertEqual(UserActivity.objects.get(session_key='anon-session').visits_count, 1)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_flush_adds_to_existing_rows(self):
+        UserActivity.objects.create(user=self.user, date=self.today, visits_count=2, page_views=2, tips_viewed=[7])
+
+        self.buffer.record(self.user.pk, None, self.today, 7)
+        self.buffer.record(self.user.pk, None, self.today, 8)
+        self.buffer.flush()
+
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertEqual((activity.visits_count, activity.tips_viewed), (4, [7, 8]))
+
+    def test_threshold_flushes_on_the_request_path(self):
+        buffer = ActivityBuffer(flush_interval=3600, max_pending=2, synchronous=False, background_thread=False)
+
+        buffer.record(self.user.pk, None, self.today)
+        self.assertFalse(UserActivity.objects.exists())
+
+        buffer.record(None, 'anon-session', self.today)
+        self.assertEqual(UserActivity.objects.count(), 2)
+        self.assertEqual(buffer.pending_count(), 0)
+
+    def test_interval_flushes_on_the_request_path(self):
+        self.buffer.record(self.user.pk, None, self.today)
+        self.assertEqual(self.buffer.pending_count(), 1)
+
+        self.buffer._flushed_at -= 3600
+        self.buffer.record(self.user.pk, None, self.today)
+
+        self.assertEqual(UserActivity.objects.get(user=self.user).visits_count, 2)
+
+    def test_failed_flush_keeps_the_batch(self):
+        self.buffer.record(self.user.pk, None, self.today, 3)
+
+        with mock.patch('accounts.activity.write_activity', side_effect=DatabaseError):
+            with self.assertLogs('accounts.activity', 'ERROR'):
+                self.assertEqual(self.buffer.flush(), 0)
+
+        self.buffer.record(self.user.pk, None, self.today, 5)
+        self.buffer.record(self.user.pk, None, self.today, 3)
+        self.assertEqual(self.buffer.pending_count(), 1)
+
+        # Not retried by requests before FLUSH_INTERVAL has passed
+        self.assertFalse(self.buffer._flush_due(self.buffer.max_pending))
+
+        self.buffer.flush()
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertEqual((activity.visits_count, activity.tips_viewed), (3, [3, 5]))
+
+    def test_deleted_users_do_not_fail_the_batch(self):
+        gone = get_user_model().objects.create_user(username='gone', password='pass12345')
+        self.buffer.record(gone.pk, None, self.today)
+        self.buffer.record(self.user.pk, None, self.today)
+        gone.delete()
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(UserActivity.objects.filter(user=self.user).exists())
+
+    def test_synchronous_mode_writes_immediately(self):
+        ActivityBuffer(synchronous=True).record(self.user.pk, None, self.today, 1)
+
+        self.assertEqual(UserActivity.objects.get(user=self.user).tips_viewed, [1])
+
+
+class FollowListTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.viewer = User.objects.create_user(username='xena', password='pass12345')
+        self.owner = User.objects.create_user(username='yuri', password='pass12345')
+        self.fan = User.objects.create_user(username='zack', password='pass12345', first_name='Zack')
+        self.other = User.objects.create_user(username='abby', password='pass12345')
+
+        for user in (self.viewer, self.fan, self.other):
+            Follow.objects.create(follower=user, following=self.owner)
+        Follow.objects.create(follower=self.viewer, following=self.fan)
+        Follow.objects.create(follower=self.fan, following=self.viewer)
+        self.client.force_login(self.viewer)
+
+    def test_followers_page_flags_each_row(self):
+        response = self.client.get(reverse('accounts:followers_list', kwargs={'username': 'yuri'}))
+
+        flags = {follow.follower.username: (follow.viewer_follows, follow.follows_viewer) for follow in response.context['page_obj']}
+        self.assertEqual(flags, {'xena': (False, False), 'zack': (True, True), 'abby': (False, False)})
+        self.assertContains(response, 'Follows you', count=1)
+
+    def test_json_variant(self):
+        response = self.client.get(reverse('accounts:following_list', kwargs={'username': 'zack'}), {'format': 'json'})
+
+        data = response.json()
+        self.assertEqual([row['username'] for row in data['results']], ['xena', 'yuri'])
+        self.assertEqual(data['results'][0]['is_self'], True)
+        self.assertEqual((data['results'][1]['is_following'], data['results'][1]['follows_you']), (True, False))
+        self.assertIsNone(data['next'])
+
+    def test_page_cost_does_not_grow_with_rows(self):
+        url = reverse('accounts:followers_list', kwargs={'username': 'yuri'})
+        self.client.get(url, {'format': 'json'})
+
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url, {'format': 'json'})
+
+        User = get_user_model()
+        fans = User.objects.bulk_create([User(username=f'fan{i}') for i in range(20)])
+        Follow.objects.bulk_create([Follow(follower=fan, following=self.owner) for fan in fans])
+
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url, {'format': 'json'})
+
+        self.assertEqual(len(after), len(before))
+        self.assertEqual(len(response.json()['results']), 20)
+        self.assertEqual(response.json()['next'], '?page=2&format=json')
+
+    def test_json_pages_are_not_counted(self):
+        User = get_user_model()
+        fans = User.objects.bulk_create([User(username=f'fan{i}') for i in range(20)])
+        Follow.objects.bulk_create([Follow(follower=fan, following=self.owner) for fan in fans])
+        url = reverse('accounts:followers_list', kwargs={'username': 'yuri'})
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url, {'page': 2, 'format': 'json'}).json()
+
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+        self.assertNotIn('count', data)
+
+
+class ProfileSummaryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username='bea', password='pass12345')
+        self.reader = User.objects.create_user(username='cal', password='pass12345')
+        self.tip = Tip.objects.create(author=self.author, title='Reuse jars', content='Text')
+        Tip.objects.create(author=self.author, title='Draft', content='Text', is_published=False)
+        Follow.objects.create(follower=self.reader, following=self.author)
+
+    def test_summary_totals(self):
+        stats = summary.get(self.author)
+
+        self.assertEqual(
+            (stats['tips_count'], stats['followers_count'], stats['following_count'], stats['impact_score']),
+            (2, 1, 0, 3),
+        )
+
+    # An in-memory cache, so a hit costs no queries at all
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_summary_is_cached_until_a_change(self):
+        summary.get(self.author)
+        with self.assertNumQueries(0):
+            summary.get(self.author)
+
+        Like.objects.create(user=self.reader, tip=self.tip)
+        Comment.objects.create(author=self.reader, tip=self.tip, content='Nice')
+        self.assertEqual((summary.get(self.author)['likes_received'], summary.get(self.author)['comments_received']), (1, 1))
+
+        Like.objects.filter(user=self.reader).delete()
+        self.assertEqual(summary.get(self.author)['likes_received'], 0)
+
+        Follow.objects.filter(follower=self.reader).delete()
+        self.assertEqual(summary.get(self.author)['followers_count'], 0)
+        self.tip.delete()
+        self.assertEqual(summary.get(self.author)['tips_count'], 1)
+
+    def test_profile_and_follow_toggle_read_the_summary(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('accounts:profile', kwargs={'username': 'bea'}))
+        self.assertEqual((response.context['tips_count'], response.context['followers_count']), (2, 1))
+
+        # Other pages do not load it
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('tips:tip_list'))
+        self.assertFalse([query for query in queries if 'accounts_follow' in query['sql']])
+
+        response = self.client.post(reverse('accounts:toggle_follow', kwargs={'username': 'bea'}))
+        self.assertEqual(response.json(), {'is_following': False, 'followers_count': 0, 'following_count': 0})
+
+
+class ProfileTabTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username='dora', password='pass12345')
+        self.reader = User.objects.create_user(username='eli', password='pass12345')
+        self.tips = [
+            Tip.objects.create(author=self.author, title=f'Tip {i}', content='Text')
+            for i in range(views.TIPS_PER_TAB_PAGE + 3)
+        ]
+        Tip.objects.create(author=self.author, title='Secret draft', content='Text', is_published=False)
+        Like.objects.create(user=self.author, tip=self.tips[0])
+        Bookmark.objects.create(user=self.author, tip=self.tips[1])
+
+    def tab(self, tab, **params):
+        return self.client.get(reverse('accounts:profile_tab', kwargs={'username': 'dora', 'tab': tab}), params)
+
+    def test_profile_renders_only_the_first_page_of_posts(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('accounts:profile', kwargs={'username': 'dora'}))
+
+        posts = response.context['posts']
+        self.assertEqual(len(posts), views.TIPS_PER_TAB_PAGE)
+        self.assertTrue(posts.has_next())
+        self.assertNotContains(response, 'Secret draft')
+        self.assertContains(response, reverse('accounts:profile_tab', kwargs={'username': 'dora', 'tab': 'liked'}))
+
+    def test_posts_fragment_pages(self):
+        self.client.force_login(self.reader)
+        first = self.client.get(reverse('accounts:profile', kwargs={'username': 'dora'})).context['posts']
+
+        response = self.tab('posts', cursor=first.next_cursor)
+        self.assertEqual([tip.title for tip in response.context['page_obj']], ['Tip 2', 'Tip 1', 'Tip 0'])
+        self.assertEqual(response['X-Next-Page'], '')
+        self.assertNotContains(response, '<html')
+
+    def test_liked_and_bookmarked_tabs(self):
+        self.client.force_login(self.reader)
+        response = self.tab('liked')
+        self.assertEqual([tip.title for tip in response.context['page_obj']], ['Tip 0'])
+        self.assertContains(response, 'by @dora')
+
+        # Saved tips are private
+        self.assertEqual(self.tab('bookmarked').status_code, 404)
+        self.assertEqual(self.tab('comments').status_code, 404)
+
+        self.client.force_login(self.author)
+        self.assertEqual([tip.title for tip in self.tab('bookmarked').context['page_obj']], ['Tip 1'])
+        self.assertEqual(len(self.tab('posts').context['page_obj']), views.TIPS_PER_TAB_PAGE)
+
+    def test_tips_of_deactivated_authors_are_hidden(self):
+        gone = get_user_model().objects.create_user(username='gone', password='pass12345')
+        tip = Tip.objects.create(author=gone, title='Gone tip', content='Text')
+        Like.objects.create(user=self.author, tip=tip)
+        Bookmark.objects.create(user=self.author, tip=tip)
+        gone.is_active = False
+        gone.save()
+
+        self.client.force_login(self.author)
+        self.assertEqual([tip.title for tip in self.tab('liked').context['page_obj']], ['Tip 0'])
+        self.assertEqual([tip.title for tip in self.tab('bookmarked').context['page_obj']], ['Tip 1'])
+
+    def test_older_posts_link_opens_the_profile_page(self):
+        self.client.force_login(self.reader)
+        url = reverse('accounts:profile', kwargs={'username': 'dora'})
+        response = self.client.get(url)
+        first = response.context['posts']
+        self.assertContains(response, f'href="{url}?{first.next_query}#posts"')
+
+        response = self.client.get(url, {'cursor': first.next_cursor})
+        self.assertEqual([tip.title for tip in response.context['posts']], ['Tip 2', 'Tip 1', 'Tip 0'])
+        self.assertContains(response, '<html')
+
+
+# An in-memory cache standing in for Redis or memcached, so the tests count only Follow queries
+@override_settings(
+    FOLLOW_GRAPH={'MAX_USERS': 2},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class FollowGraphTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch('accounts.follow_graph.cache_is_in_memory_server', return_value=True)
+        self.cache_is_in_memory_server = patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+        follow_graph.graph.clear()
+        User = get_user_model()
+        self.ann, self.ben, self.cleo, self.dan = [
+            User.objects.create_user(username=name, password='pass12345') for name in ('ann', 'ben', 'cleo', 'dan')
+        ]
+        Follow.objects.create(follower=self.ann, following=self.ben)
+        Follow.objects.create(follower=self.ann, following=self.cleo)
+        Follow.objects.create(follower=self.cleo, following=self.ann)
+
+    def test_checks_are_answered_from_memory(self):
+        # Loading the following sets of ann and cleo
+        self.assertTrue(self.ann.is_following(self.ben))
+        self.assertTrue(self.cleo.is_following(self.ann))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.ann.is_following(self.cleo))
+            self.assertFalse(self.ann.is_following(self.dan))
+            self.assertTrue(self.ann.is_followed_by(self.cleo))
+            self.assertEqual(follow_graph.following_among(self.ann, [self.ben, self.dan]), {self.ben.pk})
+
+    def test_follow_changes_invalidate_the_follower(self):
+        self.assertFalse(self.ann.is_following(self.dan))
+
+        self.ann.follow(self.dan)
+        self.assertTrue(self.ann.is_following(self.dan))
+
+        self.ann.unfollow(self.ben)
+        self.assertFalse(self.ann.is_following(self.ben))
+
+    def test_batch_followers_load_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(follow_graph.followers_among(self.ann, [self.ben, self.cleo]), {self.cleo.pk})
+
+    def test_lru_bounds_memory(self):
+        follow_graph.followers_among(self.dan, [self.ann, self.ben, self.cleo])
+
+        usage = follow_graph.memory_usage()
+        self.assertEqual((usage['users'], usage['max_users']), (2, 2))
+        self.assertGreater(usage['bytes'], 0)
+
+    def test_lost_version_reloads(self):
+        self.assertTrue(self.ann.is_following(self.ben))
+        Follow.objects.filter(follower=self.ann, following=self.ben).update(following=self.dan)
+        cache.clear()
+
+        self.assertFalse(self.ann.is_following(self.ben))
+
+    def test_disk_or_database_cache_disables_the_index(self):
+        self.cache_is_in_memory_server.return_value = False
+
+        self.assertFalse(follow_graph.enabled())
+        with self.assertNumQueries(1):
+            self.assertTrue(self.ann.is_following(self.ben))
+
+        self.assertEqual(follow_graph.memory_usage()['users'], 0)
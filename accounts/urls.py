@@ -23,6 +23,9 @@ urlpatterns = [
     path('<str:username>/followers/', views.followers_list_view, name='followers_list'),
     path('<str:username>/following/', views.following_list_view, name='following_list'),
 
+    # Profile tabs (HTML fragments)
+    path('<str:username>/tabs/<slug:tab>/', views.profile_tab_view, name='profile_tab'),
+
     # Password Reset 
     path('password-reset/', views.password_reset_view, name='password_reset'),
          
@@ -7,15 +7,20 @@ from django.contrib import messages
 from django.utils import timezone
 from django.db import models
 from django.contrib.auth import login, logout, authenticate
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 
+from core.ratelimit import ratelimit
+
+from . import relationships, summary
 from .models import CustomUser, Follow, UserActivity
 from tips.models import Tip
+from tips.pagination import CursorPaginator
 from .forms import UserProfileForm, SignupForm, LoginForm
 
 
@@ -59,46 +64,81 @@ def profile_view(request, username=None):
     if request.user.is_authenticated and request.user != profile_user:
         is_following = request.user.is_following(profile_user)
     
-    # Getting impact breakdown
-    try:
-        from accounts.utils import get_impact_breakdown
-        impact_breakdown = get_impact_breakdown(profile_user)
-    except ImportError:
-        impact_breakdown = None
-    
-    # Getting recent tips
-    recent_tips = Tip.objects.filter(
-        author=profile_user,
-        is_published=True
-    ).order_by('-created_at')[:5]
-    
-    # Getting posts
-    posts = Tip.objects.filter(author=profile_user).order_by('-created_at')
+    # Getting one page of posts (the first unless the no-JS "Older posts" link passed a cursor;
+    # later pages and the other tabs load on demand)
+    posts = _profile_tab_page(request, profile_user, 'posts')
 
     # Getting stats
-    tips_count = profile_user.get_tips_count_dynamic
-    followers_count = profile_user.get_followers_count()
-    following_count = profile_user.get_following_count()
-    impact_score = profile_user.get_impact_score_dynamic
+    stats = summary.get(profile_user)
     
     context = {
         'profile_user': profile_user,
         'is_own_profile': is_own_profile,
         'is_following': is_following,
-        'tips_count': tips_count,
-        'followers_count': followers_count,
-        'following_count': following_count,
-        'impact_score': impact_score,
-        'impact_breakdown': impact_breakdown,
+        'tips_count': stats['tips_count'],
+        'followers_count': stats['followers_count'],
+        'following_count': stats['following_count'],
+        'impact_score': stats['impact_score'],
         'is_verified': getattr(profile_user, 'is_verified', False),
         'joined_date': profile_user.joined_date,
-        'recent_tips': recent_tips,
         'posts': posts,
     }
     
     return render(request, 'accounts/profile.html', context)
 
 
+TIPS_PER_TAB_PAGE = 10
+
+
+def _profile_tab_page(request, profile_user, tab):
+    # One cursor page of a profile tab, or None when the viewer may not see it
+    is_own_profile = profile_user == request.user
+
+    if tab == 'posts':
+        tips = Tip.objects.filter(author=profile_user)
+        if not is_own_profile:
+            tips = tips.filter(is_published=True)
+        ordering = ('-created_at', '-id')
+    elif tab == 'liked':
+        tips = Tip.objects.filter(likes__user=profile_user, is_published=True, author__is_active=True).annotate(
+            tab_at=models.F('likes__created_at')
+        ).select_related('author')
+        ordering = ('-tab_at', '-id')
+    elif tab == 'bookmarked' and is_own_profile:
+        tips = Tip.objects.filter(bookmarks__user=profile_user, is_published=True, author__is_active=True).annotate(
+            tab_at=models.F('bookmarks__created_at')
+        ).select_related('author')
+        ordering = ('-tab_at', '-id')
+    else:
+        return None
+
+    tips = tips.select_related('category')
+    paginator = CursorPaginator(tips, ordering, TIPS_PER_TAB_PAGE)
+    return paginator.get_page(request.GET.get('cursor'), request.GET)
+
+
+@login_required(login_url='accounts:login')
+def profile_tab_view(request, username, tab):
+    """Returning one page of a profile tab as an HTML fragment."""
+
+    profile_user = get_object_or_404(CustomUser, username=username)
+
+    page_obj = _profile_tab_page(request, profile_user, tab)
+    if page_obj is None:
+        raise Http404('Unknown profile tab')
+
+    context = {
+        'page_obj': page_obj,
+        'tab': tab,
+        'is_own_profile': profile_user == request.user,
+    }
+
+    response = render(request, 'accounts/_profile_tips.html', context)
+    next_url = reverse('accounts:profile_tab', kwargs={'username': username, 'tab': tab})
+    response['X-Next-Page'] = f'{next_url}?{page_obj.next_query}' if page_obj.has_next() else ''
+    return response
+
+
 # Developed by Devendra
 @login_required(login_url='accounts:login')
 def edit_profile_view(request):
@@ -147,6 +187,7 @@ def profile_settings_view(request):
 
 
 # Developed by Devendra
+@ratelimit('login')
 def login_view(request):
     """Handling login."""
 
@@ -174,6 +215,7 @@ def login_view(request):
 
 
 # Developed by Devendra
+@ratelimit('signup')
 def signup_view(request):
     """Handling registration."""
 
@@ -235,6 +277,7 @@ def logout_view(request):
 # Developed by Nandha and Priya
 @login_required(login_url='accounts:login')
 @require_POST
+@ratelimit('follow')
 def toggle_follow_view(request, username):
     """Toggling follow status."""
     
@@ -263,47 +306,58 @@ def toggle_follow_view(request, username):
         is_following = True
     
     # Getting counts
-    followers_count = user_to_follow.get_followers_count()
-    following_count = user_to_follow.get_following_count()
+    stats = summary.get(user_to_follow)
     
     return JsonResponse({
         'is_following': is_following,
-        'followers_count': followers_count,
-        'following_count': following_count
+        'followers_count': stats['followers_count'],
+        'following_count': stats['following_count']
     })
 
 
-# Developed by Nandha and Priya
-@login_required(login_url='accounts:login')
-def followers_list_view(request, username):
-    """Displaying followers."""
-    
-    user = get_object_or_404(CustomUser, username=username)
-    
-    # Getting followers
-    followers_qs = (Follow.objects.filter(
-        following=user)
-    .select_related('follower').order_by('-created_at'))
-    
+FOLLOWS_PER_PAGE = 20
+
+
+def _follow_list(request, user, follows, field, template):
+    # Rendering one page of Follow rows, or its JSON for infinite scroll
+    follows = relationships.with_relationships(
+        follows.select_related(field).order_by('-created_at', '-id'), request.user, field
+    )
+
+    if request.GET.get('format') == 'json':
+        # One extra row tells whether there is a next page, so scrolling never counts the list
+        try:
+            number = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            number = 1
+        start = (number - 1) * FOLLOWS_PER_PAGE
+        rows = list(follows[start:start + FOLLOWS_PER_PAGE + 1])
+
+        return JsonResponse({
+            'results': [relationships.serialize(follow, field, request.user) for follow in rows[:FOLLOWS_PER_PAGE]],
+            'next': f'?page={number + 1}&format=json' if len(rows) > FOLLOWS_PER_PAGE else None,
+        })
+
     # Paginating results
-    paginator = Paginator(followers_qs, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Adding status
-    for follow in page_obj:
-        if request.user.is_authenticated and request.user != follow.follower:
-            follow.is_followed_by_current_user = request.user.is_following(follow.follower)
-        else:
-            follow.is_followed_by_current_user = False
-    
+    paginator = Paginator(follows, FOLLOWS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
     context = {
         'profile_user': user,
         'page_obj': page_obj,
         'is_own_profile': user == request.user,
     }
+
+    return render(request, template, context)
+
+
+# Developed by Nandha and Priya
+@login_required(login_url='accounts:login')
+def followers_list_view(request, username):
+    """Displaying followers."""
     
-    return render(request, 'accounts/followers_list.html', context)
+    user = get_object_or_404(CustomUser, username=username)
+    return _follow_list(request, user, Follow.objects.filter(following=user), 'follower', 'accounts/followers_list.html')
 
 
 # Developed by Nandha and Priya
@@ -312,31 +366,7 @@ def following_list_view(request, username):
     """Displaying following."""
     
     user = get_object_or_404(CustomUser, username=username)
-    
-    # Getting following
-    following_qs = Follow.objects.filter(
-        follower=user
-    ).select_related('following').order_by('-created_at')
-    
-    # Paginating results
-    paginator = Paginator(following_qs, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Adding status
-    for follow in page_obj:
-        if request.user.is_authenticated:
-            follow.is_following_current_user = request.user.is_following(follow.following)
-        else:
-            follow.is_following_current_user = False
-    
-    context = {
-        'profile_user': user,
-        'page_obj': page_obj,
-        'is_own_profile': user == request.user,
-    }
-    
-    return render(request, 'accounts/following_list.html', context)
+    return _follow_list(request, user, Follow.objects.filter(follower=user), 'following', 'accounts/following_list.html')
 
 
 # Developed by Devendra
@@ -0,0 +1,182 @@
+"""
+Streaming CSV and NDJSON exports of the administration tables.
+
+Each export is a values_list() projection read with
+.iterator(chunk_size=CHUNK_SIZE), so no model instances are built and only
+one chunk of rows is in memory at a time. Rows are encoded into
+ROWS_PER_WRITE sized pieces of output and handed to StreamingHttpResponse,
+optionally gzip-compressed on the fly with one zlib stream; memory use
+stays constant whatever the table size, and the first bytes go out before
+the last rows are read.
+
+Text cells starting like a formula are prefixed with an apostrophe in CSV
+exports, so opening one in a spreadsheet cannot run what a user typed
+(NDJSON keeps the values as they are).
+"""
+
+import csv
+import io
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+
+CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 500
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _exports():
+    # name -> (queryset, [(column, field lookup), ...])
+    from accounts.models import UserActivity
+    from tips.models import Tip, Category, Like, Comment
+
+    return {
+        'users': (get_user_model().objects.all(), [
+            ('id', 'id'),
+            ('username', 'username'),
+            ('email', 'email'),
+            ('first_name', 'first_name'),
+            ('last_name', 'last_name'),
+            ('role', 'role'),
+            ('is_active', 'is_active'),
+            ('is_staff', 'is_staff'),
+            ('impact_score', 'impact_score'),
+            ('date_joined', 'date_joined'),
+            ('last_login', 'last_login'),
+        ]),
+        'tips': (Tip.objects.all(), [
+            ('id', 'id'),
+            ('title', 'title'),
+            ('slug', 'slug'),
+            ('author', 'author__username'),
+            ('category', 'category__name'),
+            ('is_published', 'is_published'),
+            ('likes_count', 'likes_count'),
+            ('comments_count', 'comments_count'),
+            ('bookmarks_count', 'bookmarks_count'),
+            ('views_count', 'views_count'),
+            ('created_at', 'created_at'),
+            ('updated_at', 'updated_at'),
+        ]),
+        'categories': (Category.objects.all(), [
+            ('id', 'id'),
+            ('name', 'name'),
+            ('slug', 'slug'),
+            ('is_approved', 'is_approved'),
+            ('created_by', 'created_by__username'),
+            ('approved_by', 'approved_by__username'),
+            ('created_at', 'created_at'),
+        ]),
+        'likes': (Like.objects.all(), [
+            ('id', 'id'),
+            ('user', 'user__username'),
+            ('tip', 'tip__slug'),
+            ('created_at', 'created_at'),
+        ]),
+        'comments': (Comment.objects.all(), [
+            ('id', 'id'),
+            ('tip', 'tip__slug'),
+            ('author', 'author__username'),
+            ('content', 'content'),
+            ('created_at', 'created_at'),
+        ]),
+        'activity': (UserActivity.objects.all(), [
+            ('id', 'id'),
+            ('user', 'user__username'),
+            ('session_key', 'session_key'),
+            ('date', 'date'),
+            ('visits_count', 'visits_count'),
+            ('page_views', 'page_views'),
+            ('last_activity', 'last_activity'),
+        ]),
+    }
+
+
+def rows(name):
+    """
+    Returning (columns, row iterator) for an export.
+
+    Raises KeyError for unknown names.
+    """
+    queryset, columns = _exports()[name]
+    # Primary key order is an index scan and keeps repeated exports comparable
+    values = queryset.order_by('pk').values_list(*[field for _, field in columns])
+    return [column for column, _ in columns], values.iterator(chunk_size=CHUNK_SIZE)
+
+
+# Leading characters that make spreadsheet applications evaluate a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # User-written text is shown as text, not run as a formula
+        return "'" + value
+    return value
+
+
+def _encode_csv(columns, values):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for count, row in enumerate(values, 1):
+        writer.writerow([_csv_value(value) for value in row])
+        if count % ROWS_PER_WRITE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def _encode_ndjson(columns, values):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    lines = []
+
+    for row in values:
+        lines.append(encoder.encode(dict(zip(columns, row))))
+        if len(lines) == ROWS_PER_WRITE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _gzip(chunks):
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(name, format, compress=False):
+    """
+    Generating the encoded export as bytes.
+
+    Raises KeyError for unknown exports and ValueError for unknown formats.
+    """
+    if format not in FORMATS:
+        raise ValueError(f'Unknown format: {format}')
+
+    columns, values = rows(name)
+    encode = _encode_csv if format == 'csv' else _encode_ndjson
+    chunks = (text.encode('utf-8') for text in encode(columns, values) if text)
+
+    return _gzip(chunks) if compress else chunks
+
+
+def filename(name, format, compress, today):
+    suffix = '.gz' if compress else ''
+    return f'{name}-{today:%Y%m%d}.{format}{suffix}'
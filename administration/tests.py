@@ -1,3 +1,86 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from tips.models import Tip, Like, Comment
+
+from . import exports
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='kate', password='pass12345', is_staff=True)
+        self.member = User.objects.create_user(username='liam', password='pass12345')
+        self.tip = Tip.objects.create(author=self.member, title='Fix leaks', content='Save water.')
+        Like.objects.create(user=self.admin, tip=self.tip)
+        Comment.objects.create(author=self.admin, tip=self.tip, content='Done, "thanks", twice')
+        self.client.force_login(self.admin)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse('administration:export', kwargs={'name': name}), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_export_streams_rows(self):
+        response, body = self.export('comments')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="comments-', response['Content-Disposition'])
+
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], ['id', 'tip', 'author', 'content', 'created_at'])
+        self.assertEqual(rows[1][1:4], ['fix-leaks', 'kate', 'Done, "thanks", twice'])
+
+    def test_ndjson_export(self):
+        _, body = self.export('likes', format='ndjson')
+
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([(line['user'], line['tip']) for line in lines], [('kate', 'fix-leaks')])
+
+    def test_gzip_export(self):
+        response, body = self.export('users', gzip='1')
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        usernames = [row[1] for row in csv.reader(io.StringIO(gzip.decompress(body).decode()))][1:]
+        self.assertEqual(usernames, ['kate', 'liam'])
+
+    def test_rows_are_written_in_chunks(self):
+        Tip.objects.bulk_create([
+            Tip(author=self.member, title=f'Tip {i}', slug=f'tip-{i}', content='Text')
+            for i in range(exports.ROWS_PER_WRITE + 10)
+        ])
+
+        columns, values = exports.rows('tips')
+        chunks = list(exports._encode_csv(columns, values))
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(sum(chunk.count('\n') for chunk in chunks), exports.ROWS_PER_WRITE + 12)
+
+    def test_csv_cells_cannot_start_formulas(self):
+        Tip.objects.create(author=self.member, title='=HYPERLINK("http://example.com")', content='Text')
+        Tip.objects.create(author=self.member, title='Plain title', content='Text')
+
+        columns, values = exports.rows('tips')
+        rows = list(csv.reader(io.StringIO(''.join(exports._encode_csv(columns, values)))))
+        titles = [row[columns.index('title')] for row in rows[-2:]]
+
+        self.assertEqual(titles, ['\'=HYPERLINK("http://example.com")', 'Plain title'])
+
+    def test_unknown_export_and_format(self):
+        self.assertEqual(self.client.get(reverse('administration:export', kwargs={'name': 'secrets'})).status_code, 404)
+        response = self.client.get(reverse('administration:export', kwargs={'name': 'tips'}), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
 
-# Create your tests here.
+    def test_members_cannot_export(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('administration:export', kwargs={'name': 'users'}))
+        self.assertEqual(response.status_code, 302)
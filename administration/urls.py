@@ -23,6 +23,9 @@ urlpatterns = [
     path('categories/<int:category_id>/edit/', views.category_edit_view, name='category_edit'),
     path('categories/<int:category_id>/delete/', views.category_delete_view, name='category_delete'),
     
+    # Exports
+    path('exports/<slug:name>/', views.export_view, name='export'),
+    
     # API endpoints
     path('api/user/<int:user_id>/toggle-status/', views.api_toggle_user_status, name='api_toggle_user_status'),
     path('api/user/<int:user_id>/update-role/', views.api_update_user_role, name='api_update_user_role'),
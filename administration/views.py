@@ -1,10 +1,12 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import get_user_model
-from tips.models import Tip, Category, Like, Comment
+from tips.models import Tip, Category
 from django.db.models import Count
 from django.utils import timezone
-from datetime import timedelta
+from core import stats
+
+from . import exports
 
 User = get_user_model()
 
@@ -16,32 +18,26 @@ def is_admin(user):
 def dashboard_view(request):
     """Admin dashboard with statistics."""
     
-    # Basic counts
-    total_users = User.objects.count()
-    total_tips = Tip.objects.count()
-    total_categories = Category.objects.count()
-    
-    # Engagement stats
-    total_likes = Like.objects.count()
-    total_comments = Comment.objects.count()
-    
-    # Recent activity (last 30 days)
-    last_month = timezone.now() - timedelta(days=30)
-    new_users = User.objects.filter(date_joined__gte=last_month).count()
-    new_tips = Tip.objects.filter(created_at__gte=last_month).count()
-    
-    # Pending categories
-    pending_categories = Category.objects.filter(is_approved=False).count()
+    # Site-wide counts (cached, see core/stats.py)
+    totals = stats.get_stats()
     
     context = {
-        'total_users': total_users,
-        'total_tips': total_tips,
-        'total_categories': total_categories,
-        'total_likes': total_likes,
-        'total_comments': total_comments,
-        'new_users': new_users,
-        'new_tips': new_tips,
-        'pending_categories': pending_categories,
+        'total_users': totals['total_users'],
+        'total_tips': totals['total_tips'],
+        'total_categories': totals['total_categories'],
+        'total_likes': totals['total_likes'],
+        'total_comments': totals['total_comments'],
+        'new_users': totals['new_users'],
+        'new_tips': totals['new_tips'],
+        'pending_categories': totals['pending_categories'],
+        'exports': [
+            ('users', 'Users'),
+            ('tips', 'Tips'),
+            ('categories', 'Categories'),
+            ('likes', 'Likes'),
+            ('comments', 'Comments'),
+            ('activity', 'User activity'),
+        ],
         'page_title': 'Admin Dashboard'
     }
     
@@ -191,7 +187,7 @@ def category_delete_view(request, category_id):
 
 
 # API Endpoints for Inline Updates
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 import json
 
@@ -291,3 +287,26 @@ def api_toggle_category_status(request, category_id):
         return JsonResponse({'success': False, 'error': 'Category not found'})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_view(request, name):
+    """Streaming a table as CSV or NDJSON."""
+    format = request.GET.get('format', 'csv')
+    compress = request.GET.get('gzip') == '1'
+
+    try:
+        content = exports.stream(name, format, compress)
+    except KeyError:
+        raise Http404('Unknown export.')
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    response = StreamingHttpResponse(
+        content,
+        content_type='application/gzip' if compress else f'{exports.FORMATS[format]}; charset=utf-8',
+    )
+    filename = exports.filename(name, format, compress, timezone.localdate())
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
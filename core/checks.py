@@ -0,0 +1,56 @@
+"""
+System checks for settings the cached features depend on.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Warning, register
+
+# Backends that only live inside one process
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Shared backends answering reads from the memory of a cache server
+MEMORY_SERVER_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+# Backends whose incr() is a single atomic operation (LocMemCache takes a lock)
+ATOMIC_INCR_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    *MEMORY_SERVER_BACKENDS,
+)
+
+
+def cache_is_shared(alias='default'):
+    # Whether every process (web workers, cron commands) sees the same cache
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def cache_is_in_memory_server(alias='default'):
+    # Whether the cache is shared and a lookup costs no disk or database access
+    return settings.CACHES[alias]['BACKEND'] in MEMORY_SERVER_BACKENDS
+
+
+def cache_has_atomic_incr(alias='default'):
+    # Whether concurrent incr() calls can never overwrite each other (the file and database backends get and set)
+    return settings.CACHES[alias]['BACKEND'] in ATOMIC_INCR_BACKENDS
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    backend = caches['default'].__class__.__name__
+    return [Warning(
+        f'The default cache ({backend}) is not shared between processes.',
+        hint=(
+            'Listing generations, trending updates and rate limits are written by one process '
+            'and read by others. Use the database, Redis or memcached cache backend.'
+        ),
+        id='core.W001',
+    )]
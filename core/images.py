@@ -0,0 +1,160 @@
+"""
+Resized WebP/JPEG variants of uploaded images.
+
+Tip images and profile pictures are stored at upload resolution (profile
+pictures can be 5 MB). Once an upload is committed, `schedule()` writes one
+WebP and one JPEG per size in SIZES next to the media root, in the request
+that saved it (web workers on PythonAnywhere cannot start threads):
+
+    tips/photo.jpg -> variants/tips/photo.jpg/card.webp, variants/tips/photo.jpg/card.jpg, ...
+
+The paths are derived from the full storage name of the original, so
+templates build `srcset` lists (core/templatetags/images.py) without a
+database lookup, and photo.jpg and photo.png never share variants. Whether
+the variants exist yet is a field next to the image (READY_FIELDS), set
+once they are written; until then templates fall back to the original
+file. Replacing or deleting an upload deletes its variants and clears the
+field (core/signals.py). `manage.py build_image_variants` backfills
+existing media with a process pool.
+"""
+
+import io
+import logging
+import posixpath
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# (variant name, width in pixels) per kind of image; avatars are cropped square
+SIZES = {
+    'tip': [('thumb', 320), ('card', 640), ('large', 1280)],
+    'avatar': [('avatar-sm', 64), ('avatar', 128), ('avatar-lg', 256)],
+}
+
+SQUARE_KINDS = {'avatar'}
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+VARIANTS_DIR = 'variants'
+
+# (model, image field, field telling whether its variants are built) per kind of image
+READY_FIELDS = {
+    'tip': ('tips.Tip', 'image', 'image_variants_ready'),
+    'avatar': (settings.AUTH_USER_MODEL, 'profile_picture', 'profile_picture_variants_ready'),
+}
+
+
+def formats():
+    # WebP needs Pillow built with libwebp; JPEG is always written as the fallback
+    return ['webp', 'jpg'] if features.check('webp') else ['jpg']
+
+
+def variant_name(name, variant, extension):
+    return posixpath.join(VARIANTS_DIR, name, f'{variant}.{extension}')
+
+
+def variants(name, kind):
+    # [(extension, [(storage name, width), ...]), ...] for every format
+    return [
+        (extension, [(variant_name(name, variant, extension), width) for variant, width in SIZES[kind]])
+        for extension in formats()
+    ]
+
+
+def is_ready(image, kind):
+    # Read from the loaded row, so a deferred field falls back to the original instead of costing a query
+    _, _, ready_field = READY_FIELDS[kind]
+    return bool(image.instance.__dict__.get(ready_field))
+
+
+def mark_ready(name, kind, ready=True):
+    # Setting the ready field of every row storing this upload
+    model, field, ready_field = READY_FIELDS[kind]
+    apps.get_model(model).objects.filter(**{field: name}).update(**{ready_field: ready})
+
+
+def variants_exist(name, kind):
+    # The last variant is written last, so its presence means the set is complete
+    last_variant, _ = SIZES[kind][-1]
+    return default_storage.exists(variant_name(name, last_variant, formats()[-1]))
+
+
+def _resize(image, width, square):
+    if square:
+        size = min(width, image.width, image.height)
+        return ImageOps.fit(image, (size, size), Image.LANCZOS)
+
+    if image.width <= width:
+        return image.copy()
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def _encode(image, extension):
+    buffer = io.BytesIO()
+    if extension == 'webp':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        if image.mode != 'RGB':
+            # JPEG has no alpha channel, so flattening onto white
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+            image = background
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_variants(name, kind):
+    """
+    Writing every variant of a stored image.
+
+    Returns the number of files written. Touches the storage only, never
+    the database, so it can run in worker processes.
+    """
+    with default_storage.open(name, 'rb') as source:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+            image.load()
+
+    written = 0
+    square = kind in SQUARE_KINDS
+    for variant, width in SIZES[kind]:
+        resized = _resize(image, width, square)
+        for extension in formats():
+            target = variant_name(name, variant, extension)
+            # Replacing instead of letting the storage pick another name
+            default_storage.delete(target)
+            default_storage.save(target, ContentFile(_encode(resized, extension)))
+            written += 1
+
+    return written
+
+
+def delete_variants(name, kind):
+    for _, files in variants(name, kind):
+        for target, _ in files:
+            default_storage.delete(target)
+    mark_ready(name, kind, False)
+
+
+def _build_and_mark(name, kind):
+    try:
+        build_variants(name, kind)
+    except Exception:
+        logger.exception('Building image variants for %s failed', name)
+    else:
+        mark_ready(name, kind)
+
+
+def schedule(name, kind):
+    # Building the variants once the upload is committed, so a rolled back save builds nothing
+    transaction.on_commit(lambda: _build_and_mark(name, kind))
@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core import ratelimit
+from core.checks import cache_has_atomic_incr
+
+
+def _view(request):
+    return HttpResponse('ok')
+
+
+class Command(BaseCommand):
+    help = 'Measuring the overhead the rate limiter adds to a request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Requests per run')
+        parser.add_argument('--clients', type=int, default=100, help='Distinct client addresses')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        clients = options['clients']
+
+        factory = RequestFactory()
+        requests = []
+        for i in range(total):
+            request = factory.post('/benchmark/', REMOTE_ADDR=f'10.0.{i % clients // 256}.{i % clients % 256}')
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        # A fresh scope per run, so counts left by an earlier run do not matter
+        scope = f'benchmark-{time.time_ns()}'
+        plain = _view
+        limited = ratelimit.ratelimit(scope)(_view)
+
+        # High enough that no request is rejected, so both runs do the same work
+        with override_settings(RATE_LIMITS={scope: f'{total}/h'}):
+            baseline = self._run(plain, requests)
+            measured = self._run(limited, requests)
+
+        overhead = (measured - baseline) / total * 1_000_000
+        backend = caches['default'].__class__.__name__
+        store = 'cache' if cache_has_atomic_incr() else 'database rows'
+        self.stdout.write(f'Without limiter: {baseline / total * 1_000_000:.1f} µs/request')
+        self.stdout.write(f'With limiter:    {measured / total * 1_000_000:.1f} µs/request')
+        self.stdout.write(self.style.SUCCESS(f'Limiter overhead: {overhead:.1f} µs/request ({backend}, counts in {store})'))
+
+    def _run(self, view, requests):
+        start = time.perf_counter()
+        for request in requests:
+            view(request)
+        return time.perf_counter() - start
@@ -0,0 +1,70 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core import images
+
+
+def _init_worker():
+    # Workers started with "spawn" need their own configured Django
+    django.setup()
+
+
+def _build(name, kind):
+    return images.build_variants(name, kind)
+
+
+class Command(BaseCommand):
+    help = 'Building resized image variants for existing tip images and profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that already exist')
+
+    def handle(self, *args, **options):
+        pending = []
+        # Listing first, as marking rows ready while iterating them would move the cursor
+        for name, kind in list(self.uploads(options['force'])):
+            if not options['force'] and images.variants_exist(name, kind):
+                # Built before the ready fields existed, or by an interrupted run
+                images.mark_ready(name, kind)
+            else:
+                pending.append((name, kind))
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('All image variants are up to date.'))
+            return
+
+        built = failed = files = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+            futures = {executor.submit(_build, name, kind): (name, kind) for name, kind in pending}
+
+            for future in as_completed(futures):
+                name, kind = futures[future]
+                try:
+                    written = future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+
+                # Recording the result here, so the workers never touch the database
+                images.mark_ready(name, kind)
+                built += 1
+                files += written
+
+        self.stdout.write(self.style.SUCCESS(f'Built {files} variants for {built} images ({failed} failed).'))
+
+    def uploads(self, everything=False):
+        # (storage name, kind) of every distinct upload, or of those without built variants
+        seen = set()
+        for kind, (model, field, ready_field) in images.READY_FIELDS.items():
+            rows = apps.get_model(model).objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            if not everything:
+                rows = rows.filter(**{ready_field: False})
+            for name in rows.values_list(field, flat=True).iterator():
+                if (name, kind) not in seen:
+                    seen.add((name, kind))
+                    yield name, kind
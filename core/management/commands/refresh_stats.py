@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core import stats
+
+
+class Command(BaseCommand):
+    help = 'Recounting the stored site-wide totals from the source tables'
+
+    def handle(self, *args, **options):
+        for name, value in stats.refresh().items():
+            self.stdout.write(f'{name}: {value}')
+
+        self.stdout.write(self.style.SUCCESS('Site statistics refreshed.'))
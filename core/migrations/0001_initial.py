@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteTotal',
+            fields=[
+                ('name', models.CharField(help_text='Total name, e.g. total_tips', max_length=50, primary_key=True, serialize=False)),
+                ('value', models.IntegerField(default=0, help_text='Current value, moved atomically as rows change')),
+                ('refreshed_at', models.DateTimeField(help_text='Last time the value was recounted')),
+            ],
+            options={
+                'verbose_name': 'Site total',
+                'verbose_name_plural': 'Site totals',
+            },
+        ),
+    ]
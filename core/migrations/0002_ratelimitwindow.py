@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitWindow',
+            fields=[
+                ('key', models.CharField(help_text='Scope, client and window number', max_length=255, primary_key=True, serialize=False)),
+                ('count', models.PositiveIntegerField(default=0, help_text='Requests counted in the window')),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='When the window stops mattering to the limiter')),
+            ],
+            options={
+                'verbose_name': 'Rate limit window',
+                'verbose_name_plural': 'Rate limit windows',
+            },
+        ),
+    ]
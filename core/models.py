@@ -1,3 +1,31 @@
 from django.db import models
 
-# Create your models here.
+
+class SiteTotal(models.Model):
+    # A site-wide total kept current by core/stats.py
+
+    name = models.CharField(max_length=50, primary_key=True, help_text="Total name, e.g. total_tips")
+    value = models.IntegerField(default=0, help_text="Current value, moved atomically as rows change")
+    refreshed_at = models.DateTimeField(help_text="Last time the value was recounted")
+
+    class Meta:
+        verbose_name = "Site total"
+        verbose_name_plural = "Site totals"
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class RateLimitWindow(models.Model):
+    # A request count of core/ratelimit.py, used when the cache has no atomic incr()
+
+    key = models.CharField(max_length=255, primary_key=True, help_text="Scope, client and window number")
+    count = models.PositiveIntegerField(default=0, help_text="Requests counted in the window")
+    expires_at = models.DateTimeField(db_index=True, help_text="When the window stops mattering to the limiter")
+
+    class Meta:
+        verbose_name = "Rate limit window"
+        verbose_name_plural = "Rate limit windows"
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
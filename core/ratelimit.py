@@ -0,0 +1,222 @@
+"""
+Rate limiting for write endpoints.
+
+Limits are configured per scope in settings.RATE_LIMITS as "<count>/<period>"
+strings, e.g. {'toggle': '60/m', 'login': '10/5m'}; a scope without an entry
+is not limited. Requests are counted per user, or per client IP address for
+anonymous visitors.
+
+The limiter uses a sliding window approximated from two fixed windows: the
+count of the previous window is weighted by how much of it still overlaps
+the sliding window and added to the count of the current one. That costs
+one increment and one read per request and keeps no per-request
+timestamps. A rejected request is not counted, so Retry-After is accurate.
+
+The window counts live in the cache when its incr() is atomic (Redis,
+memcached, locmem). The file and database backends get and set, so
+concurrent requests would overwrite each other's counts and slip past
+the limit; with them the counts are RateLimitWindow rows moved by an
+atomic UPDATE ... SET count = count + 1 instead.
+"""
+
+import math
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .checks import cache_has_atomic_incr
+from .models import RateLimitWindow
+
+KEY_PREFIX = 'core:ratelimit:'
+
+PERIODS = {
+    's': 1,
+    'm': 60,
+    'h': 3600,
+    'd': 86400,
+}
+
+
+def parse_rate(rate):
+    """
+    Turning "10/5m" into (10, 300).
+
+    Raises ValueError for malformed rates.
+    """
+    try:
+        count, period = rate.split('/')
+        multiplier, unit = period[:-1], period[-1]
+        limit = int(count)
+        seconds = int(multiplier or 1) * PERIODS[unit]
+    except (AttributeError, KeyError, ValueError):
+        raise ValueError(f'Invalid rate: {rate!r}')
+
+    if limit < 1 or seconds < 1:
+        raise ValueError(f'Invalid rate: {rate!r}')
+    return limit, seconds
+
+
+def get_rate(scope):
+    # (limit, period) for a scope, None when the scope is not limited
+    rate = getattr(settings, 'RATE_LIMITS', {}).get(scope)
+    return parse_rate(rate) if rate else None
+
+
+def client_ip(request):
+    """
+    Returning the address anonymous visitors are counted by.
+
+    That is REMOTE_ADDR unless RATE_LIMIT_IP_HEADER names a header set by
+    a trusted proxy in front of the app. Clients can send any header
+    themselves, so the last address in it (the one the proxy added) is
+    used rather than the first.
+    """
+    header = getattr(settings, 'RATE_LIMIT_IP_HEADER', None)
+    if header and request.META.get(header):
+        return request.META[header].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def _retry_after(limit, period, previous, current, elapsed):
+    # Seconds until one more request fits in the sliding window
+    if previous:
+        # Waiting for the previous window to slide out far enough
+        needed = 1 - (limit - 1 - current) / previous
+        if needed <= 1:
+            return max(math.ceil((needed - elapsed) * period), 1)
+
+    # Waiting for the next window, where the current count becomes the previous one
+    needed = 1 - (limit - 1) / current if current else 0
+    return max(math.ceil((1 - elapsed + max(needed, 0)) * period), 1)
+
+
+class CacheWindows:
+    # Window counts in a cache with an atomic incr()
+
+    def incr(self, key, timeout):
+        if cache.add(key, 1, timeout=timeout):
+            return 1
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # The key expired between add() and incr()
+            cache.set(key, 1, timeout=timeout)
+            return 1
+
+    def get(self, key):
+        return cache.get(key, 0)
+
+    def decr(self, key):
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+
+class DatabaseWindows:
+    # Window counts as RateLimitWindow rows, for caches whose incr() gets and sets
+
+    def incr(self, key, timeout):
+        windows = RateLimitWindow.objects.filter(key=key)
+        if windows.update(count=F('count') + 1):
+            return windows.values_list('count', flat=True).first() or 1
+
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                RateLimitWindow.objects.create(key=key, count=1, expires_at=now + timedelta(seconds=timeout))
+        except IntegrityError:
+            # Another request created the window meanwhile
+            windows.update(count=F('count') + 1)
+            return windows.values_list('count', flat=True).first() or 1
+
+        # Dropping the windows that slid out, once per new window
+        RateLimitWindow.objects.filter(expires_at__lt=now).delete()
+        return 1
+
+    def get(self, key):
+        return RateLimitWindow.objects.filter(key=key).values_list('count', flat=True).first() or 0
+
+    def decr(self, key):
+        RateLimitWindow.objects.filter(key=key, count__gt=0).update(count=F('count') - 1)
+
+
+def _windows():
+    return CacheWindows() if cache_has_atomic_incr() else DatabaseWindows()
+
+
+def hit(scope, key, limit, period, now=None):
+    """
+    Counting one request for `key` against a limit of `limit` per `period` seconds.
+
+    Returns None when the request is allowed, otherwise the number of
+    seconds to wait before retrying.
+    """
+    now = time.time() if now is None else now
+    window, offset = divmod(now, period)
+    window = int(window)
+    elapsed = offset / period
+
+    current_key = f'{KEY_PREFIX}{scope}:{key}:{window}'
+    previous_key = f'{KEY_PREFIX}{scope}:{key}:{window - 1}'
+
+    windows = _windows()
+
+    # Counting the request first so concurrent requests cannot all slip through
+    current = windows.incr(current_key, period * 2)
+
+    previous = windows.get(previous_key)
+    if previous * (1 - elapsed) + current <= limit:
+        return None
+
+    # Not counting rejected requests
+    windows.decr(current_key)
+    return _retry_after(limit, period, previous, current - 1, elapsed)
+
+
+def too_many_requests(request, retry_after):
+    message = f'Too many requests. Please try again in {retry_after} seconds.'
+
+    if 'text/html' in request.headers.get('Accept', ''):
+        response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    else:
+        response = JsonResponse({'error': message}, status=429)
+
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(scope, methods=('POST',)):
+    """
+    Limiting a view to the rate configured for `scope` in settings.RATE_LIMITS.
+
+    Only requests with one of `methods` are counted, so a form page can be
+    viewed freely while its submissions are limited. Place it below
+    login_required so signed in users are counted by account.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            rate = get_rate(scope) if request.method in methods else None
+
+            if rate is not None:
+                retry_after = hit(scope, client_key(request), *rate)
+                if retry_after is not None:
+                    return too_many_requests(request, retry_after)
+
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
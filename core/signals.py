@@ -0,0 +1,146 @@
+"""
+Signal handlers keeping the cached site-wide totals in core/stats.py current
+and the resized image variants of core/images.py built.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from tips.models import Tip, Category, Like, Comment
+
+from . import images, stats
+
+
+@receiver(post_save, sender=Tip)
+def tip_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust('total_tips')
+        stats.adjust('new_tips')
+        if instance.is_published and instance.author.is_active:
+            stats.adjust('published_tips')
+    else:
+        # The tip may have been published or unpublished
+        stats.invalidate('published_tips')
+
+
+@receiver(post_delete, sender=Tip)
+def tip_deleted(sender, instance, **kwargs):
+    stats.adjust('total_tips', -1)
+    if stats.is_recent(instance.created_at):
+        stats.adjust('new_tips', -1)
+    stats.invalidate('published_tips')
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust('total_categories')
+        if not instance.is_approved:
+            stats.adjust('pending_categories')
+    else:
+        stats.invalidate('pending_categories')
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    stats.adjust('total_categories', -1)
+    if not instance.is_approved:
+        stats.adjust('pending_categories', -1)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def engagement_created(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust('total_likes' if sender is Like else 'total_comments')
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def engagement_deleted(sender, instance, **kwargs):
+    stats.adjust('total_likes' if sender is Like else 'total_comments', -1)
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def user_loaded(sender, instance, **kwargs):
+    # Remembering is_active so a save can tell whether it changed (None when deferred)
+    instance._stats_is_active = instance.__dict__.get('is_active')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        stats.adjust('total_users')
+        stats.adjust('new_users')
+    elif 'is_active' in instance.__dict__ and instance.is_active != instance._stats_is_active:
+        # Deactivated authors drop out of the published tips total
+        stats.invalidate('published_tips')
+    instance._stats_is_active = instance.__dict__.get('is_active')
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    stats.adjust('total_users', -1)
+    if stats.is_recent(instance.date_joined):
+        stats.adjust('new_users', -1)
+
+
+def _stored_name(instance, field_name):
+    # Name of the loaded file, without loading a deferred field (None when deferred)
+    if field_name not in instance.__dict__:
+        return None
+    value = instance.__dict__[field_name]
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Tip)
+def tip_loaded(sender, instance, **kwargs):
+    # Remembering the stored image so a save can tell it was replaced
+    instance._stored_image = _stored_name(instance, 'image')
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def profile_loaded(sender, instance, **kwargs):
+    instance._stored_image = _stored_name(instance, 'profile_picture')
+
+
+def _build_variants(instance, kind, update_fields, field_name):
+    # Queuing variants for a new or replaced upload and dropping the replaced one's
+    if update_fields is not None and field_name not in update_fields:
+        return
+
+    _, _, ready_field = images.READY_FIELDS[kind]
+    name = _stored_name(instance, field_name)
+    previous, instance._stored_image = instance._stored_image, name
+    if previous and previous != name:
+        transaction.on_commit(lambda: images.delete_variants(previous, kind))
+    if previous != name and instance.__dict__.get(ready_field) is not False:
+        # The saved ready field belongs to the replaced upload
+        type(instance).objects.filter(pk=instance.pk).update(**{ready_field: False})
+        setattr(instance, ready_field, False)
+    if name and instance.__dict__.get(ready_field) is False:
+        images.schedule(name, kind)
+
+
+@receiver(post_save, sender=Tip)
+def tip_image_saved(sender, instance, update_fields, **kwargs):
+    _build_variants(instance, 'tip', update_fields, 'image')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def profile_picture_saved(sender, instance, update_fields, **kwargs):
+    _build_variants(instance, 'avatar', update_fields, 'profile_picture')
+
+
+@receiver(post_delete, sender=Tip)
+def tip_image_deleted(sender, instance, **kwargs):
+    if instance.image:
+        images.delete_variants(instance.image.name, 'tip')
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def profile_picture_deleted(sender, instance, **kwargs):
+    if instance.profile_picture:
+        images.delete_variants(instance.profile_picture.name, 'avatar')
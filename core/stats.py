@@ -0,0 +1,105 @@
+"""
+Site-wide totals shown on the homepage, the tip list and the admin dashboard.
+
+Every total is one SiteTotal row, so all processes read the same values and
+every read of several totals costs one primary key lookup. Signal handlers
+(core/signals.py) move the totals with an atomic UPDATE ... SET value =
+value + delta as rows are created and deleted (a cache incr() is not atomic
+on every backend and would lose concurrent updates), and drop a row when an
+update may change the total in ways a delta cannot express (e.g. a tip being
+unpublished). Rows older than STATS_REFRESH_INTERVAL seconds are recounted
+on the next read, which also ages out the rolling 30 day totals and repairs
+drift from bulk operations.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SiteTotal
+
+NEW_WINDOW = timedelta(days=30)
+
+
+def _recent():
+    return timezone.now() - NEW_WINDOW
+
+
+def _queries():
+    # Query computing each total from scratch
+    from tips.models import Tip, Category, Like, Comment
+
+    User = get_user_model()
+
+    return {
+        'total_tips': lambda: Tip.objects.count(),
+        'published_tips': lambda: Tip.objects.filter(is_published=True, author__is_active=True).count(),
+        'total_users': lambda: User.objects.count(),
+        'total_categories': lambda: Category.objects.count(),
+        'pending_categories': lambda: Category.objects.filter(is_approved=False).count(),
+        'total_likes': lambda: Like.objects.count(),
+        'total_comments': lambda: Comment.objects.count(),
+        'new_tips': lambda: Tip.objects.filter(created_at__gte=_recent()).count(),
+        'new_users': lambda: User.objects.filter(date_joined__gte=_recent()).count(),
+    }
+
+
+def _timeout():
+    return getattr(settings, 'STATS_REFRESH_INTERVAL', 3600)
+
+
+def is_recent(moment):
+    # Whether a row still counts towards the new_* totals
+    return moment is not None and moment >= _recent()
+
+
+def get_stats(*names):
+    """
+    Returning the requested totals (all of them when no names are given).
+
+    Totals that are missing or older than STATS_REFRESH_INTERVAL are
+    recounted and stored again.
+    """
+    queries = _queries()
+    names = names or tuple(queries)
+
+    fresh_since = timezone.now() - timedelta(seconds=_timeout())
+    stored = dict(
+        SiteTotal.objects.filter(name__in=names, refreshed_at__gte=fresh_since).values_list('name', 'value')
+    )
+    stats = {name: stored.get(name) for name in names}
+
+    missing = [name for name, value in stats.items() if value is None]
+    if missing:
+        stats.update(refresh(*missing))
+
+    return stats
+
+
+def refresh(*names):
+    # Recounting totals from the database
+    queries = _queries()
+    names = names or tuple(queries)
+
+    stats = {name: queries[name]() for name in names}
+    now = timezone.now()
+    SiteTotal.objects.bulk_create(
+        [SiteTotal(name=name, value=value, refreshed_at=now) for name, value in stats.items()],
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=['value', 'refreshed_at'],
+    )
+    return stats
+
+
+def adjust(name, delta=1):
+    # Moving a stored total; a missing row is simply recounted on the next read
+    SiteTotal.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def invalidate(*names):
+    # Forcing totals to be recounted on the next read
+    SiteTotal.objects.filter(name__in=names).delete()
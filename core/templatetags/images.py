@@ -0,0 +1,51 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from core import images
+
+register = template.Library()
+
+# Rendered width of each kind of image, used when the caller gives no sizes
+DEFAULT_SIZES = {
+    'tip': '(min-width: 768px) 640px, 100vw',
+    'avatar': '48px',
+}
+
+
+def _srcset(files):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for name, width in files)
+
+
+@register.simple_tag
+def responsive_image(image, kind, alt='', css_class='', sizes=None, loading='lazy'):
+    """
+    Rendering an uploaded image with WebP and JPEG srcset variants.
+
+    Falls back to a plain <img> of the original until the variants are built.
+
+    Usage: {% responsive_image tip.image 'tip' alt=tip.title css_class="w-full" %}
+    """
+    if not image:
+        return ''
+
+    if not images.is_ready(image, kind):
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            image.url, alt, css_class, loading,
+        )
+
+    sizes = sizes or DEFAULT_SIZES[kind]
+    sources = dict(images.variants(image.name, kind))
+    jpeg = sources.pop('jpg')
+    # Browsers without srcset support get the middle size
+    fallback, _ = jpeg[len(jpeg) // 2]
+
+    webp = ''
+    if 'webp' in sources:
+        webp = format_html('<source type="image/webp" srcset="{}" sizes="{}">', _srcset(sources['webp']), sizes)
+
+    return format_html(
+        '<picture class="contents">{}<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async"></picture>',
+        webp, default_storage.url(fallback), _srcset(jpeg), sizes, alt, css_class, loading,
+    )
@@ -1,3 +1,283 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from tips.models import Tip, Category, Like
+
+from PIL import Image
+
+from . import checks, images, ratelimit, stats
+from .models import RateLimitWindow
+
+
+class SiteStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='hana', password='pass12345')
+
+    def test_totals_follow_writes_without_recounting(self):
+        stats.get_stats()
+        tip = Tip.objects.create(author=self.user, title='Cloth bags', content='Skip plastic.')
+        Like.objects.create(user=self.user, tip=tip)
+        Category.objects.create(name='Shopping')
+
+        # One lookup of the stored totals, no recount
+        with self.assertNumQueries(1):
+            totals = stats.get_stats('total_tips', 'published_tips', 'total_likes', 'pending_categories', 'new_tips')
+
+        self.assertEqual(totals, {
+            'total_tips': 1,
+            'published_tips': 1,
+            'total_likes': 1,
+            'pending_categories': 1,
+            'new_tips': 1,
+        })
+
+        tip.delete()
+        self.assertEqual(stats.get_stats('total_tips', 'total_likes'), {'total_tips': 0, 'total_likes': 0})
+
+    def test_unpublishing_recounts_published_tips(self):
+        tip = Tip.objects.create(author=self.user, title='Cloth bags', content='Skip plastic.')
+        self.assertEqual(stats.get_stats('published_tips'), {'published_tips': 1})
+
+        tip.is_published = False
+        tip.save()
+
+        self.assertEqual(stats.get_stats('published_tips'), {'published_tips': 0})
+
+    def test_refresh_repairs_drift(self):
+        stats.get_stats()
+        Tip.objects.bulk_create([Tip(author=self.user, title='Bulk', slug='bulk', content='No signals.')])
+
+        self.assertEqual(stats.get_stats('total_tips'), {'total_tips': 0})
+        self.assertEqual(stats.refresh('total_tips'), {'total_tips': 1})
+
+    def test_only_deactivation_recounts_published_tips(self):
+        Tip.objects.create(author=self.user, title='Cloth bags', content='Skip plastic.')
+        stats.get_stats('published_tips')
+
+        self.user.bio = 'Zero waste'
+        self.user.save()
+        with self.assertNumQueries(1):
+            stats.get_stats('published_tips')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(stats.get_stats('published_tips'), {'published_tips': 0})
+
+    def test_deferred_users_load_without_extra_queries(self):
+        with self.assertNumQueries(1):
+            list(get_user_model().objects.only('username'))
+
+
+@override_settings(RATE_LIMITS={'toggle': '3/m', 'login': '2/m'})
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='ivan', password='pass12345')
+        self.tip = Tip.objects.create(author=self.user, title='Compost peels', content='Feed the soil.')
+
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('10/5m'), (10, 300))
+        self.assertEqual(ratelimit.parse_rate('5/h'), (5, 3600))
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rate('ten/m')
+
+    def test_sliding_window_weights_previous_window(self):
+        for _ in range(4):
+            self.assertIsNone(ratelimit.hit('test', 'k', 4, 60, now=600))
+        self.assertIsNotNone(ratelimit.hit('test', 'k', 4, 60, now=610))
+
+        # A quarter into the next window three quarters of the old count still apply
+        self.assertIsNone(ratelimit.hit('test', 'k', 4, 60, now=675))
+        self.assertEqual(ratelimit.hit('test', 'k', 4, 60, now=676), 14)
+
+    def test_database_cache_counts_in_rows(self):
+        self.assertFalse(checks.cache_has_atomic_incr())
+        self.assertIsNone(ratelimit.hit('test', 'k', 1, 60, now=600))
+        self.assertIsNotNone(ratelimit.hit('test', 'k', 1, 60, now=610))
+
+        # The rejected request was taken back
+        self.assertEqual(RateLimitWindow.objects.get(key=f'{ratelimit.KEY_PREFIX}test:k:10').count, 1)
+
+    def test_atomic_cache_keeps_the_counts(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            for _ in range(4):
+                self.assertIsNone(ratelimit.hit('test', 'k', 4, 60, now=600))
+            self.assertIsNotNone(ratelimit.hit('test', 'k', 4, 60, now=610))
+
+        self.assertFalse(RateLimitWindow.objects.exists())
+
+    def test_toggle_returns_429_with_retry_after(self):
+        self.client.force_login(self.user)
+        url = reverse('tips:toggle_like', kwargs={'slug': self.tip.slug})
+
+        for _ in range(3):
+            self.assertEqual(self.client.post(url).status_code, 200)
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertIn('error', response.json())
+
+    def test_anonymous_visitors_are_limited_per_ip(self):
+        url = reverse('accounts:login')
+        data = {'username': 'ivan', 'password': 'wrong'}
+
+        for _ in range(2):
+            self.client.post(url, data, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.client.post(url, data, REMOTE_ADDR='10.0.0.1').status_code, 429)
+
+        self.assertEqual(self.client.post(url, data, REMOTE_ADDR='10.0.0.2').status_code, 200)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 200)
+
+    def test_proxy_header_is_only_read_when_configured(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(ratelimit.client_ip(request), '10.0.0.1')
+
+        # The trusted proxy appends the address it saw after whatever the client sent
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.9')
+        with override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR'):
+            self.assertEqual(ratelimit.client_ip(request), '203.0.113.9')
+
+
+class ImageVariantTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = get_user_model().objects.create_user(username='jade', password='pass12345')
+
+    def upload(self, name, size=(2000, 1500), mode='RGB'):
+        buffer = io.BytesIO()
+        Image.new(mode, size).save(buffer, 'PNG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def stored_size(self, name):
+        with default_storage.open(name, 'rb') as stored, Image.open(stored) as image:
+            return image.size
+
+    def test_variants_are_resized_per_kind(self):
+        photo = self.upload('tips/photo.png')
+        avatar = self.upload('profiles/me.png', size=(300, 500), mode='RGBA')
+
+        images.build_variants(photo, 'tip')
+        images.build_variants(avatar, 'avatar')
+
+        self.assertEqual(self.stored_size(images.variant_name(photo, 'thumb', 'jpg')), (320, 240))
+        self.assertEqual(self.stored_size(images.variant_name(photo, 'large', 'webp')), (1280, 960))
+        self.assertEqual(self.stored_size(images.variant_name(avatar, 'avatar', 'jpg')), (128, 128))
+
+    def test_upload_builds_variants_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tip = Tip.objects.create(author=self.user, title='Dry herbs', content='Hang them.', image=self.upload('tips/herbs.png'))
+
+        tip.refresh_from_db()
+        self.assertTrue(tip.image_variants_ready)
+        self.assertTrue(default_storage.exists(images.variant_name(tip.image.name, 'card', 'jpg')))
+
+    def test_variants_are_keyed_on_the_full_name(self):
+        self.assertNotEqual(
+            images.variant_name('tips/herbs.png', 'card', 'jpg'),
+            images.variant_name('tips/herbs.jpg', 'card', 'jpg'),
+        )
+
+    def test_replacing_an_image_deletes_its_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tip = Tip.objects.create(author=self.user, title='Dry herbs', content='Hang them.', image=self.upload('tips/herbs.png'))
+        old = tip.image.name
+
+        tip = Tip.objects.get(pk=tip.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            tip.image = self.upload('tips/herbs.png')
+            tip.save()
+
+        self.assertNotEqual(tip.image.name, old)
+        self.assertFalse(images.variants_exist(old, 'tip'))
+        tip.refresh_from_db()
+        self.assertTrue(tip.image_variants_ready)
+        self.assertTrue(images.variants_exist(tip.image.name, 'tip'))
+
+    def test_a_failed_build_leaves_the_replacement_unready(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tip = Tip.objects.create(author=self.user, title='Dry herbs', content='Hang them.', image=self.upload('tips/herbs.png'))
+
+        tip = Tip.objects.get(pk=tip.pk)
+        with mock.patch.object(images, 'build_variants', side_effect=OSError), self.assertLogs('core.images', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                tip.image = self.upload('tips/herbs.png')
+                tip.save()
+
+        tip.refresh_from_db()
+        self.assertFalse(tip.image_variants_ready)
+
+    def test_saving_other_fields_leaves_the_variants_alone(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tip = Tip.objects.create(author=self.user, title='Dry herbs', content='Hang them.', image=self.upload('tips/herbs.png'))
+
+        tip = Tip.objects.only('pk', 'title').get(pk=tip.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            tip.title = 'Dry your herbs'
+            tip.save()
+
+        tip.refresh_from_db()
+        self.assertTrue(default_storage.exists(images.variant_name(tip.image.name, 'card', 'jpg')))
+
+    def test_tag_falls_back_until_variants_exist(self):
+        tip = Tip.objects.create(author=self.user, title='Dry herbs', content='Hang them.', image=self.upload('tips/herbs.png'))
+        template = Template("{% load images %}{% responsive_image tip.image 'tip' alt=tip.title %}")
+
+        html = template.render(Context({'tip': tip}))
+        self.assertIn(f'src="{tip.image.url}"', html)
+        self.assertNotIn('srcset', html)
+
+        images.build_variants(tip.image.name, 'tip')
+        images.mark_ready(tip.image.name, 'tip')
+        tip.refresh_from_db()
+
+        with self.assertNumQueries(0):
+            html = template.render(Context({'tip': tip}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('card.jpg 640w', html)
+
+    def test_backfill_marks_existing_variants_ready(self):
+        tip = Tip.objects.create(author=self.user, title='Dry herbs', content='Hang them.', image=self.upload('tips/herbs.png'))
+        images.build_variants(tip.image.name, 'tip')
+
+        call_command('build_image_variants', stdout=io.StringIO())
+
+        tip.refresh_from_db()
+        self.assertTrue(tip.image_variants_ready)
+
+
+class SharedCacheCheckTests(TestCase):
+
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in checks.check_shared_cache(None)], ['core.W001'])
+
+    def test_only_cache_servers_answer_from_memory(self):
+        self.assertFalse(checks.cache_is_in_memory_server())
+
+        redis = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'}
+        with override_settings(CACHES={'default': redis}):
+            self.assertTrue(checks.cache_is_in_memory_server())
@@ -1,7 +1,7 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from tips.models import Tip, Category
-from accounts.models import CustomUser, UserActivity
+from accounts.models import UserActivity
+from . import stats
 
 
 # Developed by Devendra
@@ -12,16 +12,14 @@ def home_view(request):
     UserActivity.log_activity(request)
 
     # stats
-    total_tips = Tip.objects.count()
-    total_users = CustomUser.objects.count()
-    total_categories = Category.objects.count()
+    totals = stats.get_stats('total_tips', 'total_users', 'total_categories')
 
     context = {
         'is_authenticated': request.user.is_authenticated,
         'username': request.user.username if request.user.is_authenticated else None,
-        'total_tips': total_tips,
-        'total_users': total_users,
-        'total_categories': total_categories,
+        'total_tips': totals['total_tips'],
+        'total_users': totals['total_users'],
+        'total_categories': totals['total_categories'],
     }
 
     return render(request, 'home.html', context)
@@ -211,69 +211,190 @@ document.addEventListener('DOMContentLoaded', function () {
 
 
 // Tips list
-function toggleLikeTipList(slug) {
-  fetch(`/tips/${slug}/like/`, {
-    method: 'POST',
-    headers: {
-      'X-CSRFToken': getCookie('csrftoken'),
-      'Content-Type': 'application/json'
-    },
-  })
-    .then(response => {
-      if (response.status === 401) {
-        window.location.href = "{% url 'accounts:login' %}";
-        return;
-      }
-      return response.json();
-    })
-    .then(data => {
-      if (data) {
-        const icon = document.getElementById(`like-icon-${slug}`);
-        const count = document.getElementById(`like-count-${slug}`);
+// Queued likes and bookmarks for tip cards: the card updates at once and the
+// operations are sent together to /tips/interactions/. Operations that could not
+// be sent (offline, server error) stay in localStorage and are retried later.
+const interactionQueue = {
+  storageKey: 'tipInteractionQueue',
+  delay: 400,
+  timer: null,
+  sending: false,
+
+  load() {
+    try {
+      return JSON.parse(localStorage.getItem(this.storageKey)) || [];
+    } catch (error) {
+      return [];
+    }
+  },
 
-        if (data.liked) {
-          icon.classList.remove('text-gray-500', 'dark:text-gray-400');
-          icon.classList.add('text-red-500', 'fill-current');
-          icon.setAttribute('fill', 'currentColor');
-        } else {
-          icon.classList.remove('text-red-500', 'fill-current');
-          icon.classList.add('text-gray-500', 'dark:text-gray-400');
-          icon.setAttribute('fill', 'none');
+  save(operations) {
+    try {
+      localStorage.setItem(this.storageKey, JSON.stringify(operations));
+    } catch (error) {
+      // Storage full or disabled: the queue only lives until the page unloads
+    }
+  },
+
+  push(tip, kind, active) {
+    // Only the latest state per tip and kind is worth sending
+    const operations = this.load().filter(op => !(op.tip === tip && op.kind === kind));
+    operations.push({ tip, kind, active });
+    this.save(operations);
+    this.schedule();
+  },
+
+  schedule() {
+    clearTimeout(this.timer);
+    this.timer = setTimeout(() => this.flush(), this.delay);
+  },
+
+  flush() {
+    const operations = this.load();
+    if (this.sending || !operations.length || !navigator.onLine) {
+      return;
+    }
+
+    this.sending = true;
+    const batch = operations.slice(0, 100);
+
+    fetch('/tips/interactions/', {
+      method: 'POST',
+      headers: {
+        'X-CSRFToken': getCookie('csrftoken'),
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ operations: batch }),
+    })
+      .then(response => {
+        if (response.redirected) {
+          window.location.href = response.url;
+          return null;
+        }
+        if (response.status === 400) {
+          // The server will never accept this batch
+          return { results: [] };
+        }
+        if (!response.ok) {
+          throw new Error(`Interaction sync failed: ${response.status}`);
+        }
+        return response.json();
+      })
+      .then(data => {
+        if (!data) {
+          return;
         }
 
-        count.textContent = data.likes_count;
-      }
-    });
+        // Dropping what was sent, unless it was clicked again meanwhile
+        const sent = new Map(batch.map(op => [`${op.kind}:${op.tip}`, op.active]));
+        this.save(this.load().filter(op => sent.get(`${op.kind}:${op.tip}`) !== op.active));
+
+        data.results.forEach(result => {
+          if (!result.error && !this.load().some(op => op.tip === result.tip && op.kind === result.kind)) {
+            renderTipCardInteraction(result.tip, result.kind, result.active, result.count);
+          }
+        });
+
+        this.sending = false;
+        this.flush();
+      })
+      .catch(error => {
+        console.error('Error:', error);
+        this.sending = false;
+      });
+  },
+};
+
+window.addEventListener('online', () => interactionQueue.flush());
+document.addEventListener('DOMContentLoaded', () => interactionQueue.flush());
+
+function renderTipCardInteraction(slug, kind, active, count) {
+  const icon = document.getElementById(`${kind}-icon-${slug}`);
+  if (!icon) {
+    return;
+  }
+
+  const activeColor = kind === 'like' ? 'text-red-500' : 'text-yellow-500';
+  if (active) {
+    icon.classList.remove('text-gray-500', 'dark:text-gray-400');
+    icon.classList.add(activeColor, 'fill-current');
+    icon.setAttribute('fill', 'currentColor');
+  } else {
+    icon.classList.remove(activeColor, 'fill-current');
+    icon.classList.add('text-gray-500', 'dark:text-gray-400');
+    icon.setAttribute('fill', 'none');
+  }
+
+  const counter = document.getElementById(`${kind}-count-${slug}`);
+  if (counter && count !== undefined) {
+    counter.textContent = count;
+  }
+}
+
+function toggleTipCardInteraction(slug, kind) {
+  const icon = document.getElementById(`${kind}-icon-${slug}`);
+  const active = !icon.classList.contains('fill-current');
+
+  // Updating the card right away; the server count replaces the guess once synced
+  const counter = document.getElementById(`${kind}-count-${slug}`);
+  const count = counter ? Math.max(parseInt(counter.textContent, 10) + (active ? 1 : -1), 0) : undefined;
+  renderTipCardInteraction(slug, kind, active, count);
+
+  interactionQueue.push(slug, kind, active);
+}
+
+function toggleLikeTipList(slug) {
+  toggleTipCardInteraction(slug, 'like');
 }
 
 function toggleBookmarkTipList(slug) {
-  fetch(`/tips/${slug}/bookmark/`, {
-    method: 'POST',
-    headers: {
-      'X-CSRFToken': getCookie('csrftoken'),
-      'Content-Type': 'application/json'
-    },
-  })
-    .then(response => {
-      if (response.status === 401) {
-        window.location.href = "{% url 'accounts:login' %}";
-        return;
-      }
-      return response.json();
-    })
-    .then(data => {
-      if (data) {
-        const icon = document.getElementById(`bookmark-icon-${slug}`);
+  toggleTipCardInteraction(slug, 'bookmark');
+}
 
-        if (data.bookmarked) {
-          icon.classList.remove('text-gray-500', 'dark:text-gray-400');
-          icon.classList.add('text-yellow-500', 'fill-current');
-          icon.setAttribute('fill', 'currentColor');
-        } else {
-          icon.classList.remove('text-yellow-500', 'fill-current');
-          icon.classList.add('text-gray-500', 'dark:text-gray-400');
-          icon.setAttribute('fill', 'none');
+// Infinite scroll: appends the fragment at data-next-url until X-Next-Page is empty
+function infiniteScroll(container, pagination) {
+  if (!container || !pagination || !pagination.dataset.nextUrl || !('IntersectionObserver' in window)) {
+    return;
+  }
+
+  let nextUrl = pagination.dataset.nextUrl;
+  let loading = false;
+
+  // Scrolling replaces the page links
+  pagination.querySelectorAll('a').forEach(link => link.classList.add('hidden'));
+
+  const observer = new IntersectionObserver(entries => {
+    if (!entries[0].isIntersecting || loading || !nextUrl) {
+      return;
+    }
+
+    loading = true;
+    fetch(nextUrl, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+      .then(response => {
+        nextUrl = response.headers.get('X-Next-Page');
+        return response.text();
+      })
+      .then(html => {
+        container.insertAdjacentHTML('beforeend', html);
+        if (!nextUrl) {
+          observer.disconnect();
+          pagination.remove();
         }
-      }
-    });
-}
\ No newline at end of file
+        loading = false;
+      })
+      .catch(error => {
+        console.error('Error:', error);
+        loading = false;
+      });
+  }, { rootMargin: '400px' });
+
+  observer.observe(pagination);
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+  // Tips feed
+  infiniteScroll(document.getElementById('tipsFeed'), document.getElementById('tipsPagination'));
+
+  // Comments on the tip detail page
+  infiniteScroll(document.getElementById('commentsList'), document.getElementById('commentsPagination'));
+});
@@ -36,22 +36,13 @@ class TipAdmin(admin.ModelAdmin):
     """
     Customize how tips appear in admin.
     """
-    list_display = ['title', 'author', 'category', 'is_published', 'get_likes_count', 'get_comments_count',
+    list_display = ['title', 'author', 'category', 'is_published', 'likes_count', 'comments_count',
                     'created_at']
     list_filter = ['is_published', 'category', 'created_at']
     search_fields = ['title', 'content', 'author__username']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'created_at'
-
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
-    get_likes_count.short_description = 'Likes'
-
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-
-    get_comments_count.short_description = 'Comments'
+    readonly_fields = ['likes_count', 'comments_count', 'bookmarks_count', 'views_count']
 
 
 # ============================================
@@ -0,0 +1,97 @@
+"""
+Compact JSON payloads and ETags for the read-only tip listing API.
+
+The ETag of a listing response only depends on the listing cache
+generation (bumped by every write that can change a card), the normalized
+filters, the cursor, the requested fields and the viewer. It can therefore
+be computed from the cache alone, and a matching If-None-Match is answered
+with 304 before any tip is loaded.
+
+The generation is only trustworthy when every process shares the cache
+(core.W001): with a per-process cache, a write handled by one worker would
+leave the others answering 304 for a changed listing, so no ETag is sent.
+"""
+
+import hashlib
+import json
+
+from django.utils.text import Truncator
+
+from core.checks import cache_is_shared
+
+from . import listing
+
+EXCERPT_LENGTH = 200
+
+
+def _author(tip):
+    return {
+        'username': tip.author.username,
+        'display_name': tip.author.get_full_name() or tip.author.username,
+        'avatar': tip.author.profile_picture.url if tip.author.profile_picture else None,
+    }
+
+
+def _category(tip):
+    if tip.category is None:
+        return None
+    return {'name': tip.category.name, 'slug': tip.category.slug, 'icon': tip.category.icon}
+
+
+# Card fields a client can ask for with ?fields=
+TIP_FIELDS = {
+    'id': lambda tip: tip.pk,
+    'slug': lambda tip: tip.slug,
+    'title': lambda tip: tip.title,
+    'excerpt': lambda tip: Truncator(tip.content).chars(EXCERPT_LENGTH),
+    'url': lambda tip: tip.get_absolute_url(),
+    'image': lambda tip: tip.image.url if tip.image else None,
+    'author': _author,
+    'category': _category,
+    'created_at': lambda tip: tip.created_at.isoformat(),
+    'likes_count': lambda tip: tip.likes_count,
+    'comments_count': lambda tip: tip.comments_count,
+    'is_liked': lambda tip: tip.is_liked,
+    'is_bookmarked': lambda tip: tip.is_bookmarked,
+}
+
+
+def parse_fields(value):
+    """
+    Turning a comma separated ?fields= value into a tuple of field names.
+
+    Returns every field when the value is empty and raises ValueError for
+    unknown names.
+    """
+    if not value:
+        return tuple(TIP_FIELDS)
+
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in TIP_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def serialize_tip(tip, fields):
+    return {name: TIP_FIELDS[name](tip) for name in fields}
+
+
+def listing_etag(request):
+    # Fingerprint of a listing response, computed without querying tips
+    if not cache_is_shared():
+        return None
+
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except ValueError:
+        return None
+
+    raw = json.dumps([
+        listing.get_generation(),
+        listing.normalize_filters(request.GET),
+        request.GET.get('cursor') or '',
+        fields,
+        request.user.pk,
+    ], sort_keys=True, default=str)
+    return hashlib.md5(raw.encode()).hexdigest()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TipsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tips'
+
+    def ready(self):
+        # Registering signal handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,146 @@
+"""
+Ranked "Discover People" suggestions for the community page.
+
+Suggestions come from two places:
+
+- FollowSuggestion rows, written offline from mutual follows, co-likes and
+  shared interests by tips/recommender.py. They are read in one indexed
+  query, skipping people the viewer has followed since.
+- A ranked pool that fills the rest of the list (and covers users without
+  any follows or likes yet). Every active user carries a precomputed
+  CustomUser.community_score: the impact score, decayed by how long ago the
+  user was last active (COMMUNITY_ACTIVITY_HALF_LIFE_DAYS). `recompute()`
+  refreshes it and is run by `python manage.py update_community_scores`.
+  The pool holds the SUGGESTION_POOL best scored users the viewer does not
+  follow yet, read with one index walk and a NOT EXISTS filter, then
+  re-ranked by the eco interests they share with the viewer. The ranked ids
+  are cached per viewer (and dropped when the viewer follows or unfollows
+  someone).
+
+Either way a page of suggestions costs the same however many users there
+are.
+"""
+
+import math
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from accounts.models import Follow
+
+SUGGESTION_POOL = 200
+POOL_TIMEOUT = 600
+KEY_PREFIX = 'tips:community:'
+
+# Score points per interest shared with the viewer
+INTEREST_WEIGHT = 5.0
+
+
+def _half_life_days():
+    return getattr(settings, 'COMMUNITY_ACTIVITY_HALF_LIFE_DAYS', 14)
+
+
+def score(impact_score, last_activity, now):
+    # Halving the weight of a user's impact for every half-life they have been away
+    idle_days = max((now - last_activity).total_seconds() / 86400, 0) if last_activity else 365
+    return (max(impact_score, 0) + 1) * math.pow(0.5, idle_days / _half_life_days())
+
+
+def recompute(now=None, batch_size=500):
+    """
+    Refreshing community_score for every active user.
+
+    Returns the number of users whose score changed.
+    """
+    User = get_user_model()
+    now = now or timezone.now()
+
+    user_ids = list(User.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True))
+
+    changed = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = User.objects.filter(pk__in=user_ids[start:start + batch_size]).only('impact_score', 'last_activity', 'community_score')
+
+        updated = []
+        for user in batch:
+            new_score = score(user.impact_score, user.last_activity, now)
+            if new_score != user.community_score:
+                user.community_score = new_score
+                updated.append(user)
+
+        if updated:
+            # bulk_update keeps last_activity (auto_now) untouched
+            with transaction.atomic():
+                User.objects.bulk_update(updated, ['community_score'])
+            changed += len(updated)
+
+    return changed
+
+
+def interests(text):
+    return {interest.strip().lower() for interest in (text or '').split(',') if interest.strip()}
+
+
+def with_follow_state(queryset, viewer):
+    # Annotating whether the viewer follows each user, in the same query
+    return queryset.annotate(
+        is_following=Exists(Follow.objects.filter(follower=viewer, following=OuterRef('pk')))
+    )
+
+
+def _pool_key(user_id):
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def _pool_ids(viewer):
+    # Best scored users the viewer does not follow, re-ranked by shared interests
+    key = _pool_key(viewer.pk)
+    ids = cache.get(key)
+    if ids is not None:
+        return ids
+
+    User = get_user_model()
+    candidates = (
+        with_follow_state(User.objects.filter(is_active=True).exclude(pk=viewer.pk), viewer)
+        .filter(is_following=False)
+        .order_by('-community_score', '-id')
+        .values_list('pk', 'community_score', 'eco_interests')[:SUGGESTION_POOL]
+    )
+
+    mine = interests(viewer.eco_interests)
+    ranked = sorted(
+        candidates,
+        key=lambda row: (row[1] + INTEREST_WEIGHT * len(mine & interests(row[2])), row[0]),
+        reverse=True,
+    )
+
+    ids = [pk for pk, _, _ in ranked]
+    cache.set(key, ids, POOL_TIMEOUT)
+    return ids
+
+
+def precomputed_ids(viewer):
+    # Offline suggestions (tips/recommender.py) the viewer has not acted on yet
+    from .models import FollowSuggestion
+
+    return list(
+        FollowSuggestion.objects.filter(user=viewer, suggested__is_active=True)
+        .filter(~Exists(Follow.objects.filter(follower=viewer, following=OuterRef('suggested_id'))))
+        .order_by('rank')
+        .values_list('suggested_id', flat=True)
+    )
+
+
+def suggestion_ids(viewer):
+    # Ranked ids of users the viewer may want to follow
+    ids = precomputed_ids(viewer)
+    seen = set(ids)
+    return ids + [pk for pk in _pool_ids(viewer) if pk not in seen]
+
+
+def invalidate(user_id):
+    cache.delete(_pool_key(user_id))
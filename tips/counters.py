@@ -0,0 +1,63 @@
+"""
+Denormalized like/comment/bookmark counters stored on Tip.
+
+The counters are adjusted with F() expressions by the signal handlers in
+tips/signals.py, so they change in the same transaction as the Like,
+Comment or Bookmark row (cascade deletes included). Every adjustment also
+bumps Tip.engagement_version, which feeds the detail page validators. `reconcile()` repairs
+any drift and is used by `python manage.py reconcile_tip_counters`.
+"""
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest, Now
+
+
+def _counted_models():
+    from .models import Like, Comment, Bookmark
+
+    return {
+        'likes_count': Like,
+        'comments_count': Comment,
+        'bookmarks_count': Bookmark,
+    }
+
+
+def adjust(tip_id, field, delta):
+    # Moving one counter without reading it first (never below zero)
+    from .models import Tip
+
+    Tip.objects.filter(pk=tip_id).update(**{
+        field: Greatest(F(field) + delta, 0),
+        'engagement_version': F('engagement_version') + 1,
+        'last_engaged_at': Now(),
+    })
+
+
+def actual_count(model):
+    # Subquery counting the real rows for the outer tip
+    rows = model.objects.filter(tip=OuterRef('pk')).order_by().values('tip').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows), 0)
+
+
+def reconcile(queryset):
+    """
+    Fixing counters that drifted from the real row counts.
+
+    Returns the number of repaired tips.
+    """
+    counted = _counted_models()
+    actual = {f'actual_{field}': actual_count(model) for field, model in counted.items()}
+
+    drift = Q()
+    for field in counted:
+        drift |= ~Q(**{field: F(f'actual_{field}')})
+
+    tip_ids = list(queryset.annotate(**actual).filter(drift).values_list('pk', flat=True))
+    if tip_ids:
+        queryset.model.objects.filter(pk__in=tip_ids).update(
+            engagement_version=F('engagement_version') + 1,
+            last_engaged_at=Now(),
+            **{field: actual_count(model) for field, model in counted.items()}
+        )
+
+    return len(tip_ids)
@@ -0,0 +1,136 @@
+"""
+Following feed: tips from the authors a user follows, newest first.
+
+Publishing a tip copies a small TimelineEntry row into every follower's
+timeline (fan-out on write), so reading a feed is one range scan over the
+(user, created_at, tip) index. Authors with more than FEED_FANOUT_LIMIT
+followers are not fanned out; their tips are pulled at read time and
+merged into the page (fan-out on read), which keeps publishing cheap for
+very popular authors.
+
+The limit is checked against CustomUser.followers_count. An author who
+drops back below the limit only has tips published after that in the
+timelines of existing followers.
+
+Follows backfill the author's recent tips and unfollows prune them (see
+tips/signals.py).
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from accounts.models import Follow
+
+from .models import Tip, TimelineEntry
+from .pagination import CursorPage, CursorPaginator
+
+PAGE_SIZE = 12
+FEED_ORDERING = ('-created_at', '-tip_id')
+BACKFILL_SIZE = 50
+BATCH_SIZE = 1000
+
+
+def _fanout_limit():
+    return getattr(settings, 'FEED_FANOUT_LIMIT', 1000)
+
+
+def pushes_to_followers(author):
+    # Whether the author's tips are written into follower timelines
+    return author.followers_count <= _fanout_limit()
+
+
+def fan_out(tip):
+    # Copying a published tip into the timelines of the author's followers
+    if not pushes_to_followers(tip.author):
+        return 0
+
+    follower_ids = Follow.objects.filter(following_id=tip.author_id).values_list('follower_id', flat=True)
+    entries = [
+        TimelineEntry(user_id=follower_id, tip=tip, author_id=tip.author_id, created_at=tip.created_at)
+        for follower_id in follower_ids.iterator(chunk_size=BATCH_SIZE)
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(entries)
+
+
+def retract(tip):
+    # Removing an unpublished tip from every timeline
+    TimelineEntry.objects.filter(tip=tip).delete()
+
+
+def backfill(follower, author):
+    # Adding the author's recent tips to a new follower's timeline
+    if not pushes_to_followers(author):
+        return
+
+    tips = (
+        Tip.objects.filter(author=author, is_published=True)
+        .order_by('-created_at')
+        .values_list('pk', 'created_at')[:BACKFILL_SIZE]
+    )
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(user=follower, tip_id=tip_id, author=author, created_at=created_at)
+        for tip_id, created_at in tips
+    ], ignore_conflicts=True)
+
+
+def prune(follower_id, author_id):
+    # Dropping an unfollowed author's tips from the timeline
+    TimelineEntry.objects.filter(user_id=follower_id, author_id=author_id).delete()
+
+
+def pulled_author_ids(user):
+    # Followed authors whose tips are merged in at read time
+    return list(
+        get_user_model().objects
+        .filter(followers_set__follower=user, followers_count__gt=_fanout_limit())
+        .values_list('pk', flat=True)
+    )
+
+
+def get_page(user, cursor=None, params=None, per_page=PAGE_SIZE):
+    """
+    Returning one page of the user's feed with hydrated tips.
+
+    Both sources are paginated with the same (created_at, tip_id) keyset,
+    so their pages can be merged and continued from a single cursor.
+    """
+    sources = [TimelineEntry.objects.filter(user=user).only('created_at', 'tip_id')]
+
+    pulled = pulled_author_ids(user)
+    if pulled:
+        sources.append(
+            Tip.objects.filter(author_id__in=pulled, is_published=True)
+            .annotate(tip_id=F('id'))
+            .only('created_at')
+        )
+
+    paginators = [CursorPaginator(queryset, FEED_ORDERING, per_page) for queryset in sources]
+    pages = [paginator.get_page(cursor) for paginator in paginators]
+
+    # Merging newest first (a tip can be in both sources right after an author crosses the limit)
+    rows = sorted((row for page in pages for row in page), key=lambda row: (row.created_at, row.tip_id), reverse=True)
+    merged = []
+    seen = set()
+    for row in rows:
+        if row.tip_id not in seen:
+            seen.add(row.tip_id)
+            merged.append(row)
+
+    has_next = len(merged) > per_page or any(page.has_next() for page in pages)
+    merged = merged[:per_page]
+
+    next_cursor = None
+    if merged and has_next:
+        next_cursor = paginators[0].encode_cursor('next', [merged[-1].created_at, merged[-1].tip_id])
+
+    ids = [row.tip_id for row in merged]
+    tips = (
+        Tip.objects.filter(is_published=True, author__is_active=True)
+        .select_related('author', 'category')
+        .with_viewer_state(user)
+        .in_bulk(ids)
+    )
+
+    return CursorPage([tips[tip_id] for tip_id in ids if tip_id in tips], next_cursor, None, params)
@@ -0,0 +1,152 @@
+"""
+Race-free like and bookmark writes.
+
+A like or bookmark is set with a single INSERT (inside a savepoint, so a
+concurrent duplicate only raises IntegrityError on the unique (user, tip)
+constraint) and cleared with a single DELETE; no row is read first. The
+model signals still fire, so the denormalized counters, cached listings and
+site stats move in the same transaction, and the new count is read back
+before it commits.
+
+`apply_batch()` applies many queued operations from tips.js (quick clicks,
+or clicks made while offline) in one transaction. Only the last operation
+per tip and kind counts, so a like/unlike/like burst costs one write.
+"""
+
+from django.db import IntegrityError, transaction
+
+from .models import Tip, Like, Bookmark
+
+# Interaction kind -> (model, counter field on Tip)
+KINDS = {
+    'like': (Like, 'likes_count'),
+    'bookmark': (Bookmark, 'bookmarks_count'),
+}
+
+MAX_BATCH_OPERATIONS = 100
+
+
+def _add(model, user, tip):
+    # Inserting the row; False when it already existed
+    try:
+        with transaction.atomic():
+            model.objects.create(user=user, tip=tip)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _remove(model, user, tip):
+    # Deleting the row; False when there was nothing to delete
+    deleted, _ = model.objects.filter(user=user, tip=tip).delete()
+    return deleted > 0
+
+
+def _count(tip, field):
+    return Tip.objects.values_list(field, flat=True).get(pk=tip.pk)
+
+
+def set_state(user, tip, kind, active):
+    """
+    Making the user's like or bookmark on a tip match `active`.
+
+    Returns (active, count) as committed.
+    """
+    model, field = KINDS[kind]
+
+    with transaction.atomic():
+        if active:
+            _add(model, user, tip)
+        else:
+            _remove(model, user, tip)
+        return active, _count(tip, field)
+
+
+def toggle(user, tip, kind):
+    """
+    Flipping the user's like or bookmark on a tip.
+
+    Returns (active, count) as committed.
+    """
+    model, field = KINDS[kind]
+
+    with transaction.atomic():
+        # A delete that removed nothing means the tip was not liked/bookmarked yet
+        active = not _remove(model, user, tip)
+        if active:
+            _add(model, user, tip)
+        return active, _count(tip, field)
+
+
+def parse_operations(data):
+    """
+    Validating a batch payload: {"operations": [{"tip": slug, "kind": "like", "active": true}, ...]}.
+
+    Returns {(slug, kind): active} keeping the last operation per pair and
+    raises ValueError for malformed input.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('operations'), list):
+        raise ValueError('Expected an "operations" list')
+
+    operations = data['operations']
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f'At most {MAX_BATCH_OPERATIONS} operations per batch')
+
+    latest = {}
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise ValueError('Every operation must be an object')
+
+        slug, kind, active = operation.get('tip'), operation.get('kind'), operation.get('active')
+        if not isinstance(slug, str) or not slug:
+            raise ValueError('Every operation needs a tip slug')
+        if kind not in KINDS:
+            raise ValueError(f'Unknown kind: {kind}')
+        if not isinstance(active, bool):
+            raise ValueError('"active" must be true or false')
+
+        # Later clicks win, in click order
+        latest.pop((slug, kind), None)
+        latest[slug, kind] = active
+
+    return latest
+
+
+def apply_batch(user, operations):
+    """
+    Applying parsed operations in one transaction.
+
+    Returns one result per operation: {"tip", "kind", "active", "count"}, or
+    {"tip", "kind", "error"} for tips that are missing or unpublished.
+    """
+    slugs = {slug for slug, _ in operations}
+    results = []
+
+    with transaction.atomic():
+        tips = Tip.objects.filter(slug__in=slugs, is_published=True).only('pk', 'slug').in_bulk(field_name='slug')
+
+        for (slug, kind), active in operations.items():
+            tip = tips.get(slug)
+            if tip is None:
+                results.append({'tip': slug, 'kind': kind, 'error': 'Tip not found'})
+                continue
+
+            model, _ = KINDS[kind]
+            if active:
+                _add(model, user, tip)
+            else:
+                _remove(model, user, tip)
+            results.append({'tip': slug, 'kind': kind, 'active': active})
+
+        # Reading the counts once all writes are in
+        counts = {
+            row['slug']: row
+            for row in Tip.objects.filter(pk__in=[tip.pk for tip in tips.values()])
+            .values('slug', 'likes_count', 'bookmarks_count')
+        }
+
+    for result in results:
+        if 'error' not in result:
+            result['count'] = counts[result['tip']][KINDS[result['kind']][1]]
+
+    return results
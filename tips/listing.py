@@ -0,0 +1,130 @@
+"""
+Tip list filtering and the versioned result cache in front of it.
+
+A listing page is cached as the ordered list of tip ids plus its cursors,
+keyed by the normalized filters and a global generation number. Any write
+to a Tip, Like, Comment, Bookmark or Category (or an author's profile)
+bumps the generation (see tips/signals.py), which makes every cached page
+unreachable at once. A cache hit only has to hydrate the visible tips with
+a single in_bulk query.
+"""
+
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import search
+from .models import Tip
+from .pagination import CursorPage, CursorPaginator
+
+PAGE_SIZE = 12
+GENERATION_KEY = 'tips:listing:generation'
+
+# Cursor ordering for each sort option (the last column keeps positions unique)
+TIP_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'most_liked': ('-likes_count', '-created_at', '-id'),
+    'most_commented': ('-comments_count', '-created_at', '-id'),
+    'trending': ('-trending_score', '-created_at', '-id'),
+    'relevance': ('search_rank', '-created_at', '-id'),
+}
+
+DATE_RANGES = {
+    'last_7_days': timedelta(days=7),
+    'last_month': timedelta(days=30),
+}
+
+
+def normalize_filters(params):
+    # Reducing request parameters to the values that change the result
+    search_query = ' '.join((params.get('search') or '').lower().split())
+    sort_by = params.get('sort_by')
+    if sort_by not in TIP_ORDERINGS or (sort_by == 'relevance' and not search_query):
+        sort_by = 'newest'
+
+    date_range = params.get('date_range')
+    if date_range not in DATE_RANGES:
+        date_range = ''
+
+    return {
+        'category': params.get('category') or '',
+        'search': search_query,
+        'date_range': date_range,
+        'sort_by': sort_by,
+    }
+
+
+def filter_tips(filters, queryset=None):
+    # Applying normalized filters to the published tips
+    if queryset is None:
+        queryset = Tip.objects.all()
+
+    tips = queryset.filter(is_published=True, author__is_active=True)
+
+    if filters['category']:
+        tips = tips.filter(category__slug=filters['category'])
+
+    if filters['search']:
+        tips = search.filter_tips(tips, filters['search'], rank=filters['sort_by'] == 'relevance')
+
+    if filters['date_range']:
+        tips = tips.filter(created_at__gte=timezone.now() - DATE_RANGES[filters['date_range']])
+
+    return tips
+
+
+def get_generation():
+    # Reading the listing generation, starting a fresh one if it was evicted
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    # Invalidating every cached listing page
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+
+
+def _page_key(filters, cursor):
+    raw = json.dumps([filters, cursor or ''], sort_keys=True)
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'tips:listing:{get_generation()}:{digest}'
+
+
+def get_page(filters, cursor, user, params=None):
+    """
+    Returning one listing page of hydrated tips for the viewer.
+
+    Ids and cursors come from the cache when possible; the tips
+    themselves (with viewer state) are always loaded fresh.
+    """
+    key = _page_key(filters, cursor)
+    cached = cache.get(key)
+
+    if cached is None:
+        ordering = TIP_ORDERINGS[filters['sort_by']]
+        columns = [name.lstrip('-') for name in ordering if name != 'search_rank']
+        paginator = CursorPaginator(filter_tips(filters).only(*columns), ordering, PAGE_SIZE)
+        page = paginator.get_page(cursor)
+        cached = {
+            'ids': [tip.pk for tip in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        }
+        cache.set(key, cached, getattr(settings, 'TIP_LIST_CACHE_TIMEOUT', 300))
+
+    tips = Tip.objects.select_related('author', 'category').with_viewer_state(user).in_bulk(cached['ids'])
+    rows = [tips[tip_id] for tip_id in cached['ids'] if tip_id in tips]
+
+    return CursorPage(rows, cached['next'], cached['previous'], params)
@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from tips import search
+from tips.models import Tip
+
+WORDS = [
+    'recycle', 'compost', 'solar', 'energy', 'water', 'plastic', 'bamboo', 'garden',
+    'bicycle', 'reuse', 'organic', 'local', 'waste', 'thrift', 'repair', 'insulation',
+    'rainwater', 'vegetable', 'seasonal', 'refill', 'glass', 'paper', 'electric', 'bus',
+    'walk', 'laundry', 'cold', 'shower', 'lights', 'unplug', 'donate', 'sharing',
+]
+
+QUERIES = ['compost', 'solar energy', 'plastic', 'rainwater garden', 'repai', 'unplug lights']
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'qu', 'dor', 'len', 'mar', 'tis']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Comparing icontains search latency with the full-text index (data is rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='Tip counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tips inserted per batch')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Search index table is missing. Run "python manage.py migrate" first.')
+
+        try:
+            with transaction.atomic():
+                self.run(sorted(options['sizes']), options['repeat'], options['batch_size'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, sizes, repeat, batch_size):
+        rng = random.Random(42)
+
+        # Filler vocabulary with a skewed distribution, so topic words stay selective
+        filler = sorted({''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(20000)})
+        weights = [1 / (rank + 1) for rank in range(len(filler))]
+
+        def text(length):
+            words = rng.choices(filler, weights=weights, k=length)
+            words[rng.randrange(length)] = rng.choice(WORDS)
+            return ' '.join(words)
+
+        author = get_user_model().objects.create(username='search-benchmark')
+        created = 0
+
+        self.stdout.write(f'{"tips":>10} {"icontains ms":>14} {"fts ms":>10} {"speedup":>9}')
+
+        for size in sizes:
+            while created < size:
+                count = min(batch_size, size - created)
+                Tip.objects.bulk_create([
+                    Tip(
+                        author=author,
+                        title=text(6),
+                        slug=f'search-benchmark-{created + i}',
+                        content=text(80),
+                    )
+                    for i in range(count)
+                ])
+                created += count
+
+            # bulk_create skips signals, so indexing everything in one go
+            search.rebuild()
+
+            base = Tip.objects.filter(is_published=True)
+            icontains_ms = self.measure(repeat, lambda q: self.icontains_page(base, q))
+            fts_ms = self.measure(repeat, lambda q: self.fts_page(base, q))
+
+            self.stdout.write(f'{size:>10} {icontains_ms:>14.2f} {fts_ms:>10.2f} {icontains_ms / fts_ms:>8.1f}x')
+
+    def measure(self, repeat, run_query):
+        timings = []
+        for query in QUERIES:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run_query(query)
+                timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def icontains_page(self, base, query):
+        tips = base.filter(Q(title__icontains=query) | Q(content__icontains=query)).order_by('-created_at')
+        tips.count()
+        list(tips[:12])
+
+    def fts_page(self, base, query):
+        tips = search.filter_tips(base, query, rank=True).order_by('search_rank', '-created_at')
+        tips.count()
+        list(tips[:12])
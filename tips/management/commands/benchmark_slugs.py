@@ -0,0 +1,80 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import slugify
+
+from tips import slugs
+from tips.models import Tip
+
+TITLE = 'Reduce plastic'
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Comparing slug allocation for same-titled tips with the old probing loop (data is rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000], help='Same-titled tips already stored')
+        parser.add_argument('--creates', type=int, default=200, help='Tips saved per size with the allocator')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(sorted(options['sizes']), options['creates'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, sizes, creates):
+        author = get_user_model().objects.create(username='slug-benchmark')
+        base = slugify(TITLE)
+        stored = 0
+        next_suffix = 0
+
+        self.stdout.write(f'{"tips":>8} {"probe queries":>14} {"probe ms":>10} {"alloc queries":>14} {"alloc ms":>10} {"save ms":>9}')
+
+        for size in sizes:
+            # Filling the table the way the old loop would have named the tips
+            Tip.objects.bulk_create([
+                Tip(author=author, title=TITLE, slug=base if i == 0 else f'{base}-{i}', content='Benchmark')
+                for i in range(next_suffix, next_suffix + size - stored)
+            ])
+            next_suffix += size - stored
+            # The sequence did not see the bulk insert (the first save below would also catch up)
+            slugs.resync(Tip, TITLE, 'tip')
+
+            probe_queries, probe_ms, _ = self.measure(lambda: self.probe(base))
+            alloc_queries, alloc_ms, slug = self.measure(lambda: slugs.allocate(Tip, TITLE, 'tip'))
+            # Storing the measured slug so the old loop finds no gap next round
+            Tip.objects.bulk_create([Tip(author=author, title=TITLE, slug=slug, content='Benchmark')])
+
+            start = time.perf_counter()
+            for _ in range(creates):
+                Tip.objects.create(author=author, title=TITLE, content='Benchmark')
+            save_ms = (time.perf_counter() - start) * 1000 / creates
+            stored = size + creates + 1
+            next_suffix += creates + 1
+
+            self.stdout.write(f'{size:>8} {probe_queries:>14} {probe_ms:>10.2f} {alloc_queries:>14} {alloc_ms:>10.2f} {save_ms:>9.2f}')
+
+    def measure(self, allocate):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result = allocate()
+            elapsed = (time.perf_counter() - start) * 1000
+        return len(queries), elapsed, result
+
+    def probe(self, base):
+        # The previous Tip.save(): one exists() query per taken suffix
+        slug = base
+        counter = 1
+        while Tip.objects.filter(slug=slug).exists():
+            slug = f'{base}-{counter}'
+            counter += 1
+        return slug
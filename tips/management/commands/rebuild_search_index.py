@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tips import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilding the full-text search index for tips'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tips written per batch')
+
+    def handle(self, *args, **options):
+        # The table may have been created since this process last looked
+        search.reset_availability()
+        if not search.is_available():
+            raise CommandError('Search index table is missing. Run "python manage.py migrate" on an FTS5-enabled SQLite database.')
+
+        total = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} tips.'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from tips import counters
+from tips.models import Tip
+
+
+class Command(BaseCommand):
+    help = 'Repairing drifted like/comment/bookmark counters on tips, one id range at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Tips checked per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        bounds = Tip.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write('No tips to check.')
+            return
+
+        repaired = 0
+        for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+            with transaction.atomic():
+                repaired += counters.reconcile(Tip.objects.filter(id__gte=start, id__lt=start + chunk_size))
+
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters on {repaired} tips.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tips import community
+
+
+class Command(BaseCommand):
+    help = 'Recomputing the community score that ranks "Discover People" suggestions (run it from a scheduled task)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users updated per query')
+
+    def handle(self, *args, **options):
+        changed = community.recompute(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated community scores on {changed} users.'))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tips import recommender
+
+
+class Command(BaseCommand):
+    help = 'Rebuilding the friends-of-friends "who to follow" suggestions (run it from a scheduled task)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users written per transaction')
+        parser.add_argument('--limit', type=int, default=recommender.SUGGESTIONS_PER_USER, help='Suggestions kept per user')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written = recommender.recompute(batch_size=options['batch_size'], limit=options['limit'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} follow suggestions in {elapsed:.1f}s.'))
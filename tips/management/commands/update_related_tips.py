@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from tips import similarity
+
+
+class Command(BaseCommand):
+    help = 'Computing related tips for new or edited tips (or every tip with --all)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute neighbours for every tip')
+        parser.add_argument('--batch-size', type=int, default=500, help='Tips written per transaction')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            tip_ids = None
+        else:
+            tip_ids = similarity.stale_tip_ids()
+            if not tip_ids:
+                self.stdout.write('Related tips are up to date.')
+                return
+
+        refreshed = similarity.refresh(tip_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed related tips for {refreshed} tips.'))
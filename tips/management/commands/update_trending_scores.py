@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tips import trending
+
+
+class Command(BaseCommand):
+    help = 'Recomputing the time-decayed trending score of recently active tips (run it from a scheduled task)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Tips updated per query')
+
+    def handle(self, *args, **options):
+        changed = trending.recompute(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated trending scores on {changed} tips.'))
@@ -0,0 +1,65 @@
+import django.db.models.deletion
+import tips.search
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+
+def create_search_index(apps, schema_editor):
+    # Creating the FTS5 index (SQLite only) and filling it from existing tips
+    connection = schema_editor.connection
+    tips.search.reset_availability()
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS tips_tip_fts USING fts5("
+                "title, content, category, "
+                "tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite was built without FTS5, search falls back to icontains
+            return
+
+        cursor.execute(
+            "INSERT INTO tips_tip_fts (tips_tip_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')"
+        )
+        cursor.execute(
+            "INSERT INTO tips_tip_fts (rowid, title, content, category) "
+            "SELECT tips_tip.id, tips_tip.title, tips_tip.content, COALESCE(tips_category.name, '') "
+            "FROM tips_tip LEFT JOIN tips_category ON tips_category.id = tips_tip.category_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    tips.search.reset_availability()
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS tips_tip_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0003_category_approved_at_category_approved_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TipSearchIndex',
+            fields=[
+                ('tip', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='tips.tip')),
+                ('document', tips.search.SearchDocumentField(db_column='tips_tip_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'tips_tip_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    # Counting existing likes, comments and bookmarks
+    Tip = apps.get_model('tips', 'Tip')
+
+    def actual_count(model_name):
+        model = apps.get_model('tips', model_name)
+        rows = model.objects.filter(tip=OuterRef('pk')).order_by().values('tip').annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(rows), 0)
+
+    Tip.objects.update(
+        likes_count=actual_count('Like'),
+        comments_count=actual_count('Comment'),
+        bookmarks_count=actual_count('Bookmark'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0004_tip_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tip',
+            name='bookmarks_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of bookmarks'),
+        ),
+        migrations.AddField(
+            model_name='tip',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of comments'),
+        ),
+        migrations.AddField(
+            model_name='tip',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of likes'),
+        ),
+        migrations.AddIndex(
+            model_name='tip',
+            index=models.Index(fields=['-likes_count', '-created_at', '-id'], name='tips_tip_likes_c_811144_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tip',
+            index=models.Index(fields=['-comments_count', '-created_at', '-id'], name='tips_tip_comment_3ce352_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
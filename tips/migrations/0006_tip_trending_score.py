@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0005_tip_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tip',
+            name='trending_score',
+            field=models.FloatField(default=0, help_text='Recent engagement decayed by age'),
+        ),
+        migrations.AddIndex(
+            model_name='bookmark',
+            index=models.Index(fields=['created_at'], name='tips_bookma_created_ec0d3c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='tips_commen_created_5ee6da_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['created_at'], name='tips_like_created_bbca84_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tip',
+            index=models.Index(fields=['-trending_score', '-created_at', '-id'], name='tips_tip_trendin_5fec5a_idx'),
+        ),
+    ]
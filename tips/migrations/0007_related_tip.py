@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0006_tip_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedTip',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Cosine similarity of the TF-IDF vectors')),
+                ('rank', models.PositiveSmallIntegerField(help_text='Position among the neighbours (0 is the most similar)')),
+                ('related', models.ForeignKey(help_text='Similar tip', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tips.tip')),
+                ('tip', models.ForeignKey(help_text='Tip the neighbour was computed for', on_delete=django.db.models.deletion.CASCADE, related_name='similar_tips', to='tips.tip')),
+            ],
+            options={
+                'ordering': ['tip', 'rank'],
+                'indexes': [models.Index(fields=['tip', 'rank'], name='tips_relate_tip_id_1ebd92_idx')],
+                'unique_together': {('tip', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0007_related_tip'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(help_text='Publication time of the tip')),
+                ('author', models.ForeignKey(help_text='Author of the tip (for pruning on unfollow)', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('tip', models.ForeignKey(help_text='Tip shown in the feed', on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='tips.tip')),
+                ('user', models.ForeignKey(help_text='Follower whose feed holds the tip', on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-tip'], name='tips_timeli_user_id_613f45_idx'), models.Index(fields=['user', 'author'], name='tips_timeli_user_id_b55e2f_idx')],
+                'unique_together': {('user', 'tip')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0008_timeline_entry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['tip', '-created_at', '-id'], name='tips_commen_tip_id_c7a018_idx'),
+        ),
+    ]
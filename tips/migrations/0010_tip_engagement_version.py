@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0009_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tip',
+            name='engagement_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped whenever a counter changes (part of the detail page ETag)'),
+        ),
+        migrations.AddField(
+            model_name='tip',
+            name='last_engaged_at',
+            field=models.DateTimeField(blank=True, help_text='Last time a counter changed', null=True),
+        ),
+    ]
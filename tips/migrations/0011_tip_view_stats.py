@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0010_tip_engagement_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tip',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of page views (see tips/view_stats.py)'),
+        ),
+        migrations.CreateModel(
+            name='TipViewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Day of the views')),
+                ('views', models.PositiveIntegerField(default=0, help_text='Page views on this day')),
+                ('sketch', models.BinaryField(help_text='HyperLogLog registers of the visitors (see tips/hll.py)')),
+                ('tip', models.ForeignKey(help_text='Viewed tip', on_delete=django.db.models.deletion.CASCADE, related_name='view_stats', to='tips.tip')),
+            ],
+            options={
+                'verbose_name': 'Tip view stats',
+                'verbose_name_plural': 'Tip view stats',
+                'indexes': [models.Index(fields=['date'], name='tips_tipvie_date_730d12_idx')],
+                'unique_together': {('tip', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0011_tip_view_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text='Model label, e.g. tips.tip', max_length=100)),
+                ('base', models.CharField(help_text='Slug before the numeric suffix', max_length=200)),
+                ('last', models.PositiveIntegerField(default=0, help_text='Last suffix allocated (0 is the bare base)')),
+            ],
+            options={
+                'unique_together': {('scope', 'base')},
+            },
+        ),
+    ]
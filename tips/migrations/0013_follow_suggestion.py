@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0012_slug_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Weighted mutual follows, co-likes and shared interests')),
+                ('rank', models.PositiveSmallIntegerField(help_text='Position among the suggestions (0 is the best)')),
+                ('mutual_follows', models.PositiveIntegerField(default=0, help_text='People the user follows who follow the suggested user')),
+                ('suggested', models.ForeignKey(help_text='Suggested user', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(help_text='User the suggestion is for', on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'rank'],
+                'indexes': [models.Index(fields=['user', 'rank'], name='tips_follow_user_id_08ef80_idx')],
+                'unique_together': {('user', 'suggested')},
+            },
+        ),
+    ]
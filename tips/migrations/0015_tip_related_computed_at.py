@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_computed_tips(apps, schema_editor):
+    # Tips with stored neighbours were computed already
+    Tip = apps.get_model('tips', 'Tip')
+    Tip.objects.filter(similar_tips__isnull=False).distinct().update(related_computed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tips', '0014_profile_tab_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tip',
+            name='related_computed_at',
+            field=models.DateTimeField(blank=True, help_text='Last time the related tips were computed (empty when new or edited)', null=True),
+        ),
+        migrations.RunPython(mark_computed_tips, migrations.RunPython.noop),
+    ]
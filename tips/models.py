@@ -2,9 +2,12 @@
 
 from django.db import models
 from django.conf import settings
-from django.utils.text import slugify
 from django.urls import reverse
 from django.utils import timezone
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+
+from . import slugs
+from .search import SearchDocumentField
 
 
 class Category(models.Model):
@@ -76,10 +79,6 @@ class Category(models.Model):
         return f"{self.name}{status}"
     
     def save(self, *args, **kwargs):
-        # Auto-generating slug and handling auto-approval
-        if not self.slug:
-            self.slug = slugify(self.name)
-        
         # Auto-approving if created by moderator/admin
         if self.created_by and not self.is_approved:
             if self.created_by.role in ['moderator', 'admin']:
@@ -88,7 +87,11 @@ class Category(models.Model):
                 
                 self.approved_at = timezone.now()
         
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            # Auto-generating unique slug from name
+            slugs.save_with_slug(self, self.name, 'category', super().save, *args, **kwargs)
     
     def get_absolute_url(self):
         # Returning URL to view tips in this category
@@ -106,6 +109,23 @@ class Category(models.Model):
         self.save()
 
 
+class TipQuerySet(models.QuerySet):
+    # Shared query helpers for tip listings
+
+    def with_viewer_state(self, user):
+        # Annotating is_liked/is_bookmarked for the viewing user inside the listing query
+        if user is None or not user.is_authenticated:
+            return self.annotate(
+                is_liked=models.Value(False, output_field=models.BooleanField()),
+                is_bookmarked=models.Value(False, output_field=models.BooleanField()),
+            )
+
+        return self.annotate(
+            is_liked=models.Exists(Like.objects.filter(tip=models.OuterRef('pk'), user=user)),
+            is_bookmarked=models.Exists(Bookmark.objects.filter(tip=models.OuterRef('pk'), user=user)),
+        )
+
+
 class Tip(models.Model):
     # Main Tip model for sharing eco-friendly advice
 
@@ -116,12 +136,29 @@ class Tip(models.Model):
     slug = models.SlugField(max_length=200, unique=True, help_text="URL-friendly version of title")
     content = models.TextField(help_text="Detailed explanation of your tip")
     image = models.ImageField(upload_to='tips/', null=True, blank=True, help_text="Optional image to illustrate your tip")
+    image_variants_ready = models.BooleanField(default=False, editable=False, help_text="Have the resized copies of the image been built? (see core/images.py)")
 
     is_published = models.BooleanField(default=True, help_text="Is this tip visible to everyone?")
 
+    # Denormalized counters (kept in sync by tips/signals.py)
+    likes_count = models.PositiveIntegerField(default=0, help_text="Number of likes")
+    comments_count = models.PositiveIntegerField(default=0, help_text="Number of comments")
+    bookmarks_count = models.PositiveIntegerField(default=0, help_text="Number of bookmarks")
+    views_count = models.PositiveIntegerField(default=0, help_text="Number of page views (see tips/view_stats.py)")
+    engagement_version = models.PositiveIntegerField(default=0, help_text="Bumped whenever a counter changes (part of the detail page ETag)")
+    last_engaged_at = models.DateTimeField(null=True, blank=True, help_text="Last time a counter changed")
+
+    # Time-decayed popularity (recomputed by tips/trending.py)
+    trending_score = models.FloatField(default=0, help_text="Recent engagement decayed by age")
+
+    # Content neighbours (recomputed by tips/similarity.py)
+    related_computed_at = models.DateTimeField(null=True, blank=True, help_text="Last time the related tips were computed (empty when new or edited)")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TipQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Tip"
         verbose_name_plural = "Tips"
@@ -129,26 +166,21 @@ class Tip(models.Model):
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['slug']),
+            models.Index(fields=['-likes_count', '-created_at', '-id']),
+            models.Index(fields=['-comments_count', '-created_at', '-id']),
+            models.Index(fields=['-trending_score', '-created_at', '-id']),
+            models.Index(fields=['author', '-created_at', '-id']),
         ]
 
     def __str__(self):
         return f"{self.title} - by {self.author.username}"
 
     def save(self, *args, **kwargs):
-        # Auto-generating unique slug from title
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-
-            # Ensuring slug is unique
-            while Tip.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-
-            self.slug = slug
-
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            # Auto-generating unique slug from title (see tips/slugs.py)
+            slugs.save_with_slug(self, self.title, 'tip', super().save, *args, **kwargs)
 
     def get_absolute_url(self):
         # Returning URL to view this tip
@@ -156,11 +188,11 @@ class Tip(models.Model):
 
     def get_likes_count(self):
         # Getting like count
-        return self.likes.count()
+        return self.likes_count
 
     def get_comments_count(self):
         # Getting comment count
-        return self.comments.count()
+        return self.comments_count
 
     def is_liked_by(self, user):
         # Checking if user liked this tip
@@ -170,7 +202,7 @@ class Tip(models.Model):
 
     def get_bookmarks_count(self):
         # Getting bookmark count
-        return self.bookmarks.count()
+        return self.bookmarks_count
 
     def is_bookmarked_by(self, user):
         # Checking if user bookmarked this tip
@@ -179,6 +211,18 @@ class Tip(models.Model):
         return False
 
 
+class TipSearchIndex(models.Model):
+    # Read-only mapping of the FTS5 search table (maintained by tips/search.py)
+
+    tip = models.OneToOneField(Tip, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search_index')
+    document = SearchDocumentField(db_column='tips_tip_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'tips_tip_fts'
+
+
 class Like(models.Model):
     # Tracking which users liked which tips
 
@@ -189,11 +233,28 @@ class Like(models.Model):
     class Meta:
         unique_together = ['user', 'tip']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} liked {self.tip.title}"
 
 
+def display_name_expression(user_field):
+    # SQL version of CustomUser.get_full_name() falling back to the username
+    full_name = Trim(Concat(f'{user_field}__first_name', models.Value(' '), f'{user_field}__last_name'))
+    return Coalesce(NullIf(full_name, models.Value('')), f'{user_field}__username', output_field=models.CharField())
+
+
+class CommentQuerySet(models.QuerySet):
+    # Shared query helpers for comment threads
+
+    def with_author_display_name(self):
+        return self.annotate(author_display_name=display_name_expression('author'))
+
+
 class Comment(models.Model):
     # Allowing users to comment on tips
 
@@ -204,8 +265,14 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['tip', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.author.username} commented on {self.tip.title}"
@@ -221,8 +288,104 @@ class Bookmark(models.Model):
     class Meta:
         unique_together = ['user', 'tip']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
         verbose_name = "Bookmark"
         verbose_name_plural = "Bookmarks"
 
     def __str__(self):
         return f"{self.user.username} bookmarked {self.tip.title}"
+
+
+class RelatedTip(models.Model):
+    # Precomputed content neighbours of a tip (maintained by tips/similarity.py)
+
+    tip = models.ForeignKey(Tip, on_delete=models.CASCADE, related_name='similar_tips', help_text="Tip the neighbour was computed for")
+    related = models.ForeignKey(Tip, on_delete=models.CASCADE, related_name='+', help_text="Similar tip")
+    score = models.FloatField(help_text="Cosine similarity of the TF-IDF vectors")
+    rank = models.PositiveSmallIntegerField(help_text="Position among the neighbours (0 is the most similar)")
+
+    class Meta:
+        unique_together = ['tip', 'related']
+        ordering = ['tip', 'rank']
+        indexes = [
+            models.Index(fields=['tip', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.tip_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class TimelineEntry(models.Model):
+    # A tip copied into a follower's feed when it is published (maintained by tips/feed.py)
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline', help_text="Follower whose feed holds the tip")
+    tip = models.ForeignKey(Tip, on_delete=models.CASCADE, related_name='timeline_entries', help_text="Tip shown in the feed")
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', help_text="Author of the tip (for pruning on unfollow)")
+    created_at = models.DateTimeField(help_text="Publication time of the tip")
+
+    class Meta:
+        unique_together = ['user', 'tip']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-tip']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+    def __str__(self):
+        return f"Tip {self.tip_id} in the feed of user {self.user_id}"
+
+
+class TipViewStats(models.Model):
+    # Daily page views and unique visitor sketch of a tip (maintained by tips/view_stats.py)
+
+    tip = models.ForeignKey(Tip, on_delete=models.CASCADE, related_name='view_stats', help_text="Viewed tip")
+    date = models.DateField(help_text="Day of the views")
+    views = models.PositiveIntegerField(default=0, help_text="Page views on this day")
+    sketch = models.BinaryField(help_text="HyperLogLog registers of the visitors (see tips/hll.py)")
+
+    class Meta:
+        unique_together = ['tip', 'date']
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+        verbose_name = "Tip view stats"
+        verbose_name_plural = "Tip view stats"
+
+    def __str__(self):
+        return f"Tip {self.tip_id} on {self.date}: {self.views} views"
+
+
+class FollowSuggestion(models.Model):
+    # Precomputed "who to follow" suggestions for a user (maintained by tips/recommender.py)
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='follow_suggestions', help_text="User the suggestion is for")
+    suggested = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', help_text="Suggested user")
+    score = models.FloatField(help_text="Weighted mutual follows, co-likes and shared interests")
+    rank = models.PositiveSmallIntegerField(help_text="Position among the suggestions (0 is the best)")
+    mutual_follows = models.PositiveIntegerField(default=0, help_text="People the user follows who follow the suggested user")
+
+    class Meta:
+        unique_together = ['user', 'suggested']
+        ordering = ['user', 'rank']
+        indexes = [
+            models.Index(fields=['user', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.suggested_id} ({self.score:.2f})"
+
+
+class SlugSequence(models.Model):
+    # Last slug suffix handed out per model and base slug (maintained by tips/slugs.py)
+
+    scope = models.CharField(max_length=100, help_text="Model label, e.g. tips.tip")
+    base = models.CharField(max_length=200, help_text="Slug before the numeric suffix")
+    last = models.PositiveIntegerField(default=0, help_text="Last suffix allocated (0 is the bare base)")
+
+    class Meta:
+        unique_together = ['scope', 'base']
+
+    def __str__(self):
+        return f"{self.scope}: {self.base} ({self.last})"
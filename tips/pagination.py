@@ -0,0 +1,158 @@
+"""
+Keyset (cursor) pagination for tip listings.
+
+Instead of COUNT(*) + OFFSET, each page is fetched with a WHERE clause that
+continues after the last row of the previous page, so every page costs the
+same no matter how deep the user scrolls. Cursors are opaque base64 tokens
+holding the ordering values of the boundary row.
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import QueryDict
+
+
+class CursorPage:
+    # One page of results plus the cursors needed to move around
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.params = params
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_query(self):
+        # Query string for the next page, keeping the current filters
+        return self._query(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        # Query string for the previous page, keeping the current filters
+        return self._query(self.previous_cursor)
+
+    def _query(self, cursor):
+        if cursor is None:
+            return ''
+
+        params = self.params.copy() if self.params is not None else QueryDict(mutable=True)
+        params['cursor'] = cursor
+        return params.urlencode()
+
+
+class CursorPaginator:
+    """
+    Paginating a queryset by the values of its ordering columns.
+
+    `ordering` works like order_by() and must end with a unique column
+    (usually '-id') so that every row has a distinct position. Annotated
+    values (e.g. likes_count) can be used as ordering columns.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+
+    def get_page(self, cursor=None, params=None):
+        # Returning the page for a cursor, falling back to the first page on bad input
+        direction, values = self.decode_cursor(cursor)
+
+        if direction == 'previous':
+            rows = list(
+                self.queryset
+                .filter(self._seek(values, reverse=True))
+                .order_by(*self._reversed_ordering())[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset
+            if direction == 'next':
+                queryset = queryset.filter(self._seek(values))
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = direction == 'next'
+
+        next_cursor = None
+        previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor('next', self._values(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor('previous', self._values(rows[0]))
+
+        return CursorPage(rows, next_cursor, previous_cursor, params)
+
+    def encode_cursor(self, direction, values):
+        # Keeping full microsecond precision so boundary rows compare exactly
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        payload = json.dumps([direction[0], values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, None
+
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if direction not in ('n', 'p') or len(values) != len(self.ordering):
+                return None, None
+            values = [self._field(name).to_python(value) for name, value in zip(self._names(), values)]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            return None, None
+
+        return ('next' if direction == 'n' else 'previous'), values
+
+    def _names(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def _field(self, name):
+        # Finding the model field or annotation output field for an ordering column
+        if name in self.queryset.query.annotations:
+            return self.queryset.query.annotations[name].output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def _values(self, obj):
+        return [getattr(obj, name) for name in self._names()]
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+
+    def _seek(self, values, reverse=False):
+        # Building (a, b, c) > (x, y, z) as a chain of OR'ed equality prefixes
+        condition = Q()
+        equal = Q()
+
+        for name, value in zip(self.ordering, values):
+            descending = name.startswith('-')
+            field = name.lstrip('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+
+        return condition
@@ -0,0 +1,192 @@
+"""
+Friends-of-friends "who to follow" suggestions, stored in FollowSuggestion.
+
+The follow graph and the likes are loaded into compressed sparse row (CSR)
+adjacency lists: one `array` of offsets per node and one flat `array` of
+neighbour indices, about 8 bytes per edge, with users and tips mapped to
+dense indices by binary search over their sorted ids. For every user the
+candidates are
+
+- people followed by the people they follow (mutual follows), and
+- people who liked the same tips (co-likes, skipping tips liked by more
+  than MAX_TIP_LIKERS users, which say little about taste),
+
+scored by the weighted counts plus the eco interests they share. The top
+SUGGESTIONS_PER_USER candidates are written to FollowSuggestion, which
+the community page reads in one indexed query (tips/community.py).
+`recompute()` is run by `python manage.py update_follow_suggestions`.
+
+Plain `array` buffers stand in for NumPy/SciPy, which this project does
+not depend on.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from accounts.models import Follow
+
+from .community import interests
+from .models import Like, FollowSuggestion
+
+SUGGESTIONS_PER_USER = 30
+
+MUTUAL_WEIGHT = 3.0
+CO_LIKE_WEIGHT = 1.0
+INTEREST_WEIGHT = 2.0
+
+# Bounds on the walk, so heavy followers and viral tips keep a run linear
+MAX_FOLLOWS_WALKED = 500
+MAX_TIP_LIKERS = 500
+
+CHUNK_SIZE = 10000
+
+
+class SortedIds:
+    # Dense 0..n-1 indices for a sorted array of primary keys
+
+    def __init__(self, ids):
+        self.ids = array('q', ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index(self, pk):
+        i = bisect_left(self.ids, pk)
+        if i < len(self.ids) and self.ids[i] == pk:
+            return i
+        return None
+
+
+class CSR:
+    # Adjacency lists of `size` nodes in two flat arrays
+
+    def __init__(self, size, pairs):
+        # pairs: (source index, target index) sorted by source index
+        self.indptr = array('q', [0]) * (size + 1)
+        self.indices = array('q')
+
+        counts = array('q', [0]) * size
+        for source, target in pairs:
+            self.indices.append(target)
+            counts[source] += 1
+
+        total = 0
+        for i, count in enumerate(counts):
+            total += count
+            self.indptr[i + 1] = total
+
+    def neighbours(self, i):
+        return memoryview(self.indices)[self.indptr[i]:self.indptr[i + 1]]
+
+    def degree(self, i):
+        return self.indptr[i + 1] - self.indptr[i]
+
+    @property
+    def edges(self):
+        return len(self.indices)
+
+
+def _pairs(rows, sources, targets):
+    # Mapping (source pk, target pk) rows to indices, dropping unknown ends
+    for source_pk, target_pk in rows:
+        source = sources.index(source_pk)
+        target = targets.index(target_pk)
+        if source is not None and target is not None:
+            yield source, target
+
+
+class FollowGraph:
+    # Follow and like adjacency of the active users, loaded in a few streamed queries
+
+    def __init__(self):
+        User = get_user_model()
+        users = list(User.objects.filter(is_active=True).order_by('pk').values_list('pk', 'eco_interests').iterator(chunk_size=CHUNK_SIZE))
+
+        self.users = SortedIds(pk for pk, _ in users)
+
+        # Interned interest ids per user
+        vocabulary = {}
+        self.interests = [
+            frozenset(vocabulary.setdefault(interest, len(vocabulary)) for interest in interests(text))
+            for _, text in users
+        ]
+        del users
+
+        follows = Follow.objects.order_by('follower_id', 'following_id').values_list('follower_id', 'following_id')
+        self.following = CSR(len(self.users), _pairs(follows.iterator(chunk_size=CHUNK_SIZE), self.users, self.users))
+
+        self.tips = SortedIds(
+            Like.objects.order_by('tip_id').values_list('tip_id', flat=True).distinct().iterator(chunk_size=CHUNK_SIZE)
+        )
+        likes = Like.objects.order_by('user_id', 'tip_id').values_list('user_id', 'tip_id')
+        self.liked = CSR(len(self.users), _pairs(likes.iterator(chunk_size=CHUNK_SIZE), self.users, self.tips))
+        likers = Like.objects.order_by('tip_id', 'user_id').values_list('tip_id', 'user_id')
+        self.likers = CSR(len(self.tips), _pairs(likers.iterator(chunk_size=CHUNK_SIZE), self.tips, self.users))
+
+    def suggestions(self, user, limit=SUGGESTIONS_PER_USER):
+        # [(score, user index, mutual follows), ...] best first, for one user index
+        followed = set(self.following.neighbours(user))
+        mutual = defaultdict(int)
+        co_likes = defaultdict(int)
+
+        for friend in self.following.neighbours(user)[:MAX_FOLLOWS_WALKED]:
+            for candidate in self.following.neighbours(friend):
+                mutual[candidate] += 1
+
+        for tip in self.liked.neighbours(user):
+            if self.likers.degree(tip) > MAX_TIP_LIKERS:
+                continue
+            for candidate in self.likers.neighbours(tip):
+                co_likes[candidate] += 1
+
+        mine = self.interests[user]
+        scored = []
+        for candidate in mutual.keys() | co_likes.keys():
+            if candidate == user or candidate in followed:
+                continue
+            shared = len(mine & self.interests[candidate]) if mine else 0
+            score = MUTUAL_WEIGHT * mutual[candidate] + CO_LIKE_WEIGHT * co_likes[candidate] + INTEREST_WEIGHT * shared
+            scored.append((score, candidate, mutual[candidate]))
+
+        # Ties go to the newer account (higher index)
+        return heapq.nlargest(limit, scored)
+
+
+def recompute(batch_size=500, limit=SUGGESTIONS_PER_USER):
+    """
+    Rebuilding FollowSuggestion for every active user.
+
+    Returns the number of suggestions written.
+    """
+    graph = FollowGraph()
+    ids = graph.users.ids
+
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        batch = range(start, min(start + batch_size, len(ids)))
+
+        rows = []
+        for user in batch:
+            for rank, (score, candidate, mutual) in enumerate(graph.suggestions(user, limit)):
+                rows.append(FollowSuggestion(
+                    user_id=ids[user],
+                    suggested_id=ids[candidate],
+                    score=score,
+                    rank=rank,
+                    mutual_follows=mutual,
+                ))
+
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=[ids[user] for user in batch]).delete()
+            FollowSuggestion.objects.bulk_create(rows)
+        written += len(rows)
+
+    # Users deactivated since the last run keep no suggestions
+    FollowSuggestion.objects.exclude(user__is_active=True).delete()
+
+    return written
@@ -0,0 +1,186 @@
+"""
+Full-text search for tips.
+
+Tips are mirrored into an SQLite FTS5 table (title, content and category name)
+keyed by the tip id. The table is kept in sync by the signal handlers in
+tips/signals.py and can be rebuilt with `python manage.py rebuild_search_index`.
+On databases without FTS5 we fall back to the old icontains search.
+"""
+
+import re
+
+from django.db import connection, models, transaction
+from django.db.models import F, Q
+
+INDEX_TABLE = 'tips_tip_fts'
+
+# Column weights used by bm25() for the rank column: title, content, category
+RANK_FUNCTION = 'bm25(10.0, 1.0, 5.0)'
+
+# Limiting very long queries
+MAX_QUERY_TERMS = 8
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# None until checked; both answers are remembered (see reset_availability())
+_available = None
+
+
+class SearchDocumentField(models.TextField):
+    # Hidden FTS5 column named after the table, only used with the match lookup
+    pass
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def is_available():
+    # Checking if the FTS5 index exists on the current database
+    global _available
+
+    if _available is not None:
+        return _available
+
+    if connection.vendor != 'sqlite':
+        _available = False
+        return _available
+
+    with connection.cursor() as cursor:
+        _available = INDEX_TABLE in connection.introspection.table_names(cursor)
+
+    return _available
+
+
+def reset_availability():
+    # Checking for the index table again on the next search (after migrations and rebuilds)
+    global _available
+    _available = None
+
+
+def build_match_query(text):
+    # Turning user input into an FTS5 query with prefix matching on every term
+    terms = _TOKEN_RE.findall(text or '')[:MAX_QUERY_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def filter_tips(queryset, text, rank=False):
+    """
+    Restricting a Tip queryset to tips matching the search text.
+
+    When rank is True the queryset is annotated with `search_rank`
+    (bm25, lower is better) so it can be ordered by relevance.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset.none()
+
+    if not is_available():
+        return queryset.filter(
+            Q(title__icontains=text) |
+            Q(content__icontains=text) |
+            Q(category__name__icontains=text)
+        )
+
+    # Joining the index on rowid so SQLite drives the query from the MATCH
+    queryset = queryset.filter(search_index__document__match=match)
+
+    if rank:
+        queryset = queryset.annotate(search_rank=F('search_index__rank'))
+
+    return queryset
+
+
+def index_tip(tip):
+    # Adding or replacing one tip in the index
+    if not is_available():
+        return
+
+    category_name = tip.category.name if tip.category_id else ''
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {INDEX_TABLE} (rowid, title, content, category) '
+            f'VALUES (%s, %s, %s, %s)',
+            [tip.pk, tip.title, tip.content, category_name]
+        )
+
+
+def remove_tip(tip_id):
+    # Removing one tip from the index
+    if not is_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [tip_id])
+
+
+def _index_rows(rows):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {INDEX_TABLE} (rowid, title, content, category) '
+            f'VALUES (%s, %s, %s, %s)',
+            [(tip_id, title, content, category or '') for tip_id, title, content, category in rows]
+        )
+
+
+def reindex_category(category):
+    # Refreshing the category name on all of its tips
+    if not is_available():
+        return
+
+    rows = category.tips.values_list('id', 'title', 'content').iterator(chunk_size=1000)
+    batch = []
+    for tip_id, title, content in rows:
+        batch.append((tip_id, title, content, category.name))
+        if len(batch) >= 1000:
+            _index_rows(batch)
+            batch = []
+
+    if batch:
+        _index_rows(batch)
+
+
+def rebuild(batch_size=1000):
+    """
+    Rebuilding the whole index from the tips table.
+
+    Returns the number of indexed tips.
+    """
+    from .models import Tip
+
+    if not is_available():
+        return 0
+
+    # One transaction, so searches keep the old index until the new one is complete
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {INDEX_TABLE} ({INDEX_TABLE}, rank) VALUES (%s, %s)',
+                ['rank', RANK_FUNCTION]
+            )
+
+        rows = Tip.objects.order_by().values_list(
+            'id', 'title', 'content', 'category__name'
+        ).iterator(chunk_size=batch_size)
+
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _index_rows(batch)
+                total += len(batch)
+                batch = []
+
+        if batch:
+            _index_rows(batch)
+            total += len(batch)
+
+        return total
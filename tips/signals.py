@@ -0,0 +1,154 @@
+"""
+Signal handlers keeping derived tip data in sync with the source tables.
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.activity import activity_flushed
+from accounts.models import Follow
+
+from . import community, counters, feed, listing, search, view_stats
+from .models import Tip, Category, Like, Comment, Bookmark, RelatedTip
+
+
+@receiver(post_save, sender=Tip)
+def index_tip_on_save(sender, instance, **kwargs):
+    # Updating the search index
+    search.index_tip(instance)
+
+
+@receiver(post_delete, sender=Tip)
+def unindex_tip_on_delete(sender, instance, **kwargs):
+    # Removing the tip from the search index
+    search.remove_tip(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_on_save(sender, instance, created, **kwargs):
+    # Refreshing the category name on indexed tips
+    if not created:
+        search.reindex_category(instance)
+
+
+# Fields whose saved values the handlers below compare against
+TRACKED_FIELDS = ('title', 'content', 'is_published')
+
+
+@receiver(post_init, sender=Tip)
+def remember_tracked_fields(sender, instance, **kwargs):
+    # Deferred fields are left unloaded (None)
+    instance._saved_values = {name: instance.__dict__.get(name) for name in TRACKED_FIELDS}
+
+
+def _changed(instance, update_fields, *names):
+    # Whether this save wrote a new value for any of the fields
+    return any(
+        (update_fields is None or name in update_fields)
+        and instance.__dict__.get(name) != instance._saved_values[name]
+        for name in names
+    )
+
+
+@receiver(post_save, sender=Tip)
+def expire_related_tips_on_save(sender, instance, created, update_fields, **kwargs):
+    # Dropping stored neighbours so update_related_tips recomputes them
+    if not created and _changed(instance, update_fields, 'title', 'content'):
+        RelatedTip.objects.filter(tip=instance).delete()
+        Tip.objects.filter(pk=instance.pk).update(related_computed_at=None)
+
+
+@receiver(post_save, sender=Tip)
+def update_timelines_on_save(sender, instance, created, update_fields, **kwargs):
+    # Fanning out newly published tips and retracting unpublished ones
+    if created:
+        if instance.is_published:
+            feed.fan_out(instance)
+    elif _changed(instance, update_fields, 'is_published'):
+        if instance.is_published:
+            feed.fan_out(instance)
+        else:
+            feed.retract(instance)
+
+
+@receiver(post_save, sender=Tip)
+def remember_saved_fields(sender, instance, update_fields, **kwargs):
+    # Registered after the handlers comparing against the previous values
+    for name in TRACKED_FIELDS:
+        if name in instance.__dict__ and (update_fields is None or name in update_fields):
+            instance._saved_values[name] = instance.__dict__[name]
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.follower, instance.following)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline_on_unfollow(sender, instance, **kwargs):
+    feed.prune(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def refresh_suggestions_on_follow_change(sender, instance, **kwargs):
+    # The followed user must leave (or rejoin) the follower's suggestions
+    community.invalidate(instance.follower_id)
+
+
+@receiver(post_save, sender=Like)
+def count_like_on_save(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust(instance.tip_id, 'likes_count', 1)
+
+
+@receiver(post_delete, sender=Like)
+def count_like_on_delete(sender, instance, **kwargs):
+    counters.adjust(instance.tip_id, 'likes_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_save(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust(instance.tip_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, **kwargs):
+    counters.adjust(instance.tip_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Bookmark)
+def count_bookmark_on_save(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust(instance.tip_id, 'bookmarks_count', 1)
+
+
+@receiver(post_delete, sender=Bookmark)
+def count_bookmark_on_delete(sender, instance, **kwargs):
+    counters.adjust(instance.tip_id, 'bookmarks_count', -1)
+
+
+@receiver([post_save, post_delete], sender=Tip)
+@receiver([post_save, post_delete], sender=Like)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Bookmark)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_tip_listings(sender, **kwargs):
+    # Starting a new listing cache generation (also changes the API ETags)
+    listing.bump_generation()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_tip_listings_on_profile_change(sender, created, update_fields, **kwargs):
+    # Author names and pictures are part of the cards (logins only touch last_login)
+    if not created and (update_fields is None or set(update_fields) - {'last_login'}):
+        listing.bump_generation()
+
+
+@receiver(activity_flushed)
+def record_tip_views(sender, pending, **kwargs):
+    # Storing tip views from the same batch as the activity log
+    view_stats.record_views(pending)
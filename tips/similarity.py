@@ -0,0 +1,160 @@
+"""
+Content similarity between tips, stored in the RelatedTip table.
+
+Each published tip becomes a sparse TF-IDF vector over its title (weighted
+higher) and content. Neighbours are found through an inverted index, so a
+tip is only compared with tips sharing at least one informative term, and
+the top NEIGHBOURS by cosine similarity are written to RelatedTip. The
+detail page then reads them with a single indexed lookup.
+
+Editing a tip drops its rows and clears its `related_computed_at` marker
+(see tips/signals.py); `refresh()` recomputes the unmarked tips plus the
+tips whose neighbour lists they appear in, and is run by
+`python manage.py update_related_tips`. The marker keeps tips that have no
+neighbours at all from counting as stale on every run.
+
+Plain dicts are used instead of NumPy, which this project does not depend
+on; tip texts are short, so the vectors stay small.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Tip, RelatedTip
+
+NEIGHBOURS = 6
+MIN_SCORE = 0.05
+TITLE_WEIGHT = 3
+
+# Terms found in more than this share of tips are too common to tell tips apart
+MAX_DOCUMENT_FREQUENCY = 0.5
+MIN_CORPUS_FOR_MAX_DF = 20
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOP_WORDS = frozenset('''
+    about after again all also and any are because been before being but can could did does doing
+    down during each for from further had has have having her here hers him his how into its just
+    more most much not now off once only other our ours out over own same she should some such than
+    that the their theirs them then there these they this those through too under until very was
+    were what when where which while who whom why will with would you your yours
+'''.split())
+
+
+def tokenize(text):
+    return [term for term in TOKEN_RE.findall(text.lower()) if len(term) > 2 and term not in STOP_WORDS]
+
+
+def corpus_queryset():
+    # Tips that can show up as related tips
+    return Tip.objects.filter(is_published=True, author__is_active=True)
+
+
+class SimilarityIndex:
+    # TF-IDF vectors and an inverted index over a set of tips
+
+    def __init__(self, documents):
+        # documents: iterable of (tip_id, title, content)
+        counts = {}
+        document_frequency = Counter()
+
+        for tip_id, title, content in documents:
+            terms = Counter(tokenize(content))
+            for term in tokenize(title):
+                terms[term] += TITLE_WEIGHT
+            counts[tip_id] = terms
+            document_frequency.update(terms.keys())
+
+        total = len(counts)
+        max_df = total * MAX_DOCUMENT_FREQUENCY if total >= MIN_CORPUS_FOR_MAX_DF else total
+        idf = {
+            term: math.log((1 + total) / (1 + df)) + 1
+            for term, df in document_frequency.items()
+        }
+
+        self.vectors = {}
+        self.postings = defaultdict(list)
+
+        for tip_id, terms in counts.items():
+            vector = {term: (1 + math.log(tf)) * idf[term] for term, tf in terms.items()}
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+            vector = {term: weight / norm for term, weight in vector.items()}
+            self.vectors[tip_id] = vector
+
+            for term, weight in vector.items():
+                # Terms in a single tip cannot link tips; very common ones only add noise
+                if 1 < document_frequency[term] <= max_df:
+                    self.postings[term].append((tip_id, weight))
+
+    @classmethod
+    def from_queryset(cls, queryset, chunk_size=2000):
+        return cls(queryset.values_list('pk', 'title', 'content').iterator(chunk_size=chunk_size))
+
+    def neighbours(self, tip_id, k=NEIGHBOURS):
+        # Top k (tip_id, score) pairs by cosine similarity
+        scores = defaultdict(float)
+        for term, weight in self.vectors.get(tip_id, {}).items():
+            for other_id, other_weight in self.postings.get(term, ()):
+                if other_id != tip_id:
+                    scores[other_id] += weight * other_weight
+
+        best = heapq.nlargest(k, scores.items(), key=itemgetter(1))
+        return [(other_id, score) for other_id, score in best if score >= MIN_SCORE]
+
+
+def stale_tip_ids():
+    # Published tips whose neighbours were never computed (new or edited)
+    return set(corpus_queryset().filter(related_computed_at__isnull=True).values_list('pk', flat=True))
+
+
+def refresh(tip_ids=None, batch_size=500):
+    """
+    Recomputing stored neighbours.
+
+    With tip_ids, refreshes those tips plus every tip that lists one of
+    them or gains one of them as a neighbour; otherwise refreshes every
+    tip. Returns the number of tips refreshed.
+    """
+    index = SimilarityIndex.from_queryset(corpus_queryset())
+
+    if tip_ids is None:
+        affected = set(index.vectors)
+    else:
+        tip_ids = set(tip_ids)
+        affected = set(tip_ids)
+        affected.update(RelatedTip.objects.filter(related_id__in=tip_ids).values_list('tip_id', flat=True))
+        for tip_id in tip_ids:
+            affected.update(other_id for other_id, _ in index.neighbours(tip_id))
+
+    affected = sorted(affected)
+    for start in range(0, len(affected), batch_size):
+        batch = affected[start:start + batch_size]
+        rows = [
+            RelatedTip(tip_id=tip_id, related_id=other_id, score=score, rank=rank)
+            for tip_id in batch
+            for rank, (other_id, score) in enumerate(index.neighbours(tip_id))
+        ]
+
+        with transaction.atomic():
+            RelatedTip.objects.filter(tip_id__in=batch).delete()
+            RelatedTip.objects.bulk_create(rows)
+            Tip.objects.filter(pk__in=batch).update(related_computed_at=timezone.now())
+
+    return len(affected)
+
+
+def related_tips(tip, limit=3):
+    # Stored neighbours that are still visible, most similar first
+    rows = (
+        RelatedTip.objects
+        .filter(tip=tip, related__is_published=True, related__author__is_active=True)
+        .select_related('related__author', 'related__category')
+        .order_by('rank')[:limit]
+    )
+    return [row.related for row in rows]
@@ -0,0 +1,102 @@
+"""
+Unique slug allocation shared by Tip and Category.
+
+Each (model, base slug) pair has a SlugSequence row holding the last suffix
+handed out, so the next slug costs one UPDATE ... SET last = last + 1 and
+one read, however many tips share a title: "reduce-plastic",
+"reduce-plastic-1", "reduce-plastic-2", ... The first allocation for a base
+seeds its row from the slugs already in the table with one prefix query.
+
+Concurrent saves always get different suffixes from the row update. A slug
+can still clash with one stored behind the sequence's back (set by hand in
+the admin, or by bulk_create), so `save_with_slug()` saves inside a
+savepoint and, when the unique constraint rejects the slug, moves the
+sequence past the suffixes in the table and takes the next one.
+"""
+
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 5
+
+# Room left in the slug field for "-<suffix>"
+SUFFIX_LENGTH = 10
+
+
+def base_slug(model, text, fallback):
+    max_length = model._meta.get_field('slug').max_length
+    return slugify(text)[:max_length - SUFFIX_LENGTH].strip('-') or fallback
+
+
+def _existing_suffix(model, base):
+    # Highest suffix already used for the base (0 for the bare base, None when unused)
+    pattern = re.compile(rf'^{re.escape(base)}(?:-(\d+))?$')
+
+    suffixes = []
+    for slug in model.objects.filter(slug__startswith=base).values_list('slug', flat=True):
+        match = pattern.match(slug)
+        if match:
+            suffixes.append(int(match.group(1) or 0))
+    return max(suffixes, default=None)
+
+
+def _suffixed(base, number):
+    return base if number == 0 else f'{base}-{number}'
+
+
+def allocate(model, text, fallback):
+    """
+    Reserving the next free slug for `text` on `model`.
+
+    Suffixes are never handed out twice, even when the tip that used one
+    is deleted.
+    """
+    from .models import SlugSequence
+
+    scope = model._meta.label_lower
+    base = base_slug(model, text, fallback)
+    sequence = SlugSequence.objects.filter(scope=scope, base=base)
+
+    with transaction.atomic():
+        if not sequence.update(last=F('last') + 1):
+            existing = _existing_suffix(model, base)
+            try:
+                with transaction.atomic():
+                    SlugSequence.objects.create(scope=scope, base=base, last=0 if existing is None else existing + 1)
+            except IntegrityError:
+                # Another save seeded the row first
+                sequence.update(last=F('last') + 1)
+
+        return _suffixed(base, sequence.values_list('last', flat=True).get())
+
+
+def resync(model, text, fallback):
+    # Moving a sequence past suffixes stored without it
+    from .models import SlugSequence
+
+    base = base_slug(model, text, fallback)
+    existing = _existing_suffix(model, base)
+    if existing is not None:
+        SlugSequence.objects.filter(scope=model._meta.label_lower, base=base).update(last=Greatest(F('last'), existing))
+
+
+def save_with_slug(instance, text, fallback, save, *args, **kwargs):
+    # Saving a new instance under a fresh slug, moving to the next suffix on a clash
+    model = type(instance)
+
+    for attempt in range(MAX_ATTEMPTS):
+        instance.slug = allocate(model, text, fallback)
+        try:
+            with transaction.atomic():
+                save(*args, **kwargs)
+            return
+        except IntegrityError:
+            clashed = model.objects.filter(slug=instance.slug).exclude(pk=instance.pk).exists()
+            instance.slug = ''
+            if not clashed or attempt == MAX_ATTEMPTS - 1:
+                raise
+            resync(model, text, fallback)
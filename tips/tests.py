@@ -1,3 +1,955 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.activity import PendingActivity, activity_buffer
+from accounts.models import Follow, UserActivity
+from core.stats import get_stats
+
+from . import community, counters, feed, hll, interactions, listing, recommender, search, similarity, slugs, trending, view_stats, views
+from .pagination import CursorPaginator
+from .models import Tip, Category, Like, Comment, Bookmark, FollowSuggestion, SlugSequence, TimelineEntry, TipViewStats
+
+
+class TipSearchTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', password='pass12345')
+        self.category = Category.objects.create(name='Recycling', is_approved=True)
+
+    def make_tip(self, title, content='', category=None):
+        return Tip.objects.create(author=self.user, title=title, content=content, category=category)
+
+    def search_titles(self, text, rank=False):
+        tips = search.filter_tips(Tip.objects.all(), text, rank=rank)
+        if rank:
+            tips = tips.order_by('search_rank')
+        return [tip.title for tip in tips]
+
+    def test_prefix_matching(self):
+        self.make_tip('Composting at home', 'Turn scraps into soil.')
+        self.make_tip('Solar panels', 'Cheap energy.')
+
+        self.assertEqual(self.search_titles('compo'), ['Composting at home'])
+
+    def test_all_terms_must_match(self):
+        self.make_tip('Cold laundry', 'Wash clothes in cold water.')
+        self.make_tip('Cold showers', 'Save hot water.')
+
+        self.assertEqual(self.search_titles('cold clothes'), ['Cold laundry'])
+
+    def test_title_matches_rank_first(self):
+        self.make_tip('Bike to work', 'Cycling keeps you fit, and a bamboo bike is even better.')
+        self.make_tip('Bamboo toothbrush', 'Swap plastic brushes.')
+
+        self.assertEqual(self.search_titles('bamboo', rank=True)[0], 'Bamboo toothbrush')
+
+    def test_index_follows_edits_and_deletes(self):
+        tip = self.make_tip('Glass jars', 'Reuse them for storage.')
+        tip.title = 'Mason jars'
+        tip.save()
+
+        self.assertEqual(self.search_titles('glass'), [])
+        self.assertEqual(self.search_titles('mason'), ['Mason jars'])
+
+        tip.delete()
+        self.assertEqual(self.search_titles('mason'), [])
+
+    def test_category_rename_is_searchable(self):
+        self.make_tip('Sort your bins', 'Paper and glass apart.', category=self.category)
+        self.category.name = 'Upcycling'
+        self.category.save()
+
+        self.assertEqual(self.search_titles('upcycling'), ['Sort your bins'])
+
+    def test_rebuild(self):
+        self.make_tip('Refill stations', 'Bring your own bottle.')
+
+        self.assertEqual(search.rebuild(), 1)
+        self.assertEqual(self.search_titles('refill'), ['Refill stations'])
+
+    def test_failed_rebuild_keeps_the_old_index(self):
+        self.make_tip('Refill stations', 'Bring your own bottle.')
+
+        with mock.patch.object(search, '_index_rows', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                search.rebuild()
+
+        self.assertEqual(self.search_titles('refill'), ['Refill stations'])
+
+    def test_missing_index_is_remembered(self):
+        self.addCleanup(search.reset_availability)
+        search.reset_availability()
+
+        with mock.patch.object(search, 'INDEX_TABLE', 'missing_fts'):
+            self.assertFalse(search.is_available())
+            with self.assertNumQueries(0):
+                self.assertFalse(search.is_available())
+
+            search.reset_availability()
+            with self.assertNumQueries(1):
+                search.is_available()
+
+    def test_list_view_relevance_sort(self):
+        self.make_tip('Rainwater barrels', 'Collect rain for the garden.')
+
+        response = self.client.get(reverse('tips:tip_list'), {'search': 'rain', 'sort_by': 'relevance'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Rainwater barrels')
+
+
+class ViewerStateTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='bob', password='pass12345')
+        self.author = get_user_model().objects.create_user(username='carol', password='pass12345')
+        self.category = Category.objects.create(name='Energy', is_approved=True)
+        self.tips = [
+            Tip.objects.create(author=self.author, title=f'Tip {i}', content='Save energy.', category=self.category)
+            for i in range(3)
+        ]
+
+    def test_annotations(self):
+        Like.objects.create(user=self.user, tip=self.tips[0])
+        Bookmark.objects.create(user=self.user, tip=self.tips[1])
+
+        tips = {tip.pk: tip for tip in Tip.objects.with_viewer_state(self.user)}
+
+        self.assertTrue(tips[self.tips[0].pk].is_liked)
+        self.assertFalse(tips[self.tips[0].pk].is_bookmarked)
+        self.assertTrue(tips[self.tips[1].pk].is_bookmarked)
+        self.assertFalse(tips[self.tips[2].pk].is_liked)
+
+    def test_anonymous_viewer(self):
+        tip = Tip.objects.with_viewer_state(AnonymousUser()).first()
+
+        self.assertFalse(tip.is_liked)
+        self.assertFalse(tip.is_bookmarked)
+
+    def test_listing_queries_do_not_grow_with_page_size(self):
+        self.client.force_login(self.user)
+        Tip.objects.create(author=self.user, title='Own tip', content='Mine.', category=self.category)
+        for tip in self.tips:
+            Bookmark.objects.create(user=self.user, tip=tip)
+        # Storing the site totals, so neither request recounts them
+        get_stats()
+
+        for name in ['tips:tip_list', 'tips:saved_tips', 'tips:my_tips']:
+            # Starting both requests from a cold cache
+            cache.clear()
+            with CaptureQueriesContext(connection) as small:
+                self.client.get(reverse(name))
+
+            extra = [
+                Tip.objects.create(author=self.user, title=f'Extra {i}', content='More.', category=self.category)
+                for i in range(3)
+            ]
+            for tip in extra:
+                Bookmark.objects.create(user=self.user, tip=tip)
+
+            cache.clear()
+            with CaptureQueriesContext(connection) as large:
+                self.client.get(reverse(name))
+
+            self.assertEqual(len(small), len(large), name)
+            Tip.objects.filter(pk__in=[tip.pk for tip in extra]).delete()
+
+    def test_saved_tips_lists_bookmarked_tips(self):
+        self.client.force_login(self.user)
+        Bookmark.objects.create(user=self.user, tip=self.tips[2])
+
+        response = self.client.get(reverse('tips:saved_tips'))
+
+        self.assertEqual([tip.pk for tip in response.context['page_obj']], [self.tips[2].pk])
+
+
+class CursorPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='dave', password='pass12345')
+        self.category = Category.objects.create(name='Transport', is_approved=True)
+        self.tips = [
+            Tip.objects.create(author=self.user, title=f'Tip {i}', content='Walk more.', category=self.category)
+            for i in range(7)
+        ]
+
+    def walk(self, ordering):
+        paginator = CursorPaginator(Tip.objects.all(), ordering, 3)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        return paginator, pages
+
+    def test_forward_pages_cover_everything_once(self):
+        _, pages = self.walk(('-created_at', '-id'))
+
+        ids = [tip.pk for page in pages for tip in page]
+        self.assertEqual(ids, [tip.pk for tip in reversed(self.tips)])
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous())
+
+    def test_previous_cursor_returns_previous_page(self):
+        paginator, pages = self.walk(('-likes_count', '-created_at', '-id'))
+
+        previous = paginator.get_page(pages[2].previous_cursor)
+
+        self.assertEqual([tip.pk for tip in previous], [tip.pk for tip in pages[1]])
+        self.assertTrue(previous.has_next())
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        paginator = CursorPaginator(Tip.objects.all(), ('-created_at', '-id'), 3)
+
+        page = paginator.get_page('not-a-cursor')
+
+        self.assertEqual([tip.pk for tip in page], [tip.pk for tip in reversed(self.tips)][:3])
+
+    def test_tip_list_fragment_for_infinite_scroll(self):
+        for i in range(10):
+            Tip.objects.create(author=self.user, title=f'More {i}', content='Walk more.')
+
+        response = self.client.get(reverse('tips:tip_list'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        next_page = response['X-Next-Page']
+        response = self.client.get(reverse('tips:tip_list') + next_page, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        self.assertTrue(next_page.startswith('?cursor='))
+        self.assertEqual(len(response.context['page_obj']), 5)
+        self.assertEqual(response['X-Next-Page'], '')
+
+    def test_saved_tips_second_page(self):
+        self.client.force_login(self.user)
+        for tip in self.tips:
+            Bookmark.objects.create(user=self.user, tip=tip)
+        for i in range(8):
+            Bookmark.objects.create(
+                user=self.user,
+                tip=Tip.objects.create(author=self.user, title=f'Saved {i}', content='x', category=self.category)
+            )
+
+        first = self.client.get(reverse('tips:saved_tips')).context['page_obj']
+        second = self.client.get(reverse('tips:saved_tips') + '?' + first.next_query).context['page_obj']
+
+        self.assertEqual(len(first) + len(second), 15)
+        self.assertFalse({tip.pk for tip in first} & {tip.pk for tip in second})
+
+
+class TipCounterTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='erin', password='pass12345')
+        self.fan = User.objects.create_user(username='frank', password='pass12345')
+        self.tip = Tip.objects.create(author=self.author, title='Line dry clothes', content='Skip the dryer.')
+
+    def counts(self):
+        self.tip.refresh_from_db()
+        return self.tip.likes_count, self.tip.comments_count, self.tip.bookmarks_count
+
+    def test_counters_follow_creates_and_deletes(self):
+        like = Like.objects.create(user=self.fan, tip=self.tip)
+        Comment.objects.create(author=self.fan, tip=self.tip, content='Nice')
+        Bookmark.objects.create(user=self.fan, tip=self.tip)
+        self.assertEqual(self.counts(), (1, 1, 1))
+
+        like.delete()
+        self.assertEqual(self.counts(), (0, 1, 1))
+
+    def test_cascade_delete_of_user_updates_counters(self):
+        Like.objects.create(user=self.fan, tip=self.tip)
+        Comment.objects.create(author=self.fan, tip=self.tip, content='Nice')
+
+        self.fan.delete()
+
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_toggle_like_returns_counter(self):
+        self.client.force_login(self.fan)
+
+        response = self.client.post(reverse('tips:toggle_like', kwargs={'slug': self.tip.slug}))
+        self.assertEqual(response.json(), {'liked': True, 'likes_count': 1})
+
+        response = self.client.post(reverse('tips:toggle_like', kwargs={'slug': self.tip.slug}))
+        self.assertEqual(response.json(), {'liked': False, 'likes_count': 0})
+
+    def test_reconcile_repairs_drift(self):
+        Like.objects.create(user=self.fan, tip=self.tip)
+        Tip.objects.filter(pk=self.tip.pk).update(likes_count=7, comments_count=3)
+
+        self.assertEqual(counters.reconcile(Tip.objects.all()), 1)
+        self.assertEqual(self.counts(), (1, 0, 0))
+        self.assertEqual(counters.reconcile(Tip.objects.all()), 0)
+
+
+class ListingCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='gina', password='pass12345')
+        self.tips = [
+            Tip.objects.create(author=self.user, title=f'Tip {i}', content='Buy local.')
+            for i in range(3)
+        ]
+        self.filters = listing.normalize_filters({})
+
+    def test_normalized_filters_share_a_cache_entry(self):
+        self.assertEqual(
+            listing.normalize_filters({'search': '  Buy   LOCAL ', 'sort_by': 'bogus'}),
+            listing.normalize_filters({'search': 'buy local'}),
+        )
+
+    # An in-memory cache, so only the hydration query is counted
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cache_hit_only_hydrates_visible_tips(self):
+        listing.get_page(self.filters, None, self.user)
+
+        with self.assertNumQueries(1):
+            page = listing.get_page(self.filters, None, self.user)
+
+        self.assertEqual([tip.pk for tip in page], [tip.pk for tip in reversed(self.tips)])
+
+    def test_writes_invalidate_cached_pages(self):
+        listing.get_page(self.filters, None, self.user)
+        tip = Tip.objects.create(author=self.user, title='Fresh tip', content='New.')
+
+        page = listing.get_page(self.filters, None, self.user)
+        self.assertEqual(page[0].pk, tip.pk)
+
+        generation = listing.get_generation()
+        Like.objects.create(user=self.user, tip=tip)
+        self.assertNotEqual(listing.get_generation(), generation)
+
+
+class TrendingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username='ivan', password='pass12345')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='pass12345') for i in range(3)]
+        self.old = Tip.objects.create(author=self.author, title='Old favourite', content='Evergreen.')
+        self.fresh = Tip.objects.create(author=self.author, title='Fresh idea', content='New.')
+        Tip.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=20))
+
+    def test_recent_engagement_beats_old_totals(self):
+        for fan in self.fans:
+            Like.objects.create(user=fan, tip=self.old)
+        Like.objects.filter(tip=self.old).update(created_at=timezone.now() - timedelta(days=15))
+        Like.objects.create(user=self.fans[0], tip=self.fresh)
+
+        self.assertEqual(trending.recompute(), 1)
+
+        page = listing.get_page(listing.normalize_filters({'sort_by': 'trending'}), None, self.author)
+        self.assertEqual([tip.pk for tip in page], [self.fresh.pk, self.old.pk])
+
+    def test_scores_fall_back_to_zero_outside_the_window(self):
+        Comment.objects.create(author=self.fans[0], tip=self.fresh, content='Great')
+        trending.recompute()
+        self.fresh.refresh_from_db()
+        self.assertGreater(self.fresh.trending_score, 0)
+
+        trending.recompute(now=timezone.now() + timedelta(days=8))
+
+        self.fresh.refresh_from_db()
+        self.assertEqual(self.fresh.trending_score, 0)
+
+    def test_command_refreshes_cached_trending_pages(self):
+        filters = listing.normalize_filters({'sort_by': 'trending'})
+        listing.get_page(filters, None, self.author)
+        Like.objects.create(user=self.fans[0], tip=self.old)
+        # Keeping the Like's own invalidation out of the picture
+        listing.get_page(filters, None, self.author)
+
+        call_command('update_trending_scores', stdout=io.StringIO())
+
+        page = listing.get_page(filters, None, self.author)
+        self.assertEqual([tip.pk for tip in page], [self.old.pk, self.fresh.pk])
+
+
+class RelatedTipTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='jane', password='pass12345')
+        category = Category.objects.create(name='Home', is_approved=True)
+        self.compost = self.make_tip('Compost kitchen scraps', 'Compost peels in a bin.', category)
+        self.worms = self.make_tip('Worm compost bin', 'Worms turn scraps into soil.', category)
+        self.solar = self.make_tip('Solar chargers', 'Charge phones with sunlight.', category)
+
+    def make_tip(self, title, content, category):
+        return Tip.objects.create(author=self.user, title=title, content=content, category=category)
+
+    def test_neighbours_share_terms(self):
+        self.assertEqual(similarity.refresh(), 3)
+
+        self.assertEqual(similarity.related_tips(self.compost), [self.worms])
+        self.assertEqual(similarity.related_tips(self.solar), [])
+
+    def test_edit_is_picked_up_incrementally(self):
+        similarity.refresh()
+        self.solar.title = 'Solar compost heater'
+        self.solar.save()
+
+        self.assertEqual(similarity.stale_tip_ids(), {self.solar.pk})
+        similarity.refresh(similarity.stale_tip_ids())
+
+        self.assertIn(self.solar, similarity.related_tips(self.compost))
+        self.assertIn(self.compost, similarity.related_tips(self.solar))
+
+    def test_saves_without_text_changes_keep_neighbours(self):
+        similarity.refresh()
+        tip = Tip.objects.get(pk=self.compost.pk)
+        tip.category = Category.objects.create(name='Garden', is_approved=True)
+        tip.save()
+
+        self.assertEqual(similarity.stale_tip_ids(), set())
+        self.assertEqual(similarity.related_tips(self.compost), [self.worms])
+
+    def test_tip_without_neighbours_is_not_stale(self):
+        similarity.refresh()
+
+        self.assertEqual(similarity.related_tips(self.solar), [])
+        self.assertEqual(similarity.stale_tip_ids(), set())
+
+    def test_detail_page_shows_related_tips(self):
+        similarity.refresh()
+
+        response = self.client.get(self.compost.get_absolute_url())
+
+        self.assertEqual(response.context['related_tips'], [self.worms])
+        self.assertContains(response, 'Worm compost bin')
+
+
+class FollowingFeedTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.reader = User.objects.create_user(username='kim', password='pass12345')
+        self.author = User.objects.create_user(username='lee', password='pass12345')
+        self.star = User.objects.create_user(username='max', password='pass12345')
+        self.category = Category.objects.create(name='Garden', is_approved=True)
+
+    def make_tip(self, author, title, **kwargs):
+        return Tip.objects.create(author=author, title=title, content='Grow food.', category=self.category, **kwargs)
+
+    def feed_ids(self, cursor=None, per_page=12):
+        page = feed.get_page(self.reader, cursor, per_page=per_page)
+        return [tip.pk for tip in page], page
+
+    def test_publish_fans_out_to_followers(self):
+        self.reader.follow(self.author)
+        tip = self.make_tip(self.author, 'Grow herbs')
+
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, tip=tip).exists())
+        self.assertEqual(self.feed_ids()[0], [tip.pk])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        tip = self.make_tip(self.author, 'Grow herbs')
+        self.make_tip(self.author, 'Draft', is_published=False)
+
+        self.reader.follow(self.author)
+        self.assertEqual(self.feed_ids()[0], [tip.pk])
+
+        self.reader.unfollow(self.author)
+        self.assertEqual(self.feed_ids()[0], [])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader).exists())
+
+    @override_settings(FEED_FANOUT_LIMIT=3)
+    def test_popular_authors_are_merged_at_read_time(self):
+        get_user_model().objects.filter(pk=self.star.pk).update(followers_count=5)
+        self.star.refresh_from_db()
+        self.reader.follow(self.author)
+        self.reader.follow(self.star)
+        tips = [self.make_tip(self.star if i % 2 else self.author, f'Tip {i}') for i in range(8)]
+
+        self.assertFalse(TimelineEntry.objects.filter(author=self.star).exists())
+
+        ids, page = self.feed_ids(per_page=3)
+        while page.has_next():
+            more, page = self.feed_ids(page.next_cursor, per_page=3)
+            ids += more
+
+        self.assertEqual(ids, [tip.pk for tip in reversed(tips)])
+
+    def test_unpublishing_retracts_the_tip(self):
+        self.reader.follow(self.author)
+        tip = self.make_tip(self.author, 'Grow herbs')
+
+        tip.is_published = False
+        tip.save()
+
+        self.assertEqual(self.feed_ids()[0], [])
+
+        tip.is_published = True
+        tip.save()
+        self.assertEqual(len(self.feed_ids()[0]), 1)
+
+    def test_plain_edits_do_not_touch_timelines(self):
+        self.reader.follow(self.author)
+        tip = self.make_tip(self.author, 'Grow herbs')
+
+        tip.content = 'On the windowsill.'
+        with CaptureQueriesContext(connection) as queries:
+            tip.save()
+
+        self.assertFalse([query for query in queries if 'tips_timelineentry' in query['sql']])
+
+    def test_feed_view(self):
+        self.reader.follow(self.author)
+        self.make_tip(self.author, 'Grow herbs')
+        self.client.force_login(self.reader)
+
+        response = self.client.get(reverse('tips:feed'))
+
+        self.assertContains(response, 'Grow herbs')
+
+
+class TipListApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='nora', password='pass12345')
+        self.tip = Tip.objects.create(author=self.user, title='Reusable cups', content='Bring your own cup.')
+        self.url = reverse('tips:tip_list_api')
+
+    def test_sparse_fields(self):
+        response = self.client.get(self.url, {'fields': 'id,title,likes_count'})
+
+        self.assertEqual(response.json()['results'], [{'id': self.tip.pk, 'title': 'Reusable cups', 'likes_count': 0}])
+        self.assertEqual(response['Vary'], 'Cookie')
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(self.url, {'fields': 'title,password'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_matching_etag_skips_the_tip_tables(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([query for query in queries if 'tips_' in query['sql']])
+
+    def test_viewer_writes_change_the_etag(self):
+        self.client.force_login(self.user)
+        etag = self.client.get(self.url)['ETag']
+
+        Bookmark.objects.create(user=self.user, tip=self.tip)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['results'][0]['is_bookmarked'])
+
+    def test_generation_bumped_by_another_process_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # A separate connection to the same cache, like a second worker
+        other = caches.create_connection('default')
+        other.incr(listing.GENERATION_KEY)
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_no_etag_without_a_shared_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class CommentPaginationTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='olga', password='pass12345', first_name='Olga', last_name='Berg')
+        self.reader = User.objects.create_user(username='pete', password='pass12345')
+        category = Category.objects.create(name='Water', is_approved=True)
+        self.tip = Tip.objects.create(author=self.author, title='Shorter showers', content='Five minutes.', category=category)
+
+    def test_display_name_is_computed_in_sql(self):
+        Comment.objects.create(tip=self.tip, author=self.author, content='Agreed')
+        Comment.objects.create(tip=self.tip, author=self.reader, content='Trying it')
+
+        names = list(Comment.objects.with_author_display_name().order_by('id').values_list('author_display_name', flat=True))
+
+        self.assertEqual(names, ['Olga Berg', 'pete'])
+
+    def test_detail_page_is_bounded_and_rest_is_loaded_in_chunks(self):
+        for i in range(45):
+            Comment.objects.create(tip=self.tip, author=self.reader, content=f'Comment {i}')
+
+        response = self.client.get(self.tip.get_absolute_url())
+        comments = response.context['comments']
+        self.assertEqual(len(comments), views.COMMENTS_PER_PAGE)
+
+        seen = [comment.pk for comment in comments]
+        next_url = reverse('tips:tip_comments', kwargs={'slug': self.tip.slug}) + '?' + comments.next_query
+        while next_url:
+            response = self.client.get(next_url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            seen += [comment.pk for comment in response.context['comments']]
+            next_url = response['X-Next-Page']
+
+        self.assertEqual(seen, list(Comment.objects.order_by('-created_at', '-id').values_list('pk', flat=True)))
+
+
+class TipDetailConditionalGetTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='quinn', password='pass12345')
+        self.fan = User.objects.create_user(username='rosa', password='pass12345')
+        category = Category.objects.create(name='Food', is_approved=True)
+        self.tip = Tip.objects.create(author=self.author, title='Meal planning', content='Less waste.', category=category)
+        self.url = self.tip.get_absolute_url()
+
+    def test_unchanged_page_is_answered_with_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # Calling the view directly so only its own queries are counted (no session middleware)
+        request = RequestFactory().get(self.url, HTTP_IF_NONE_MATCH=etag)
+        request.user = AnonymousUser()
+
+        with mock.patch.object(UserActivity, 'log_activity') as log_activity:
+            with self.assertNumQueries(1):
+                response = views.tip_detail_view(request, slug=self.tip.slug)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        log_activity.assert_called_once_with(request, tip_id=self.tip.pk)
+
+    def test_logged_in_304_skips_comments_and_related_tips(self):
+        self.client.force_login(self.fan)
+        etag = self.client.get(self.url)['ETag']
+
+        with mock.patch.object(UserActivity, 'log_activity'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([query for query in queries if 'tips_comment' in query['sql'] or 'tips_relatedtip' in query['sql']])
+
+    def test_engagement_changes_the_validator(self):
+        response = self.client.get(self.url)
+
+        Like.objects.create(user=self.fan, tip=self.tip)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+        # Last-Modified only has second precision
+        Tip.objects.filter(pk=self.tip.pk).update(last_engaged_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200)
+
+    def test_etag_depends_on_the_viewer(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_login(self.fan)
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TipViewStatsTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='tara', password='pass12345')
+        self.viewer = User.objects.create_user(username='uma', password='pass12345')
+        self.category = Category.objects.create(name='Travel', is_approved=True)
+        self.tip = Tip.objects.create(author=self.author, title='Take the train', content='Skip short flights.', category=self.category)
+        # Visits buffered by earlier tests would be written with these
+        activity_buffer.discard()
+
+    def test_sketch_estimates_are_close_and_bounded(self):
+        sketch = hll.HyperLogLog()
+        for i in range(20000):
+            sketch.add(f'visitor-{i}')
+            sketch.add(f'visitor-{i}')
+
+        self.assertEqual(len(sketch.to_bytes()), 1024)
+        self.assertAlmostEqual(sketch.count(), 20000, delta=20000 * 0.1)
+
+        other = hll.HyperLogLog()
+        for i in range(10000, 30000):
+            other.add(f'visitor-{i}')
+        self.assertAlmostEqual(sketch.merge(other).count(), 30000, delta=30000 * 0.1)
+
+    def test_detail_views_are_counted(self):
+        self.client.get(self.tip.get_absolute_url())
+        self.client.get(self.tip.get_absolute_url())
+        self.client.force_login(self.viewer)
+        self.client.get(self.tip.get_absolute_url())
+        activity_buffer.flush()
+
+        self.tip.refresh_from_db()
+        self.assertEqual(self.tip.views_count, 3)
+        self.assertEqual(TipViewStats.objects.get(tip=self.tip).views, 3)
+        self.assertEqual(view_stats.unique_visitors(self.tip), 2)
+
+        response = self.client.get(self.tip.get_absolute_url())
+        self.assertEqual(response.context['unique_visitors'], 2)
+
+    def test_unique_visitors_merge_days(self):
+        today = timezone.localdate()
+        for days_ago, visitors in [(0, ['a', 'b']), (1, ['b', 'c']), (40, ['d'])]:
+            sketch = hll.HyperLogLog()
+            for visitor in visitors:
+                sketch.add(visitor)
+            TipViewStats.objects.create(tip=self.tip, date=today - timedelta(days=days_ago), views=len(visitors), sketch=sketch.to_bytes())
+
+        self.assertEqual(view_stats.recent_unique_visitors(self.tip), 3)
+        self.assertEqual(view_stats.unique_visitors(self.tip), 4)
+
+    def test_rows_written_by_another_process_are_added_to(self):
+        today = timezone.localdate()
+        sketch = hll.HyperLogLog()
+        sketch.add(view_stats.visitor_key(None, 'other-worker'))
+        TipViewStats.objects.create(tip=self.tip, date=today, views=4, sketch=sketch.to_bytes())
+
+        activity = PendingActivity()
+        activity.add(self.tip.pk)
+        view_stats.record_views({(self.viewer.pk, None, today): activity})
+
+        stats = TipViewStats.objects.get(tip=self.tip, date=today)
+        self.assertEqual(stats.views, 5)
+        self.assertEqual(view_stats.unique_visitors(self.tip), 2)
+
+
+class InteractionTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='uma', password='pass12345')
+        self.fan = User.objects.create_user(username='victor', password='pass12345')
+        self.tip = Tip.objects.create(author=self.author, title='Reuse jars', content='Store leftovers.')
+        self.other = Tip.objects.create(author=self.author, title='Mend socks', content='Darn the holes.')
+
+    def post_batch(self, operations):
+        return self.client.post(
+            reverse('tips:interactions_batch'),
+            data={'operations': operations},
+            content_type='application/json',
+        )
+
+    def test_set_state_is_idempotent(self):
+        self.assertEqual(interactions.set_state(self.fan, self.tip, 'like', True), (True, 1))
+        self.assertEqual(interactions.set_state(self.fan, self.tip, 'like', True), (True, 1))
+        self.assertEqual(Like.objects.filter(tip=self.tip).count(), 1)
+
+        self.assertEqual(interactions.set_state(self.fan, self.tip, 'like', False), (False, 0))
+        self.assertEqual(interactions.set_state(self.fan, self.tip, 'like', False), (False, 0))
+
+    def test_duplicate_insert_keeps_counter(self):
+        # A concurrent request already stored the bookmark
+        Bookmark.objects.create(user=self.fan, tip=self.tip)
+
+        self.assertFalse(interactions._add(Bookmark, self.fan, self.tip))
+        self.tip.refresh_from_db()
+        self.assertEqual(self.tip.bookmarks_count, 1)
+
+    def test_toggle_bookmark_returns_counter(self):
+        self.client.force_login(self.fan)
+        url = reverse('tips:toggle_bookmark', kwargs={'slug': self.tip.slug})
+
+        self.assertEqual(self.client.post(url).json(), {'bookmarked': True, 'bookmarks_count': 1})
+        self.assertEqual(self.client.post(url).json(), {'bookmarked': False, 'bookmarks_count': 0})
+
+    def test_batch_applies_last_operation_per_tip(self):
+        self.client.force_login(self.fan)
+
+        response = self.post_batch([
+            {'tip': self.tip.slug, 'kind': 'like', 'active': True},
+            {'tip': self.other.slug, 'kind': 'bookmark', 'active': True},
+            {'tip': self.tip.slug, 'kind': 'like', 'active': False},
+            {'tip': self.tip.slug, 'kind': 'like', 'active': True},
+            {'tip': 'missing', 'kind': 'like', 'active': True},
+        ])
+
+        self.assertEqual(response.json(), {'results': [
+            {'tip': self.other.slug, 'kind': 'bookmark', 'active': True, 'count': 1},
+            {'tip': self.tip.slug, 'kind': 'like', 'active': True, 'count': 1},
+            {'tip': 'missing', 'kind': 'like', 'error': 'Tip not found'},
+        ]})
+        self.assertEqual(Like.objects.filter(user=self.fan).count(), 1)
+
+    def test_batch_rejects_malformed_payload(self):
+        self.client.force_login(self.fan)
+
+        self.assertEqual(self.post_batch([{'tip': self.tip.slug, 'kind': 'share', 'active': True}]).status_code, 400)
+        self.assertEqual(self.post_batch([{'tip': self.tip.slug, 'kind': 'like', 'active': 'yes'}]).status_code, 400)
+
+        operations = [{'tip': self.tip.slug, 'kind': 'like', 'active': True}] * (interactions.MAX_BATCH_OPERATIONS + 1)
+        self.assertEqual(self.post_batch(operations).status_code, 400)
+
+        response = self.client.post(reverse('tips:interactions_batch'), data='{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Like.objects.exists())
+
+
+class SlugAllocationTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='wendy', password='pass12345')
+
+    def make_tip(self, title='Reduce plastic', **kwargs):
+        return Tip.objects.create(author=self.user, title=title, content='Carry a bottle.', **kwargs)
+
+    def test_same_titles_get_increasing_suffixes(self):
+        slugs_made = [self.make_tip().slug for _ in range(3)]
+        self.assertEqual(slugs_made, ['reduce-plastic', 'reduce-plastic-1', 'reduce-plastic-2'])
+
+    def test_allocation_cost_does_not_grow_with_duplicates(self):
+        for _ in range(5):
+            self.make_tip()
+
+        with self.assertNumQueries(4):
+            self.assertEqual(slugs.allocate(Tip, 'Reduce plastic', 'tip'), 'reduce-plastic-5')
+
+    def test_sequence_is_seeded_from_existing_slugs(self):
+        Tip.objects.bulk_create([
+            Tip(author=self.user, title='Reduce plastic', slug=slug, content='Old')
+            for slug in ['reduce-plastic', 'reduce-plastic-7', 'reduce-plastic-bags']
+        ])
+
+        self.assertEqual(self.make_tip().slug, 'reduce-plastic-8')
+
+    def test_clash_with_slug_stored_behind_the_sequence_is_retried(self):
+        self.make_tip()
+        self.make_tip(slug='reduce-plastic-1')
+        Tip.objects.bulk_create([Tip(author=self.user, title='Reduce plastic', slug='reduce-plastic-2', content='Old')])
+
+        self.assertEqual(self.make_tip().slug, 'reduce-plastic-3')
+        self.assertEqual(SlugSequence.objects.get(scope='tips.tip', base='reduce-plastic').last, 3)
+
+    def test_categories_are_deduplicated(self):
+        first = Category.objects.create(name='Zero Waste')
+        second = Category.objects.create(name='Zero-waste')
+        self.assertEqual((first.slug, second.slug), ('zero-waste', 'zero-waste-1'))
+
+    def test_empty_slug_falls_back(self):
+        self.assertEqual(self.make_tip(title='!!!').slug, 'tip')
+
+
+class CommunityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.viewer = User.objects.create_user(username='maya', password='pass12345', eco_interests='Composting, Cycling')
+        self.star = User.objects.create_user(username='nico', password='pass12345', impact_score=40)
+        self.cyclist = User.objects.create_user(username='olga', password='pass12345', impact_score=10, eco_interests='cycling')
+        self.quiet = User.objects.create_user(username='pete', password='pass12345', impact_score=12)
+        self.friend = User.objects.create_user(username='quinn', password='pass12345', impact_score=90)
+        User.objects.create_user(username='gone', password='pass12345', impact_score=99, is_active=False)
+        Follow.objects.create(follower=self.viewer, following=self.friend)
+        community.recompute()
+
+    def test_score_decays_with_inactivity(self):
+        now = timezone.now()
+        self.assertEqual(community.score(9, now, now), 10)
+        self.assertAlmostEqual(community.score(9, now - timedelta(days=14), now), 5)
+
+    def test_suggestions_rank_score_and_shared_interests(self):
+        ids = community.suggestion_ids(self.viewer)
+
+        # The shared interest lifts olga over pete; followed and inactive users are left out
+        self.assertEqual(ids, [self.star.pk, self.cyclist.pk, self.quiet.pk])
+
+    def test_follow_drops_user_from_cached_suggestions(self):
+        community.suggestion_ids(self.viewer)
+        Follow.objects.create(follower=self.viewer, following=self.star)
+
+        self.assertNotIn(self.star.pk, community.suggestion_ids(self.viewer))
+
+    def test_page_cost_does_not_grow_with_users(self):
+        self.client.force_login(self.viewer)
+        url = reverse('tips:community')
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as before:
+            response = self.client.get(url)
+
+        User = get_user_model()
+        User.objects.bulk_create([User(username=f'member{i}') for i in range(30)])
+        community.recompute()
+        community.invalidate(self.viewer.pk)
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url)
+
+        self.assertEqual(len(after), len(before))
+        self.assertEqual(len(response.context['suggested_users']), views.PEOPLE_PER_PAGE)
+        self.assertEqual([user.username for user in response.context['following_users']], ['quinn'])
+        self.assertTrue(response.context['following_users'][0].is_following)
+        self.assertEqual(response.context['following_users'][0].followers_total, 1)
+
+
+class FollowSuggestionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.viewer = User.objects.create_user(username='rosa', password='pass12345', eco_interests='solar')
+        self.friend = User.objects.create_user(username='sam', password='pass12345')
+        self.other = User.objects.create_user(username='tara', password='pass12345')
+        self.mutual = User.objects.create_user(username='uma', password='pass12345')
+        self.liker = User.objects.create_user(username='vic', password='pass12345', eco_interests='Solar')
+        self.stranger = User.objects.create_user(username='will', password='pass12345', impact_score=50)
+
+        for friend in (self.friend, self.other):
+            Follow.objects.create(follower=self.viewer, following=friend)
+            Follow.objects.create(follower=friend, following=self.mutual)
+        Follow.objects.create(follower=self.friend, following=self.other)
+
+        tip = Tip.objects.create(author=self.friend, title='Solar panels', content='Text')
+        Like.objects.create(user=self.viewer, tip=tip)
+        Like.objects.create(user=self.liker, tip=tip)
+        community.recompute()
+
+    def test_recompute_ranks_friends_of_friends_and_co_likers(self):
+        recommender.recompute()
+
+        rows = list(FollowSuggestion.objects.filter(user=self.viewer).values_list('suggested__username', 'mutual_follows', 'score'))
+        # Two mutual follows outweigh one co-like plus a shared interest; followed users are left out
+        self.assertEqual(rows, [
+            ('uma', 2, 2 * recommender.MUTUAL_WEIGHT),
+            ('vic', 0, recommender.CO_LIKE_WEIGHT + recommender.INTEREST_WEIGHT),
+        ])
+
+    def test_recompute_replaces_previous_rows(self):
+        recommender.recompute()
+        Follow.objects.create(follower=self.viewer, following=self.mutual)
+        recommender.recompute()
+
+        self.assertEqual(list(FollowSuggestion.objects.filter(user=self.viewer).values_list('suggested_id', flat=True)), [self.liker.pk])
+
+    def test_popular_tips_are_skipped(self):
+        with mock.patch.object(recommender, 'MAX_TIP_LIKERS', 1):
+            recommender.recompute()
+
+        self.assertFalse(FollowSuggestion.objects.filter(user=self.viewer, suggested=self.liker).exists())
+
+    def test_precomputed_suggestions_lead_the_community_list(self):
+        recommender.recompute()
+        ids = community.suggestion_ids(self.viewer)
+
+        self.assertEqual(ids[:3], [self.mutual.pk, self.liker.pk, self.stranger.pk])
+
+        # Following someone hides them without waiting for the next run
+        Follow.objects.create(follower=self.viewer, following=self.mutual)
+        self.assertNotIn(self.mutual.pk, community.suggestion_ids(self.viewer))
+
+    def test_csr_neighbours(self):
+        graph = recommender.CSR(3, [(0, 1), (0, 2), (2, 0)])
+
+        self.assertEqual(list(graph.neighbours(0)), [1, 2])
+        self.assertEqual(list(graph.neighbours(1)), [])
+        self.assertEqual(graph.degree(2), 1)
+        self.assertEqual(graph.edges, 3)
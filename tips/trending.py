@@ -0,0 +1,115 @@
+"""
+Time-decayed "trending" score stored on Tip.trending_score.
+
+The score follows the Hacker News ranking formula:
+
+    points / (age_in_hours + 2) ** gravity
+
+where points is the weighted engagement (likes, comments, bookmarks and
+page views) a tip received during the last TRENDING_WINDOW_DAYS.
+`recompute()` only touches tips that had engagement in the window or still
+carry a score, so a run costs a few grouped counts over indexed date
+columns plus one UPDATE per changed tip; the trending listing itself is a
+plain index scan.
+
+`recompute()` runs from `python manage.py update_trending_scores`, outside
+the web workers, and reaches their cached listings by bumping the listing
+generation in the shared cache (core.W001 warns when the cache is not
+shared).
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from . import listing
+from .models import Tip, Like, Comment, Bookmark, TipViewStats
+
+# Points per engagement row
+WEIGHTS = (
+    (Like, 1.0),
+    (Comment, 3.0),
+    (Bookmark, 2.0),
+)
+
+# Points per page view (from the daily TipViewStats rows)
+VIEW_WEIGHT = 0.1
+
+
+def _window():
+    return timedelta(days=getattr(settings, 'TRENDING_WINDOW_DAYS', 7))
+
+
+def score(points, created_at, now):
+    # Decaying points by the age of the tip
+    if points <= 0:
+        return 0.0
+
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    return points / (age_hours + 2) ** getattr(settings, 'TRENDING_GRAVITY', 1.8)
+
+
+def recent_points(since):
+    # Weighted engagement per tip since the given moment
+    points = defaultdict(float)
+
+    for model, weight in WEIGHTS:
+        rows = (
+            model.objects.filter(created_at__gte=since)
+            .order_by()
+            .values_list('tip')
+            .annotate(total=Count('pk'))
+        )
+        for tip_id, total in rows:
+            points[tip_id] += weight * total
+
+    views = (
+        TipViewStats.objects.filter(date__gte=timezone.localdate(since))
+        .order_by()
+        .values_list('tip')
+        .annotate(total=Sum('views'))
+    )
+    for tip_id, total in views:
+        points[tip_id] += VIEW_WEIGHT * total
+
+    return points
+
+
+def recompute(now=None, batch_size=500):
+    """
+    Refreshing trending scores for every tip that has one or should have one.
+
+    Returns the number of tips whose score changed.
+    """
+    now = now or timezone.now()
+    points = recent_points(now - _window())
+
+    # Tips without recent engagement drop back to zero
+    tip_ids = set(points) | set(Tip.objects.filter(trending_score__gt=0).values_list('pk', flat=True))
+    tip_ids = sorted(tip_ids)
+
+    changed = 0
+    for start in range(0, len(tip_ids), batch_size):
+        batch = Tip.objects.filter(pk__in=tip_ids[start:start + batch_size]).only('created_at', 'trending_score')
+
+        updated = []
+        for tip in batch:
+            new_score = score(points.get(tip.pk, 0), tip.created_at, now)
+            if new_score != tip.trending_score:
+                tip.trending_score = new_score
+                updated.append(tip)
+
+        if updated:
+            with transaction.atomic():
+                Tip.objects.bulk_update(updated, ['trending_score'])
+            changed += len(updated)
+
+    # bulk_update skips signals, so invalidating cached listings here
+    if changed:
+        listing.bump_generation()
+
+    return changed
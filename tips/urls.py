@@ -8,6 +8,7 @@ urlpatterns = [
     # LIST & BROWSE
     # ============================================
     path('', views.tip_list_view, name='tip_list'),
+    path('api/tips/', views.tip_list_api_view, name='tip_list_api'),
     
     
     # ============================================
@@ -21,9 +22,11 @@ urlpatterns = [
     # ============================================
     # INTERACTIONS
     # ============================================
+    path('interactions/', views.interactions_batch_view, name='interactions_batch'),
     path('<slug:slug>/like/', views.toggle_like_view, name='toggle_like'),
     path('<slug:slug>/bookmark/', views.toggle_bookmark_view, name='toggle_bookmark'),
     path('comments/<int:comment_id>/delete/', views.delete_comment_view, name='delete_comment'),
+    path('<slug:slug>/comments/', views.tip_comments_view, name='tip_comments'),
     
     
     # ============================================
@@ -31,6 +34,7 @@ urlpatterns = [
     # ============================================
     path('my-tips/', views.my_tips_view, name='my_tips'),
     path('saved/', views.saved_tips_view, name='saved_tips'),
+    path('feed/', views.feed_view, name='feed'),
     path('community/', views.community_view, name='community'),
     path('follow/<str:username>/', views.toggle_follow_view, name='toggle_follow'),
     
@@ -0,0 +1,99 @@
+"""
+Per-tip page views and approximate unique visitors.
+
+Views are taken from the buffered activity log: when accounts/activity.py
+flushes a batch, `record_views()` adds the views to Tip.views_count and to
+one TipViewStats row per tip and day, whose HyperLogLog sketch (1 KB, see
+tips/hll.py) collects the visitors. Unique visitors over any date range are
+estimated by merging the daily sketches.
+
+`record_views()` runs inside the activity flush transaction of whichever
+process flushes, so it never overwrites a row read earlier: missing rows
+are inserted with conflicts ignored, and the stored views and registers
+are re-read under the write lock before the batch is added to them.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .hll import HyperLogLog
+from .models import Tip, TipViewStats
+
+
+def visitor_key(user_id, session_key):
+    return f'u{user_id}' if user_id else f's{session_key}'
+
+
+def record_views(pending):
+    # pending: {(user_id, session_key, date): PendingActivity} from the activity buffer
+    views = defaultdict(int)
+    visitors = defaultdict(set)
+
+    for (user_id, session_key, date), activity in pending.items():
+        visitor = visitor_key(user_id, session_key)
+        for tip_id, count in activity.tip_ids.items():
+            views[tip_id, date] += count
+            visitors[tip_id, date].add(visitor)
+
+    if not views:
+        return
+
+    # Ignoring tips deleted since they were viewed
+    tip_ids = set(Tip.objects.filter(pk__in={tip_id for tip_id, _ in views}).values_list('pk', flat=True))
+    keys = [key for key in views if key[0] in tip_ids]
+
+    # Creating the missing rows first, keeping any another process created meanwhile,
+    # then reading them back under the transaction's write lock to add to what is stored
+    TipViewStats.objects.bulk_create(
+        [TipViewStats(tip_id=tip_id, date=date, views=0, sketch=HyperLogLog().to_bytes()) for tip_id, date in keys],
+        ignore_conflicts=True,
+    )
+    rows = TipViewStats.objects.select_for_update().filter(tip_id__in=tip_ids, date__in={date for _, date in keys})
+
+    updated = []
+    for row in rows:
+        key = (row.tip_id, row.date)
+        if key not in views:
+            continue
+
+        row.views = F('views') + views[key]
+        sketch = HyperLogLog.from_bytes(row.sketch)
+        for visitor in visitors[key]:
+            sketch.add(visitor)
+        row.sketch = sketch.to_bytes()
+        updated.append(row)
+
+    TipViewStats.objects.bulk_update(updated, ['views', 'sketch'])
+
+    totals = defaultdict(int)
+    for tip_id, date in keys:
+        totals[tip_id] += views[tip_id, date]
+
+    tips = []
+    for tip_id, total in totals.items():
+        tip = Tip(pk=tip_id)
+        tip.views_count = F('views_count') + total
+        tips.append(tip)
+    Tip.objects.bulk_update(tips, ['views_count'])
+
+
+def unique_visitors(tip, start=None, end=None):
+    # Approximate distinct visitors between two dates (inclusive, open ended when omitted)
+    rows = TipViewStats.objects.filter(tip=tip)
+    if start is not None:
+        rows = rows.filter(date__gte=start)
+    if end is not None:
+        rows = rows.filter(date__lte=end)
+
+    sketch = HyperLogLog()
+    for data in rows.values_list('sketch', flat=True):
+        sketch.merge(HyperLogLog.from_bytes(data))
+    return sketch.count()
+
+
+def recent_unique_visitors(tip, days=30):
+    today = timezone.localdate()
+    return unique_visitors(tip, today - timedelta(days=days - 1), today)
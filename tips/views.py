@@ -4,82 +4,61 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from .models import Tip, Category, Like, Comment, Bookmark
+from .models import Tip, Category, Comment
 from .forms import TipForm, CommentForm
-from django.views.decorators.http import require_POST
-from accounts.models import UserActivity
+from django.views.decorators.http import require_GET, require_POST, etag
+from django.views.decorators.vary import vary_on_cookie
+from accounts.models import Follow, UserActivity
+
+import hashlib
+import json
 
-from django.db.models import Q, Count
 from django.core.paginator import Paginator
+from django.db.models import Count, F
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.db import transaction
 
-from django.utils import timezone
-from datetime import timedelta
 from django.contrib.auth import get_user_model
 from accounts.utils import update_user_impact_score
+from accounts import summary as profile_summary
+from core import stats
+from core.ratelimit import ratelimit
+from . import api, community, feed, interactions, listing, similarity, view_stats
+from .listing import TIP_ORDERINGS
+from .pagination import CursorPaginator
+
+COMMENTS_PER_PAGE = 20
+PEOPLE_PER_PAGE = 12
+
 
 # Developed by Krish
 def tip_list_view(request):
     """Displaying tips."""
 
-    tips = Tip.objects.filter(is_published=True, author__is_active=True).select_related('author', 'category').annotate(
-        likes_count=Count('likes', distinct=True),
-        comments_count=Count('comments', distinct=True)
-    )
-
-    # Filtering by category
     category_slug = request.GET.get('category')
-    if category_slug:
-        tips = tips.filter(category__slug=category_slug)
-
-    # Searching tips
     search_query = request.GET.get('search')
-    if search_query:
-        tips = tips.filter(
-            Q(title__icontains=search_query) |
-            Q(content__icontains=search_query)
-        )
-
-    # Filtering by date
     date_range = request.GET.get('date_range')
-    if date_range == 'last_7_days':
-        since = timezone.now() - timedelta(days=7)
-        tips = tips.filter(created_at__gte=since)
-    elif date_range == 'last_month':
-        since = timezone.now() - timedelta(days=30)
-        tips = tips.filter(created_at__gte=since)
-
-    # Sorting tips
     sort_by = request.GET.get('sort_by')
-    if sort_by == 'oldest':
-        tips = tips.order_by('created_at')
-    elif sort_by == 'most_liked':
-        tips = tips.order_by('-likes_count', '-created_at')
-    elif sort_by == 'most_commented':
-        tips = tips.order_by('-comments_count', '-created_at')
-    else:
-        # Defaulting to newest
-        tips = tips.order_by('-created_at')
 
-    paginator = Paginator(tips, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Filtering, searching and sorting (served from the listing cache when possible)
+    filters = listing.normalize_filters(request.GET)
+    page_obj = listing.get_page(filters, request.GET.get('cursor'), request.user, request.GET)
     
-    # Adding display names and interaction status
+    # Adding display names
     for tip in page_obj:
         tip.author_display_name = tip.author.get_full_name() or tip.author.username
-        
-        if request.user.is_authenticated:
-            tip.is_liked = tip.likes.filter(user=request.user).exists()
-            tip.is_bookmarked = tip.bookmarks.filter(user=request.user).exists()
-        else:
-            tip.is_liked = False
-            tip.is_bookmarked = False
+
+    # Returning only the cards for infinite scroll
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = render(request, 'tips/_tip_cards.html', {'page_obj': page_obj})
+        response['X-Next-Page'] = f'?{page_obj.next_query}' if page_obj.has_next() else ''
+        return response
 
     categories = Category.objects.filter(is_approved=True)
 
     # Getting stats
-    total_tips = Tip.objects.filter(is_published=True, author__is_active=True).count()
-    total_likes = Like.objects.count()
+    totals = stats.get_stats('published_tips', 'total_likes')
 
     context = {
         'page_obj': page_obj,
@@ -88,19 +67,46 @@ def tip_list_view(request):
         'selected_category': category_slug,
         'date_range': date_range,
         'sort_by': sort_by,
-        'total_tips': total_tips,
-        'total_likes': total_likes,
+        'total_tips': totals['published_tips'],
+        'total_likes': totals['total_likes'],
     }
 
     return render(request, 'tips/tip_list.html', context)
 
 
+@require_GET
+@vary_on_cookie
+@etag(api.listing_etag)
+def tip_list_api_view(request):
+    """Returning a tip list page as JSON."""
+
+    try:
+        fields = api.parse_fields(request.GET.get('fields'))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    filters = listing.normalize_filters(request.GET)
+    page_obj = listing.get_page(filters, request.GET.get('cursor'), request.user, request.GET)
+
+    return JsonResponse({
+        'results': [api.serialize_tip(tip, fields) for tip in page_obj],
+        'next': f'?{page_obj.next_query}' if page_obj.has_next() else None,
+        'previous': f'?{page_obj.previous_query}' if page_obj.has_previous() else None,
+    })
+
+
 # Developed by Krish
+@ratelimit('comment')
 def tip_detail_view(request, slug):
     """Displaying tip details."""
 
+    # Answering conditional requests before loading comments or related tips
+    not_modified = _detail_not_modified(request, slug)
+    if not_modified is not None:
+        return not_modified
+
     tip = get_object_or_404(
-        Tip.objects.select_related('author', 'category'),
+        Tip.objects.select_related('author', 'category').with_viewer_state(request.user),
         slug=slug
     )
 
@@ -112,14 +118,6 @@ def tip_detail_view(request, slug):
 
     # Tracking view
     UserActivity.log_activity(request, tip_id=tip.id)
-    comments = tip.comments.select_related('author').order_by('-created_at')
-
-    # Checking interactions
-    is_liked = False
-    is_bookmarked = False
-    if request.user.is_authenticated:
-        is_liked = tip.likes.filter(user=request.user).exists()
-        is_bookmarked = tip.bookmarks.filter(user=request.user).exists()
 
     if request.method == 'POST':
         if not request.user.is_authenticated:
@@ -131,7 +129,8 @@ def tip_detail_view(request, slug):
             comment = comment_form.save(commit=False)
             comment.tip = tip
             comment.author = request.user
-            comment.save()
+            with transaction.atomic():
+                comment.save()
 
             # Updating impact
             update_user_impact_score(request.user)
@@ -142,30 +141,107 @@ def tip_detail_view(request, slug):
     else:
         comment_form = CommentForm()
 
-    related_tips = Tip.objects.filter(
-        category=tip.category,
-        is_published=True,
-        author__is_active=True
-    ).exclude(
-        id=tip.id
-    ).order_by('-created_at')[:3]
+    related_tips = similarity.related_tips(tip)
+    if not related_tips:
+        # Falling back to the newest tips in the same category until neighbours are computed
+        related_tips = Tip.objects.filter(
+            category=tip.category,
+            is_published=True,
+            author__is_active=True
+        ).exclude(
+            id=tip.id
+        ).select_related('author', 'category').order_by('-created_at')[:3]
 
     # Adding display names
     tip.author_display_name = tip.author.get_full_name() or tip.author.username
-    
-    for comment in comments:
-        comment.author_display_name = comment.author.get_full_name() or comment.author.username
+
+    # First page of comments (the rest is loaded by tip_comments_view)
+    comments = _get_comment_page(tip, request)
 
     context = {
         'tip': tip,
         'comments': comments,
         'comment_form': comment_form,
-        'is_liked': is_liked,
-        'is_bookmarked': is_bookmarked,
+        'is_liked': tip.is_liked,
+        'is_bookmarked': tip.is_bookmarked,
         'related_tips': related_tips,
+        'unique_visitors': view_stats.recent_unique_visitors(tip),
     }
 
-    return render(request, 'tips/tip_detail.html', context)
+    response = render(request, 'tips/tip_detail.html', context)
+
+    # Adding validators for the next visit
+    etag, last_modified = _detail_validators(
+        tip.pk, tip.updated_at, tip.engagement_version, tip.last_engaged_at, tip.author.last_activity, request.user
+    )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def _detail_validators(tip_id, updated_at, engagement_version, last_engaged_at, author_active_at, viewer):
+    # Weak ETag (the CSRF token differs per render) and Last-Modified timestamp for a detail page
+    raw = f'{tip_id}:{updated_at.isoformat()}:{engagement_version}:{author_active_at.isoformat()}:{viewer.pk}'
+    etag = f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+    last_modified = max(moment for moment in (updated_at, last_engaged_at, author_active_at) if moment is not None)
+    return etag, int(last_modified.timestamp())
+
+
+def _detail_not_modified(request, slug):
+    # Returning a 304 when the client's copy of the page is still current
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if 'If-None-Match' not in request.headers and 'If-Modified-Since' not in request.headers:
+        return None
+
+    state = Tip.objects.filter(slug=slug).values(
+        'pk', 'is_published', 'author_id', 'updated_at', 'engagement_version', 'last_engaged_at', 'author__last_activity'
+    ).first()
+    if state is None or (not state['is_published'] and state['author_id'] != request.user.pk):
+        return None
+
+    # Pending flash messages need a fresh render
+    if len(messages.get_messages(request)):
+        return None
+
+    etag, last_modified = _detail_validators(
+        state['pk'], state['updated_at'], state['engagement_version'], state['last_engaged_at'],
+        state['author__last_activity'], request.user
+    )
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+
+    # Still counting the visit
+    UserActivity.log_activity(request, tip_id=state['pk'])
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def tip_comments_view(request, slug):
+    """Returning the next page of comments for infinite scroll."""
+
+    tip = get_object_or_404(Tip.objects.only('pk', 'slug', 'is_published', 'author_id'), slug=slug)
+    if not tip.is_published and tip.author_id != request.user.pk:
+        from django.http import Http404
+        raise Http404("No Tip matches the given query.")
+
+    comments = _get_comment_page(tip, request)
+
+    response = render(request, 'tips/_comments.html', {'comments': comments})
+    response['X-Next-Page'] = f'{request.path}?{comments.next_query}' if comments.has_next() else ''
+    return response
+
+
+def _get_comment_page(tip, request):
+    # Newest comments first, with the author name computed in SQL
+    comments = Comment.objects.filter(tip=tip).select_related('author').with_author_display_name()
+    paginator = CursorPaginator(comments, ('-created_at', '-id'), COMMENTS_PER_PAGE)
+    return paginator.get_page(request.GET.get('cursor'), request.GET)
 
 
 # Developed by Devendra
@@ -264,24 +340,14 @@ def delete_tip_view(request, slug):
 # Developed by Nandha and Priya
 @login_required(login_url='accounts:login')
 @require_POST
+@ratelimit('toggle')
 def toggle_like_view(request, slug):
     """Toggling like status."""
 
     tip = get_object_or_404(Tip, slug=slug, is_published=True)
 
-    # Checking existing like
-    like, created = Like.objects.get_or_create(user=request.user, tip=tip)
-
-    if not created:
-        # Removing like
-        like.delete()
-        liked = False
-    else:
-        # Adding like
-        liked = True
-
-    # Getting count
-    likes_count = tip.likes.count()
+    # Flipping the like and reading the count in one transaction
+    liked, likes_count = interactions.toggle(request.user, tip, 'like')
 
     return JsonResponse({
         'liked': liked,
@@ -289,6 +355,22 @@ def toggle_like_view(request, slug):
     })
 
 
+@login_required(login_url='accounts:login')
+@require_POST
+@ratelimit('toggle')
+def interactions_batch_view(request):
+    """Applying queued likes and bookmarks."""
+
+    try:
+        operations = interactions.parse_operations(json.loads(request.body or b'null'))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    return JsonResponse({
+        'results': interactions.apply_batch(request.user, operations)
+    })
+
+
 # Developed by Devendra
 @login_required(login_url='accounts:login')
 @require_POST
@@ -316,15 +398,11 @@ def my_tips_view(request):
 
     tips = Tip.objects.filter(
         author=request.user
-    ).annotate(
-        likes_count=Count('likes', distinct=True),
-        comments_count=Count('comments', distinct=True)
-    ).order_by('-created_at')
+    ).select_related('author', 'category').with_viewer_state(request.user)
 
     # Paginating tips
-    paginator = Paginator(tips, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(tips, TIP_ORDERINGS['newest'], 10)
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     # Adding display names
     for tip in page_obj:
@@ -337,6 +415,29 @@ def my_tips_view(request):
     return render(request, 'tips/my_tips.html', context)
 
 
+@login_required(login_url='accounts:login')
+def feed_view(request):
+    """Displaying tips from followed authors."""
+
+    page_obj = feed.get_page(request.user, request.GET.get('cursor'), request.GET)
+
+    # Adding display names
+    for tip in page_obj:
+        tip.author_display_name = tip.author.get_full_name() or tip.author.username
+
+    # Returning only the cards for infinite scroll
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = render(request, 'tips/_tip_cards.html', {'page_obj': page_obj})
+        response['X-Next-Page'] = f'?{page_obj.next_query}' if page_obj.has_next() else ''
+        return response
+
+    context = {
+        'page_obj': page_obj,
+    }
+
+    return render(request, 'tips/feed.html', context)
+
+
 # Developed by Devendra
 def category_detail_view(request, slug):
     """Displaying category tips."""
@@ -352,15 +453,11 @@ def category_detail_view(request, slug):
         category=category,
         is_published=True,
         author__is_active=True
-    ).select_related('author').annotate(
-        likes_count=Count('likes', distinct=True),
-        comments_count=Count('comments', distinct=True)
-    ).order_by('-created_at')
+    ).select_related('author').with_viewer_state(request.user)
 
     # Paginating tips
-    paginator = Paginator(tips, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(tips, TIP_ORDERINGS['newest'], 12)
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
 
     context = {
         'category': category,
@@ -373,24 +470,14 @@ def category_detail_view(request, slug):
 # Developed by Nandha and Priya
 @login_required(login_url='accounts:login')
 @require_POST
+@ratelimit('toggle')
 def toggle_bookmark_view(request, slug):
     """Toggling bookmark status."""
 
     tip = get_object_or_404(Tip, slug=slug, is_published=True)
 
-    # Checking existing bookmark
-    bookmark, created = Bookmark.objects.get_or_create(user=request.user, tip=tip)
-
-    if not created:
-        # Removing bookmark
-        bookmark.delete()
-        bookmarked = False
-    else:
-        # Adding bookmark
-        bookmarked = True
-
-    # Getting count
-    bookmarks_count = tip.bookmarks.count()
+    # Flipping the bookmark and reading the count in one transaction
+    bookmarked, bookmarks_count = interactions.toggle(request.user, tip, 'bookmark')
 
     return JsonResponse({
         'bookmarked': bookmarked,
@@ -403,25 +490,23 @@ def toggle_bookmark_view(request, slug):
 def saved_tips_view(request):
     """Displaying saved tips."""
 
-    # Getting bookmarks
-    bookmarks = Bookmark.objects.filter(
-        user=request.user
+    # Getting bookmarked tips
+    tips = Tip.objects.filter(
+        bookmarks__user=request.user
     ).select_related(
-        'tip__author',
-        'tip__category'
+        'author',
+        'category'
     ).annotate(
-        likes_count=Count('tip__likes', distinct=True),
-        comments_count=Count('tip__comments', distinct=True)
-    ).order_by('-created_at')
-
-    # Paginating bookmarks
-    paginator = Paginator(bookmarks, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        saved_at=F('bookmarks__created_at')
+    ).with_viewer_state(request.user)
+
+    # Paginating tips by save date
+    paginator = CursorPaginator(tips, ('-saved_at', '-id'), 12)
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET)
     
     # Adding display names
-    for bookmark in page_obj:
-        bookmark.tip.author_display_name = bookmark.tip.author.get_full_name() or bookmark.tip.author.username
+    for tip in page_obj:
+        tip.author_display_name = tip.author.get_full_name() or tip.author.username
 
     context = {
         'page_obj': page_obj,
@@ -435,32 +520,52 @@ def saved_tips_view(request):
 def community_view(request):
     """Displaying community members."""
     User = get_user_model()
-    
-    # Getting all users except self and inactive users
-    users = User.objects.exclude(id=request.user.id).filter(is_active=True).order_by('-date_joined')
-    
-    # Splitting into following and suggested
-    following_users = []
-    suggested_users = []
-    
-    for user in users:
-        user.is_following = request.user.is_following(user)
-        if user.is_following:
-            following_users.append(user)
-        else:
-            suggested_users.append(user)
-            
+
+    # Ranked suggestions (precomputed, see tips/community.py)
+    suggested_page = _people_page(request, community.suggestion_ids(request.user), 'suggested_page')
+
+    # People the viewer follows, newest follow first
+    following_ids = Follow.objects.filter(
+        follower=request.user,
+        following__is_active=True
+    ).order_by('-created_at', '-id').values_list('following_id', flat=True)
+    following_page = _people_page(request, following_ids, 'following_page')
+
+    # Loading both pages of people in one query
+    people = community.with_follow_state(
+        User.objects.filter(pk__in=[*suggested_page.object_list, *following_page.object_list]),
+        request.user
+    ).annotate(followers_total=Count('followers_set')).in_bulk()
+
     context = {
-        'following_users': following_users,
-        'suggested_users': suggested_users,
+        'suggested_users': [people[pk] for pk in suggested_page.object_list if pk in people],
+        'following_users': [people[pk] for pk in following_page.object_list if pk in people],
+        'suggested_page': suggested_page,
+        'following_page': following_page,
     }
-    
+
     return render(request, 'tips/community.html', context)
 
 
+def _people_page(request, ids, param):
+    # One page of user ids, with links that keep the other list's page
+    page = Paginator(ids, PEOPLE_PER_PAGE).get_page(request.GET.get(param))
+
+    def query(number):
+        params = request.GET.copy()
+        params[param] = number
+        return params.urlencode()
+
+    page.object_list = list(page.object_list)
+    page.previous_query = query(page.previous_page_number()) if page.has_previous() else ''
+    page.next_query = query(page.next_page_number()) if page.has_next() else ''
+    return page
+
+
 # Developed by Nandha and Priya
 @login_required(login_url='accounts:login')
 @require_POST
+@ratelimit('follow')
 def toggle_follow_view(request, username):
     """Toggling follow status."""
     User = get_user_model()
@@ -483,5 +588,5 @@ def toggle_follow_view(request, username):
         
     return JsonResponse({
         'is_following': is_following,
-        'followers_count': target_user.get_followers_count()
+        'followers_count': profile_summary.get(target_user)['followers_count']
     })
\ No newline at end of file